@@ -1,11 +1,36 @@
-from .api import SklandApi, SklandApiException
-from .models.auth import AuthInfo
-from .models.character import CharacterInfo, CharacterInfoLoader
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .api import SklandApi, SklandApiException
+    from .fleet import FleetResult, SklandFleet
+    from .models.auth import AuthInfo
+    from .models.character import CharacterInfo, CharacterInfoLoader
+
+# 延迟导入, 避免仅使用命令行帮助等场景时导入 httpx
+_exports = {
+    "AuthInfo": ".models.auth",
+    "CharacterInfo": ".models.character",
+    "CharacterInfoLoader": ".models.character",
+    "FleetResult": ".fleet",
+    "SklandFleet": ".fleet",
+    "SklandApi": ".api",
+    "SklandApiException": ".api",
+}
+
+
+def __getattr__(name: str):
+    if (module_name := _exports.get(name)) is not None:
+        return getattr(importlib.import_module(module_name, __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "AuthInfo",
     "CharacterInfo",
     "CharacterInfoLoader",
+    "FleetResult",
     "SklandApi",
+    "SklandFleet",
     "SklandApiException",
 ]
@@ -0,0 +1,130 @@
+import asyncio
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Self
+from urllib.parse import parse_qsl, urlsplit
+
+from loguru import logger
+
+MAX_HEADER_COUNT = 100
+
+if TYPE_CHECKING:
+    from ssl import SSLContext
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class HttpRequest:
+    """
+    headers 的键均为小写
+    """
+
+    method: str
+    target: str
+    path: str
+    query: dict[str, str]
+    headers: dict[str, str]
+    body: bytes
+
+    def json(self):
+        return json.loads(self.body)
+
+
+@dataclass(kw_only=True, slots=True)
+class HttpResponse:
+    status: int = 200
+    body: bytes = b""
+    headers: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_json(cls, data, status: int = 200) -> Self:
+        return cls(
+            status=status,
+            body=json.dumps(data, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        )
+
+    @classmethod
+    def from_text(cls, text: str, status: int = 200, content_type: str = "text/plain") -> Self:
+        return cls(
+            status=status,
+            body=text.encode("utf-8"),
+            headers={"Content-Type": f"{content_type}; charset=utf-8"},
+        )
+
+
+HttpHandler = Callable[[HttpRequest], Awaitable[HttpResponse]]
+
+
+async def read_request(reader: asyncio.StreamReader) -> HttpRequest | None:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+
+    headers = {}
+    for _ in range(MAX_HEADER_COUNT):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    parts = urlsplit(target)
+    return HttpRequest(
+        method=method,
+        target=target,
+        path=parts.path,
+        query=dict(parse_qsl(parts.query)),
+        headers=headers,
+        body=body,
+    )
+
+
+def encode_response(response: HttpResponse, keep_alive: bool) -> bytes:
+    reason = HTTPStatus(response.status).phrase
+    headers = {
+        "Content-Length": str(len(response.body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+    } | response.headers
+    head = f"HTTP/1.1 {response.status} {reason}\r\n"
+    head += "".join(f"{key}: {value}\r\n" for key, value in headers.items())
+    return head.encode("latin-1") + b"\r\n" + response.body
+
+
+async def serve_http(
+    handler: HttpHandler,
+    host: str,
+    port: int,
+    backlog: int = 100,
+    ssl: SSLContext | None = None,
+) -> asyncio.Server:
+    """
+    极简的 HTTP/1.1 服务器, 仅支持 Content-Length 形式的请求体, 用于本地服务 (指标, 测试桩等).
+    ssl 非空时使用 HTTPS
+    """
+
+    async def on_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while (request := await read_request(reader)) is not None:
+                try:
+                    response = await handler(request)
+                except Exception:
+                    logger.exception(
+                        f"internal error while handling {request.method} {request.target}"
+                    )
+                    response = HttpResponse(status=500)
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                writer.write(encode_response(response, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(on_connection, host, port, backlog=backlog, ssl=ssl)
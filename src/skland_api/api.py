@@ -8,6 +8,10 @@ from typing import Literal, Never
 
 import httpx
 
+from . import breaker, instrumentation
+from .deadline import stage
+from .instrumentation import phase
+
 APP_CODE = "4ca99fa6b56cc2ba"  # magic code
 
 
@@ -22,6 +26,28 @@ class SklandApiException(Exception):
         return f"[{self.response.request.method} {url}] ({self.code}) {self.msg}"
 
 
+def sign(token: str, path: str, payload: str, timestamp: str) -> str:
+    """
+    GET 请求的 payload 为查询字符串, POST 请求为请求体
+    """
+    payload_to_sign = "".join(
+        [
+            path,
+            payload,
+            timestamp,
+            '{"platform":"","timestamp":"',
+            timestamp,
+            '","dId":"","vName":""}',
+        ]
+    )
+    encrypted = hmac.new(
+        token.encode("utf-8"),
+        payload_to_sign.encode("utf-8"),
+        hashlib.sha256,
+    ).hexdigest()
+    return hashlib.md5(encrypted.encode("utf-8")).hexdigest()
+
+
 class SklandClientAuth(httpx.Auth):
     def __init__(self, token: str | None = None):
         self.token = token
@@ -39,25 +65,9 @@ class SklandClientAuth(httpx.Auth):
             payload = request.content.decode("utf-8")
 
         timestamp = str(int(time.time()))
-        payload_to_sign = "".join(
-            [
-                path,
-                payload,
-                timestamp,
-                '{"platform":"","timestamp":"',
-                timestamp,
-                '","dId":"","vName":""}',
-            ]
-        )
-        encrypted = hmac.new(
-            self.token.encode("utf-8"),
-            payload_to_sign.encode("utf-8"),
-            hashlib.sha256,
-        ).hexdigest()
-        sign = hashlib.md5(encrypted.encode("utf-8")).hexdigest()
         request.headers.update(
             {
-                "sign": sign,
+                "sign": sign(self.token, path, payload, timestamp),
                 "platform": "",
                 "timestamp": timestamp,
                 "dId": "",
@@ -70,14 +80,19 @@ class SklandClientAuth(httpx.Auth):
 class SklandClient:
     client: httpx.AsyncClient
 
-    def __init__(self) -> None:
+    def __init__(
+        self, transport: httpx.AsyncBaseTransport | None = None, *, keep_alive: bool = False
+    ) -> None:
+        headers = {
+            "User-Agent": "Skland/1.0.1 (com.hypergryph.skland; build:100001014; Android 31; ) Okhttp/4.11.0",
+            "Accept-Encoding": "gzip",
+        }
+        if not keep_alive:
+            headers["Connection"] = "close"
         self.client = httpx.AsyncClient(
             auth=SklandClientAuth(),
-            headers={
-                "User-Agent": "Skland/1.0.1 (com.hypergryph.skland; build:100001014; Android 31; ) Okhttp/4.11.0",
-                "Accept-Encoding": "gzip",
-                "Connection": "close",
-            },
+            transport=transport,
+            headers=headers,
         )
 
     @property
@@ -103,9 +118,52 @@ class SklandClient:
         self.client.auth = SklandClientAuth(token)
 
     async def request(self, method: Literal["GET", "POST"], url: str, **kwargs):
-        response = await self.client.request(method, url, **kwargs)
+        # 设置了截止时间 (deadline.use_deadline) 时, 请求在截止时间到达时被取消并抛出 TimeoutError
+        async with stage():
+            if breaker.registry is None:
+                return await self.send(method, url, **kwargs)
+
+            circuit = breaker.registry.get(url)
+            probe = circuit.acquire()
+            success = None
+            try:
+                result = await self.send(method, url, **kwargs)
+                success = True
+                return result
+            except Exception as e:
+                success = not breaker.is_upstream_failure(e)
+                raise
+            finally:
+                circuit.record(success, probe)
+
+    async def send(self, method: Literal["GET", "POST"], url: str, **kwargs) -> dict:
+        if not instrumentation.instruments:
+            return self.decode(await self.client.request(method, url, **kwargs))
+
+        start = time.perf_counter()
+        response = None
+        error = None
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            return self.decode(response)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            instrumentation.request_finished(
+                method=method,
+                url=url,
+                start=start,
+                response=response,
+                error_code=error.code if isinstance(error, SklandApiException) else None,
+                error=error,
+            )
+
+    @staticmethod
+    def decode(response: httpx.Response) -> dict:
         try:
-            response = response.json()
+            with phase("json_decode"):
+                data = response.json()
         except json.JSONDecodeError:
             preview = response.text[:50].replace("\n", " ")
             raise SklandApiException(
@@ -113,14 +171,14 @@ class SklandClient:
                 msg=f"响应解析失败(非json): {preview}",
                 response=response,
             ) from None
-        code = response.get("status", 0) or response.get("code", 0)
+        code = data.get("status", 0) or data.get("code", 0)
         if code != 0:
             raise SklandApiException(
                 code=code,
-                msg=response.get("msg") or response.get("message", ""),
+                msg=data.get("msg") or data.get("message", ""),
                 response=response,
             )
-        return response
+        return data
 
     async def get(self, url: str, **kwargs) -> dict:
         return await self.request("GET", url, **kwargs)
@@ -130,8 +188,15 @@ class SklandClient:
 
 
 class SklandApi:
-    def __init__(self):
-        self.client = SklandClient()
+    """
+    keep_alive: 复用连接, 用于多个账号共享同一个 transport (及其连接池) 的场景.
+        缺省时每个请求结束后关闭连接
+    """
+
+    def __init__(
+        self, transport: httpx.AsyncBaseTransport | None = None, *, keep_alive: bool = False
+    ):
+        self.client = SklandClient(transport, keep_alive=keep_alive)
 
     async def token_from_phone_password(self, phone: str, password: str) -> str:
         response = await self.client.post(
@@ -0,0 +1,222 @@
+"""
+与时间有关的模块的批量计算
+
+sanity, recruit, routine, infrast_basic 的 main 逐个角色用 Python 标量计算. 角色很多时, 可以先把需要的字段
+收集为列数组, 再用 numpy 一次算出所有角色的结果:
+
+    results = evaluate("sanity", character_infos)
+
+返回值与逐个调用模块的 main 相同 (相同的 dataclass, 相同的数值), 顺序与 character_infos 一致.
+浮点运算与标量实现保持相同的运算顺序, 因此结果逐位一致. 需要安装 numpy: pip install 'skland-api[batch]'
+"""
+
+from collections.abc import Callable, Sequence
+from typing import TYPE_CHECKING
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError("批量计算需要安装额外的依赖, 请运行: pip install 'skland-api[batch]'") from e
+
+from .models import Capacity, Duration, Progress, TimeStamp
+
+if TYPE_CHECKING:
+    from .models import CharacterInfo, TrainingState
+
+registry: dict[str, Callable[[Sequence[CharacterInfo]], list]] = {}
+
+
+def batched[F: Callable](module_name: str) -> Callable[[F], F]:
+    def decorator(func: F) -> F:
+        registry[module_name] = func
+        return func
+
+    return decorator
+
+
+def evaluate(module_name: str, character_infos: Sequence[CharacterInfo]) -> list:
+    """
+    使用当前的 TimeStamp.now() (通常由 evaluation_clock 固定), 没有批量实现的模块抛出 KeyError
+    """
+    if not character_infos:
+        return []
+    return registry[module_name](character_infos)
+
+
+def column(values: list, dtype: type = np.int64) -> np.ndarray:
+    return np.array(values, dtype=dtype)
+
+
+def truncate(values: np.ndarray) -> np.ndarray:
+    """
+    与 int() 相同, 向零取整
+    """
+    return np.trunc(values).astype(np.int64)
+
+
+@batched("sanity")
+def sanity(character_infos: Sequence[CharacterInfo]) -> list:
+    from .modules.sanity import SANITY_RECOVER_PER_SECOND, SanityStatus
+
+    now = TimeStamp.now()
+    ap_data = [character_info.player_info["status"]["ap"] for character_info in character_infos]
+    current = column([ap["current"] for ap in ap_data])
+    total = column([ap["max"] for ap in ap_data])
+    since_last_add = now - column([ap["lastApAddTime"] for ap in ap_data])
+
+    recovered = np.minimum(total, truncate(current + since_last_add * SANITY_RECOVER_PER_SECOND))
+    # 当前理智超限时不计算自更新以来的回复值
+    current = np.where(current < total, recovered, current)
+
+    return [
+        SanityStatus(sanity=Capacity(current, total), full_at=TimeStamp(ap["completeRecoveryTime"]))
+        for current, total, ap in zip(current.tolist(), total.tolist(), ap_data)
+    ]
+
+
+@batched("recruit")
+def recruit(character_infos: Sequence[CharacterInfo]) -> list:
+    from .modules.recruit import (
+        IS_RECRUITING,
+        MAX_REFRESH_COUNT,
+        RecruitOverview,
+        RecruitStatus,
+    )
+
+    now = TimeStamp.now()
+    slots = [character_info.player_info["recruit"] for character_info in character_infos]
+    flat = [item for items in slots for item in items]
+    is_idle = (column([item["state"] for item in flat]) != IS_RECRUITING).tolist()
+
+    hire_data = [
+        character_info.player_info["building"]["hire"] for character_info in character_infos
+    ]
+    refresh_count = column([hire["refreshCount"] for hire in hire_data])
+    complete_at = column([hire["completeWorkTime"] for hire in hire_data])
+    is_full = refresh_count == MAX_REFRESH_COUNT
+    current_refresh = refresh_count + (~is_full & (complete_at - now < 0))
+
+    results = []
+    offset = 0
+    for items, current, full, refresh_at in zip(
+        slots, current_refresh.tolist(), is_full.tolist(), complete_at.tolist()
+    ):
+        recruits = [
+            RecruitStatus(is_idle=True)
+            if idle
+            else RecruitStatus(is_idle=False, finish_at=item["finishTs"])
+            for item, idle in zip(items, is_idle[offset : offset + len(items)])
+        ]
+        offset += len(items)
+        results.append(
+            RecruitOverview(
+                recruits=recruits,
+                refresh=Capacity(current, MAX_REFRESH_COUNT),
+                refresh_at=None if full else TimeStamp(refresh_at),
+            )
+        )
+    return results
+
+
+@batched("routine")
+def routine(character_infos: Sequence[CharacterInfo]) -> list:
+    from .modules.routine import RoutineStatus, get_annihilation_end_time
+
+    # 剿灭作战的重置时间只与当前时间有关, 所有角色相同
+    annihilation_reset_at = get_annihilation_end_time()
+    results = []
+    for character_info in character_infos:
+        campaign = character_info.player_info["campaign"]["reward"]
+        tower = character_info.player_info["tower"]["reward"]
+        instrument = tower["higherItem"]
+        component = tower["lowerItem"]
+        results.append(
+            RoutineStatus(
+                annihilation=Progress(campaign["current"], campaign["total"]),
+                annihilation_reset_at=annihilation_reset_at,
+                sss_instrument=Progress(instrument["current"], instrument["total"]),
+                sss_component=Progress(component["current"], component["total"]),
+                sss_reset_at=TimeStamp(tower["termTs"]),
+            )
+        )
+    return results
+
+
+@batched("infrast_basic")
+def infrast_basic(character_infos: Sequence[CharacterInfo]) -> list:
+    from .modules.infrast_basic import (
+        BASIC_TRAIN_PER_SECOND,
+        TOTAL_TRAIN_POINT,
+        InfrastOverview,
+        Mastery,
+    )
+
+    now = TimeStamp.now()
+    labor_data = [
+        character_info.player_info["building"]["labor"] for character_info in character_infos
+    ]
+    current = column([labor["value"] for labor in labor_data])
+    total = column([labor["maxValue"] for labor in labor_data])
+    remain_seconds = column([labor["remainSecs"] for labor in labor_data])
+    sec_since_update = now - column(
+        [character_info.view("status").store_at for character_info in character_infos]
+    )
+
+    # 无人机的 remainSecs 数据按照更新时间计算（与专精的 remainSecs 不同）
+    recovering = remain_seconds > 0
+    approximate_recover_speed = (total - current) / np.where(recovering, remain_seconds, 1)
+    drones = np.where(
+        recovering,
+        np.minimum(current + truncate(sec_since_update * approximate_recover_speed), total),
+        current,
+    )
+    drones_full_in = np.where(recovering, remain_seconds - sec_since_update, remain_seconds)
+
+    # 只为正在专精的角色计算专精进度
+    trainings: list[TrainingState | None] = [
+        character_info.view("training") for character_info in character_infos
+    ]
+    training_index = [index for index, training in enumerate(trainings) if training is not None]
+    in_training = [training for training in trainings if training is not None]
+    train_total = column([TOTAL_TRAIN_POINT[t.skill_mastery_level] for t in in_training])
+    remain_point = column([t.remain_point for t in in_training])
+    speed = column([t.speed for t in in_training], np.float64)
+    train_since_update = now - column([t.updated_at for t in in_training])
+    train_current = np.minimum(
+        truncate(train_total - remain_point + BASIC_TRAIN_PER_SECOND * speed * train_since_update),
+        train_total,
+    )
+    masteries: list[Mastery | None] = [None] * len(character_infos)
+    for index, training, progress_current, progress_total in zip(
+        training_index, in_training, train_current.tolist(), train_total.tolist()
+    ):
+        masteries[index] = Mastery(
+            trainee_name=training.trainee_name,
+            skill_id=training.skill_id,
+            skill_mastery_level=training.skill_mastery_level,
+            trainer_name=training.trainer_name,
+            speed=training.speed,
+            progress=Progress(progress_current, progress_total),
+            remain_seconds=Duration(training.remain_seconds),
+        )
+
+    return [
+        InfrastOverview(
+            drones=Capacity(drones_current, drones_total),
+            drones_full_in=Duration(full_in),
+            exhausted_operators=[
+                character_info.operator_name_mapping[char["charId"]]
+                for char in character_info.player_info["building"]["tiredChars"]
+            ],
+            mastery=mastery,
+        )
+        for character_info, drones_current, drones_total, full_in, mastery in zip(
+            character_infos, drones.tolist(), total.tolist(), drones_full_in.tolist(), masteries
+        )
+    ]
+
+
+__all__ = [
+    "evaluate",
+    "registry",
+]
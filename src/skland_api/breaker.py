@@ -0,0 +1,231 @@
+"""
+按 (host, 接口路径) 区分的熔断器
+
+    registry = breaker.enable(BreakerPolicy(consecutive_failures=3))
+    ...
+    for state in registry.states():
+        print(state.host, state.endpoint, state.state)
+
+启用后, SklandClient 的每个请求先经过对应接口的熔断器: 连续失败次数或最近若干次请求的失败率超过阈值时熔断器打开,
+此后的请求直接抛出 CircuitOpenError, 不再发往上游. 经过 reset_timeout 秒后进入半开状态, 放行少量探测请求,
+探测成功则关闭, 失败则重新打开. 未启用时, 请求只做一次判空.
+
+只有传输层错误, 限流, 5xx 与无法解析的响应计为失败; 其他业务错误码 (如 cred 失效) 与单个账号有关, 计为成功.
+"""
+
+import time
+from collections import deque
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Literal
+from urllib.parse import urlsplit
+
+import httpx
+
+BreakerStateName = Literal["closed", "open", "half_open"]
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class BreakerPolicy:
+    """
+    consecutive_failures: 连续失败该次数后打开
+    error_rate: 最近 window 次请求中失败的比例达到该值后打开, 请求数不足 min_requests 时不判断
+    reset_timeout: 打开后经过该时间 (秒) 进入半开状态
+    half_open_probes: 半开状态下同时放行的探测请求数
+    """
+
+    consecutive_failures: int = 5
+    error_rate: float = 0.5
+    window: int = 20
+    min_requests: int = 10
+    reset_timeout: float = 30.0
+    half_open_probes: int = 1
+
+    def __post_init__(self):
+        if self.consecutive_failures < 1 or self.window < 1 or self.half_open_probes < 1:
+            raise ValueError("consecutive_failures, window and half_open_probes must be positive")
+        if not 0 < self.error_rate <= 1:
+            raise ValueError(f"error_rate must be in (0, 1], got {self.error_rate}")
+        if self.min_requests > self.window:
+            # 最近的请求最多只记录 window 次, 否则失败率永远不会被判断
+            raise ValueError(
+                f"min_requests ({self.min_requests}) must not exceed window ({self.window})"
+            )
+        if self.reset_timeout < 0:
+            raise ValueError(f"reset_timeout must not be negative, got {self.reset_timeout}")
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, host: str, endpoint: str, retry_after: float):
+        self.host = host
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return f"circuit open for {self.host}{self.endpoint}, retry after {self.retry_after:.1f}s"
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class BreakerState:
+    """
+    opened: 打开的次数
+    rejected: 因熔断被拒绝的请求数
+    """
+
+    host: str
+    endpoint: str
+    state: BreakerStateName
+    requests: int
+    failures: int
+    opened: int
+    rejected: int
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    from .api import SklandApiException
+
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, SklandApiException):
+        status = error.response.status_code
+        return error.code == -1 or status == 429 or status >= 500
+    return False
+
+
+class CircuitBreaker:
+    def __init__(self, host: str, endpoint: str, policy: BreakerPolicy):
+        self.host = host
+        self.endpoint = endpoint
+        self.policy = policy
+        self.state: BreakerStateName = "closed"
+        # 最近 window 次请求是否成功
+        self.recent: deque[bool] = deque(maxlen=policy.window)
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.requests = 0
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+
+    def acquire(self) -> int | None:
+        """
+        请求发出前调用, 熔断时抛出 CircuitOpenError.
+        半开状态下放行的探测请求返回本次打开的序号, 需要原样传给 record; 其他请求返回 None
+        """
+        if self.state == "open":
+            retry_after = self.opened_at + self.policy.reset_timeout - time.monotonic()
+            if retry_after > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.host, self.endpoint, retry_after)
+            self.state = "half_open"
+            self.probes = 0
+        if self.state == "half_open":
+            if self.probes >= self.policy.half_open_probes:
+                self.rejected += 1
+                raise CircuitOpenError(self.host, self.endpoint, 0.0)
+            self.probes += 1
+            return self.opened
+        return None
+
+    def record(self, success: bool | None, probe: int | None = None) -> None:
+        """
+        请求结束后调用. success 为 None 表示请求被取消, 不计入统计.
+        只有当前半开状态下的探测请求会关闭或重新打开熔断器, 打开之前发出的请求只计入请求与失败数
+        """
+        is_probe = probe is not None and probe == self.opened and self.state == "half_open"
+        if is_probe:
+            self.probes -= 1
+        if success is None:
+            return
+        self.requests += 1
+        if not success:
+            self.failures += 1
+        if is_probe:
+            if success:
+                self.close()
+            else:
+                self.open()
+            return
+        if self.state != "closed":
+            return
+        self.recent.append(success)
+        self.consecutive = 0 if success else self.consecutive + 1
+        if self.should_open():
+            self.open()
+
+    def should_open(self) -> bool:
+        if self.consecutive >= self.policy.consecutive_failures:
+            return True
+        if len(self.recent) < self.policy.min_requests:
+            return False
+        return self.recent.count(False) / len(self.recent) >= self.policy.error_rate
+
+    def open(self) -> None:
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.opened += 1
+
+    def close(self) -> None:
+        self.state = "closed"
+        self.recent.clear()
+        self.consecutive = 0
+
+    def snapshot(self) -> BreakerState:
+        state = self.state
+        if state == "open" and time.monotonic() >= self.opened_at + self.policy.reset_timeout:
+            state = "half_open"
+        return BreakerState(
+            host=self.host,
+            endpoint=self.endpoint,
+            state=state,
+            requests=self.requests,
+            failures=self.failures,
+            opened=self.opened,
+            rejected=self.rejected,
+        )
+
+
+class BreakerRegistry:
+    def __init__(self, policy: BreakerPolicy):
+        self.policy = policy
+        self.breakers: dict[tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, url: str) -> CircuitBreaker:
+        parts = urlsplit(url)
+        key = (parts.hostname or "", parts.path)
+        if (breaker := self.breakers.get(key)) is None:
+            breaker = self.breakers[key] = CircuitBreaker(*key, self.policy)
+        return breaker
+
+    def states(self) -> Iterator[BreakerState]:
+        for breaker in self.breakers.values():
+            yield breaker.snapshot()
+
+
+registry: BreakerRegistry | None = None
+
+
+def enable(policy: BreakerPolicy | None = None) -> BreakerRegistry:
+    """
+    为之后的所有请求启用熔断器, 返回的 registry 可用于查看各接口的状态
+    """
+    global registry
+    registry = BreakerRegistry(policy or BreakerPolicy())
+    return registry
+
+
+def disable() -> None:
+    global registry
+    registry = None
+
+
+__all__ = [
+    "BreakerPolicy",
+    "BreakerRegistry",
+    "BreakerState",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "disable",
+    "enable",
+]
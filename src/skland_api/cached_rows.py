@@ -0,0 +1,137 @@
+"""
+按缓存文件增量维护的角色行
+
+OperatorIndex 与 DepotMatrix 为缓存目录中的每个角色分配一行, 记录写入时数据的哈希与缓存文件的修改时间.
+refresh 只读取修改时间变化的文件, 数据没有变化的角色不重新写入; 删除的角色的行号留空并在之后复用.
+"""
+
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Self
+
+
+@dataclass(kw_only=True, slots=True)
+class CachedRow:
+    """
+    digest: 写入时数据的哈希
+    mtime_ns: 写入时缓存文件的修改时间, 未变化时不再读取文件
+    """
+
+    name: str
+    uid: str
+    digest: str
+    mtime_ns: int | None = None
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class RefreshStats:
+    scanned: int
+    updated: int
+    removed: int
+
+
+class CachedRows:
+    def __init__(self):
+        # 行号 -> 角色, 删除后的行号留空并在之后复用
+        self.rows: list[CachedRow | None] = []
+        self.free: list[int] = []
+        self.ids: dict[tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, row_id: int) -> CachedRow:
+        row = self.rows[row_id]
+        assert row is not None, f"row {row_id} has been removed"
+        return row
+
+    def allocate(self, row: CachedRow) -> int:
+        if self.free:
+            row_id = self.free.pop()
+            self.rows[row_id] = row
+        else:
+            row_id = len(self.rows)
+            self.rows.append(row)
+        self.ids[row.name, row.uid] = row_id
+        return row_id
+
+    def remove(self, name: str, uid: str) -> int | None:
+        """
+        返回被移除的行号
+        """
+        if (row_id := self.ids.pop((name, uid), None)) is None:
+            return None
+        self.rows[row_id] = None
+        self.free.append(row_id)
+        return row_id
+
+    def stamp(self, name: str, uid: str, digest: str, mtime_ns: int | None) -> tuple[int, bool]:
+        """
+        记录角色数据的哈希与缓存文件的修改时间, 返回行号与数据是否变化 (新的角色总是变化)
+        """
+        if (row_id := self.ids.get((name, uid))) is None:
+            row = CachedRow(name=name, uid=uid, digest=digest, mtime_ns=mtime_ns)
+            return self.allocate(row), True
+        row = self[row_id]
+        row.mtime_ns = mtime_ns
+        if row.digest == digest:
+            return row_id, False
+        row.digest = digest
+        return row_id, True
+
+    def refresh(
+        self,
+        cache_path: Path,
+        names: Iterable[str],
+        update: Callable[[str, str, Path, int], bool],
+        remove: Callable[[str, str], object],
+    ) -> RefreshStats:
+        """
+        遍历 dump_to 写入的 cultivate 缓存文件, 对修改时间变化的文件调用 update(name, uid, file, mtime_ns),
+        其返回值表示是否重新写入; 不在 names 中或缓存文件已删除的角色调用 remove(name, uid)
+        """
+        from .models import CharacterInfo
+
+        seen = set()
+        updated = 0
+        for name in names:
+            for uid in CharacterInfo.cached_uids(cache_path, name):
+                seen.add((name, uid))
+                file = cache_path / f"{name}-{uid}-cultivate.json"
+                mtime_ns = file.stat().st_mtime_ns
+                if (row_id := self.ids.get((name, uid))) is not None:
+                    if self[row_id].mtime_ns == mtime_ns:
+                        continue
+                if update(name, uid, file, mtime_ns):
+                    updated += 1
+        stale = [key for key in self.ids if key not in seen]
+        for name, uid in stale:
+            remove(name, uid)
+        return RefreshStats(scanned=len(seen), updated=updated, removed=len(stale))
+
+    def to_list(self) -> list[list | None]:
+        return [
+            None if row is None else [row.name, row.uid, row.digest, row.mtime_ns]
+            for row in self.rows
+        ]
+
+    @classmethod
+    def from_list(cls, rows: list[list | None]) -> Self:
+        table = cls()
+        for row_id, row in enumerate(rows):
+            if row is None:
+                table.rows.append(None)
+                table.free.append(row_id)
+                continue
+            name, uid, digest, mtime_ns = row
+            table.rows.append(CachedRow(name=name, uid=uid, digest=digest, mtime_ns=mtime_ns))
+            table.ids[name, uid] = row_id
+        return table
+
+
+__all__ = [
+    "CachedRow",
+    "CachedRows",
+    "RefreshStats",
+]
@@ -0,0 +1,256 @@
+"""
+模块结果的变化检测
+
+ChangeFeed 保存每个 (账号, uid, 模块) 上一次的结果, 与本次的结果比较后只输出变化的字段:
+
+    with ChangeFeed.load(state_file, NdjsonWriter(fp)) as feed:
+        feed.observe(name, uid, "sanity", result)
+        ...
+    # 正常退出时输出已消失角色的 removed 记录并保存状态
+
+结果先转换为 JSON 兼容的值再逐字段比较. Duration 类型的字段是相对于当前时间的倒计时, 每次运行都会变化,
+默认不参与比较.
+"""
+
+import dataclasses
+import json
+import os
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Literal, Self
+
+from loguru import logger
+
+from .models import Duration, TimeStamp
+
+ChangeKind = Literal["added", "removed", "changed"]
+# to_plain 的结果
+type JsonValue = None | bool | int | float | str | list[JsonValue] | dict[str, JsonValue]
+STATE_FILE = "changes-state.json"
+STATE_VERSION = 1
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class Change:
+    """
+    path: 以 "." 分隔的字段路径 (列表元素为下标), 空字符串表示整个结果
+    at: 检测到变化时的 TimeStamp.now()
+    """
+
+    name: str
+    uid: str
+    module: str
+    kind: ChangeKind
+    path: str
+    old: JsonValue = None
+    new: JsonValue = None
+    at: int
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "uid": self.uid,
+            "module": self.module,
+            "kind": self.kind,
+            "path": self.path,
+            "old": self.old,
+            "new": self.new,
+            "at": self.at,
+        }
+
+
+class NdjsonWriter:
+    """
+    每个变化写为一行 JSON
+    """
+
+    def __init__(self, fp: IO[str]):
+        self.fp = fp
+
+    def __call__(self, change: Change) -> None:
+        self.fp.write(json.dumps(change.to_dict(), ensure_ascii=False) + "\n")
+
+
+def to_plain(value: object, ignore_countdowns: bool = True) -> JsonValue:
+    """
+    转换为 JSON 兼容的值: dataclass 为 dict, set 为排序后的 list, TimeStamp 等 int 的子类为 int
+    """
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {
+            field.name: to_plain(item, ignore_countdowns)
+            for field in dataclasses.fields(value)
+            if not (isinstance(item := getattr(value, field.name), Duration) and ignore_countdowns)
+        }
+    if isinstance(value, dict):
+        return {str(key): to_plain(item, ignore_countdowns) for key, item in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return [to_plain(item, ignore_countdowns) for item in sorted(value)]
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item, ignore_countdowns) for item in value]
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return value
+    return str(value)
+
+
+def diff(
+    old: JsonValue, new: JsonValue, path: str = ""
+) -> Iterator[tuple[ChangeKind, str, JsonValue, JsonValue]]:
+    """
+    逐字段比较, 长度不同的列表整体视为变化
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in new:
+            child = f"{path}.{key}" if path else key
+            if key not in old:
+                yield "added", child, None, new[key]
+            else:
+                yield from diff(old[key], new[key], child)
+        for key in old:
+            if key not in new:
+                yield "removed", f"{path}.{key}" if path else key, old[key], None
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            yield from diff(old_item, new_item, f"{path}.{index}" if path else str(index))
+    elif old != new:
+        yield "changed", path, old, new
+
+
+class ChangeFeed:
+    def __init__(
+        self,
+        on_change: Callable[[Change], None],
+        *,
+        state: dict | None = None,
+        ignore_countdowns: bool = True,
+    ):
+        self.on_change = on_change
+        # name -> uid -> module -> 上一次的结果
+        self.state: dict[str, dict[str, dict[str, JsonValue]]] = state or {}
+        self.ignore_countdowns = ignore_countdowns
+        self.observed: set[tuple[str, str]] = set()
+        self.file: Path | None = None
+        self.emitted = 0
+
+    def emit(self, change: Change) -> None:
+        self.emitted += 1
+        self.on_change(change)
+
+    def observe(self, name: str, uid: str, module: str, value: object) -> int:
+        """
+        比较并记录本次结果, 返回变化的数量. value 为 None (模块执行失败或没有结果) 时不比较
+        """
+        self.observed.add((name, uid))
+        if value is None:
+            return 0
+        new = to_plain(value, self.ignore_countdowns)
+        modules = self.state.setdefault(name, {}).setdefault(uid, {})
+        now = int(TimeStamp.now())
+        count = 0
+        if module not in modules:
+            self.emit(
+                Change(name=name, uid=uid, module=module, kind="added", path="", new=new, at=now)
+            )
+            count = 1
+        else:
+            for kind, path, old_value, new_value in diff(modules[module], new):
+                self.emit(
+                    Change(
+                        name=name,
+                        uid=uid,
+                        module=module,
+                        kind=kind,
+                        path=path,
+                        old=old_value,
+                        new=new_value,
+                        at=now,
+                    )
+                )
+                count += 1
+        modules[module] = new
+        return count
+
+    def finish(self) -> None:
+        """
+        本次运行中出现过的账号下不再存在的角色, 为其所有模块输出 removed
+        """
+        names = {name for name, _ in self.observed}
+        now = int(TimeStamp.now())
+        for name in names:
+            for uid in [
+                uid for uid in self.state.get(name, {}) if (name, uid) not in self.observed
+            ]:
+                for module, old in self.state[name].pop(uid).items():
+                    self.emit(
+                        Change(
+                            name=name,
+                            uid=uid,
+                            module=module,
+                            kind="removed",
+                            path="",
+                            old=old,
+                            at=now,
+                        )
+                    )
+        self.observed.clear()
+
+    @classmethod
+    def load(
+        cls, file: Path, on_change: Callable[[Change], None], *, ignore_countdowns: bool = True
+    ) -> Self:
+        """
+        文件不存在或损坏时从空状态开始 (所有结果都视为 added)
+        """
+        state = None
+        try:
+            with file.open(encoding="utf-8") as fp:
+                data = json.load(fp)
+            if data.get("version") != STATE_VERSION:
+                raise ValueError(f"unsupported state version {data.get('version')!r}")
+            results = data["results"]
+            if not isinstance(results, dict) or not all(
+                isinstance(characters, dict)
+                and all(isinstance(modules, dict) for modules in characters.values())
+                for characters in results.values()
+            ):
+                raise ValueError("results must map name -> uid -> module -> result")
+            state = results
+        except FileNotFoundError:
+            pass
+        except (ValueError, AttributeError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring invalid change feed state {file}: {e}")
+        feed = cls(on_change, state=state, ignore_countdowns=ignore_countdowns)
+        feed.file = file
+        return feed
+
+    def save(self, file: Path | None = None) -> None:
+        if (file := file or self.file) is None:
+            return
+        temp = file.with_name(f".{file.name}.{os.getpid()}.tmp")
+        temp.write_text(
+            json.dumps({"version": STATE_VERSION, "results": self.state}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        temp.replace(file)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.finish()
+            self.save()
+
+
+__all__ = [
+    "STATE_FILE",
+    "Change",
+    "ChangeFeed",
+    "NdjsonWriter",
+    "diff",
+    "to_plain",
+]
@@ -1,3 +1,4 @@
+import functools
 from pathlib import Path
 
 try:
@@ -13,10 +14,15 @@ except ImportError:
     )
     sys.exit(1)
 
-from loguru import logger
 
+from .bench import bench
+from .cluster import cluster
 from .common import APPNAME, GlobalOptions
 from .dashboard import dashboard
+from .depot import depot
+from .export import export
+from .modules import modules
+from .query import query
 
 click.rich_click.USE_RICH_MARKUP = True
 click.rich_click.SHOW_ARGUMENTS = True
@@ -62,6 +68,69 @@ click.rich_click.STYLE_ERRORS_SUGGESTION = "magenta italic"
     type=click.Path(path_type=Path),
     help="日志文件的输出路径",
 )
+@click.option(
+    "--metrics-file",
+    envvar="SKLAND_API_METRICS_FILE",
+    show_envvar=True,
+    type=click.Path(path_type=Path),
+    help="命令结束时以 Prometheus 文本格式写入指标的路径 (适用于 node_exporter textfile collector), "
+    "dashboard --watch 每一轮之后也会重写",
+)
+@click.option(
+    "--metrics-port",
+    envvar="SKLAND_API_METRICS_PORT",
+    show_envvar=True,
+    type=click.IntRange(min=0, max=65535),
+    help="dashboard --watch 与 cluster 运行期间在该端口提供 /metrics 供 Prometheus 抓取",
+)
+@click.option(
+    "--metrics-host",
+    default="127.0.0.1",
+    show_default=True,
+    help="--metrics-port 监听的地址",
+)
+@click.option(
+    "--api-base-url",
+    envvar="SKLAND_API_BASE_URL",
+    show_envvar=True,
+    hidden=True,
+    help="将所有请求发送到该地址 (用于本地测试服务器)",
+)
+@click.option(
+    "--record",
+    "record_file",
+    envvar="SKLAND_API_RECORD",
+    show_envvar=True,
+    type=click.Path(path_type=Path),
+    help="将请求与响应 (脱敏后) 录制到该文件 (.jsonl.gz)",
+)
+@click.option(
+    "--replay",
+    "replay_file",
+    envvar="SKLAND_API_REPLAY",
+    show_envvar=True,
+    type=click.Path(path_type=Path, exists=True, dir_okay=False),
+    help="从录制的文件中回放响应, 不访问网络",
+)
+@click.option(
+    "--replay-latency",
+    "replay_latency_scale",
+    type=click.FloatRange(min=0),
+    default=0,
+    help="回放时按录制耗时的倍数等待, 0 为全速回放, 1 为按原始耗时回放",
+)
+@click.option(
+    "--trace",
+    is_flag=True,
+    help="记录结构化的 trace (JSON Lines) 到缓存目录下的 traces.jsonl",
+)
+@click.option(
+    "--trace-file",
+    envvar="SKLAND_API_TRACE_FILE",
+    show_envvar=True,
+    type=click.Path(path_type=Path),
+    help="trace 的输出路径 (隐含 --trace)",
+)
 @click.pass_context
 def main(
     ctx: click.Context,
@@ -70,21 +139,87 @@ def main(
     auth_file: Path | None,
     config_file: Path | None,
     log_file: Path | None,
+    metrics_file: Path | None,
+    metrics_port: int | None,
+    metrics_host: str,
+    api_base_url: str | None,
+    record_file: Path | None,
+    replay_file: Path | None,
+    replay_latency_scale: float,
+    trace: bool,
+    trace_file: Path | None,
 ):
+    if record_file is not None and replay_file is not None:
+        raise click.UsageError("--record 与 --replay 不能同时使用")
+    record_archive = replay_archive = None
+    if record_file is not None or replay_file is not None:
+        from skland_api.transport import Archive
+
+        if record_file is not None:
+            record_archive = Archive()
+            ctx.call_on_close(functools.partial(record_archive.save, record_file.expanduser()))
+        elif replay_file is not None:
+            replay_archive = Archive.load(replay_file.expanduser())
+            if replay_archive.captured_at is None:
+                from loguru import logger
+
+                logger.warning(
+                    "archive has no capture time, modules are evaluated at wall-clock time"
+                )
+
     global_options = GlobalOptions.from_command_line_options(
         config_dir=config_dir,
         auth_file=auth_file,
         config_file=config_file,
         cache_dir=cache_dir,
         log_file=log_file,
+        api_base_url=api_base_url,
+        record_archive=record_archive,
+        replay_archive=replay_archive,
+        replay_latency_scale=replay_latency_scale,
+        metrics_file=metrics_file,
+        metrics_host=metrics_host,
+        metrics_port=metrics_port,
     )
 
-    logger.add(global_options.log_file)
+    from skland_api.log import LogPolicy, configure
+
+    try:
+        log_policy = LogPolicy(**global_options.config.get("log", {}))
+    except (TypeError, ValueError) as e:
+        raise click.UsageError(f"invalid log config: {e}") from None
+    ctx.call_on_close(configure(global_options.log_file, log_policy))
+
+    if metrics_file is not None or metrics_port is not None:
+        from skland_api.metrics import install_metrics
+
+        install_metrics()
+        ctx.call_on_close(global_options.write_metrics)
+
+    if trace or trace_file is not None:
+        from skland_api.instrumentation import install
+        from skland_api.tracing import FileSpanExporter, Tracer
+
+        tracer = Tracer(
+            FileSpanExporter(
+                trace_file.expanduser()
+                if trace_file is not None
+                else global_options.cache_dir / "traces.jsonl"
+            )
+        )
+        install(tracer)
+        ctx.call_on_close(tracer.flush)
 
     ctx.obj = global_options
 
 
 main.add_command(dashboard)
+main.add_command(bench)
+main.add_command(cluster)
+main.add_command(depot)
+main.add_command(export)
+main.add_command(modules)
+main.add_command(query)
 
 __all__ = [
     "main",
@@ -0,0 +1,25 @@
+import rich_click as click
+
+from .batch import batch_benchmark
+from .importtime import importtime
+from .load import load
+from .modules import modules_benchmark
+from .replay import replay
+from .threads import threads_benchmark
+
+
+@click.group(name="bench", help="性能基准测试")
+def bench() -> None:
+    pass
+
+
+bench.add_command(batch_benchmark)
+bench.add_command(importtime)
+bench.add_command(load)
+bench.add_command(modules_benchmark)
+bench.add_command(replay)
+bench.add_command(threads_benchmark)
+
+__all__ = [
+    "bench",
+]
@@ -0,0 +1,132 @@
+import time
+from typing import TYPE_CHECKING, cast
+
+import rich_click as click
+from rich.table import Table
+
+from ..common import console
+from .modules import SIZES, measure
+
+if TYPE_CHECKING:
+    from skland_api.testing.payloads import PayloadSizeName
+
+DEFAULT_MODULES = ("sanity", "recruit", "routine", "infrast_basic")
+
+
+def make_character_infos(count: int, size: PayloadSizeName) -> list:
+    from skland_api.models import CharacterInfo
+    from skland_api.testing.payloads import PayloadGenerator
+
+    generator = PayloadGenerator(f"bench-batch:{size}", size)
+    character_infos = []
+    for index in range(count):
+        uid = str(10000001 + index)
+        character = generator.character(uid)
+        character_infos.append(
+            CharacterInfo(
+                name=f"bench-{index}",
+                api=None,
+                uid=uid,
+                cultivate=character.cultivate,
+                player_info=character.player_info,
+            )
+        )
+    return character_infos
+
+
+@click.command(name="batch")
+@click.option(
+    "--modules",
+    "modules_str",
+    metavar="module1,module2,...",
+    default=",".join(DEFAULT_MODULES),
+    show_default=True,
+    help="要测试的模块",
+)
+@click.option(
+    "--characters",
+    type=click.IntRange(min=1),
+    default=1000,
+    show_default=True,
+    help="合成的角色数",
+)
+@click.option(
+    "--size",
+    type=click.Choice(SIZES),
+    default="small",
+    show_default=True,
+    help="合成数据的规模",
+)
+@click.option("--rounds", type=click.IntRange(min=1), default=5, show_default=True, help="轮数")
+@click.option(
+    "--min-round-time",
+    type=float,
+    default=0.2,
+    show_default=True,
+    help="每轮的最短耗时 (秒)",
+)
+def batch_benchmark(
+    modules_str: str, characters: int, size: str, rounds: int, min_round_time: float
+) -> None:
+    """
+    在合成数据上比较逐个角色执行模块与批量计算的结果与耗时, 结果不一致时返回非零退出码
+    """
+    try:
+        from skland_api import batch
+    except ImportError as e:
+        raise click.ClickException(str(e))
+    from skland_api.models import evaluation_clock
+    from skland_api.modules import manifest
+
+    module_names = modules_str.split(",")
+    if unknown := [name for name in module_names if name not in batch.registry]:
+        raise click.BadParameter(
+            f"没有批量实现的模块: {', '.join(unknown)}", param_hint="--modules"
+        )
+
+    with console.status("生成合成数据..."):
+        character_infos = make_character_infos(characters, cast("PayloadSizeName", size))
+
+    table = Table(title=f"批量计算 ({characters} 个角色)")
+    table.add_column("模块")
+    table.add_column("逐个执行 (ms)", justify="right")
+    table.add_column("批量计算 (ms)", justify="right")
+    table.add_column("加速比", justify="right")
+    table.add_column("结果")
+
+    mismatches = []
+    # 合成数据的时间戳相对于生成时间, 固定时间使两种方式的结果可以比较
+    with evaluation_clock(int(time.time())):
+        for module_name in module_names:
+            entry = manifest[module_name].load()
+
+            def scalar() -> list:
+                return [entry(character_info, None) for character_info in character_infos]
+
+            def batched() -> list:
+                return batch.evaluate(module_name, character_infos)
+
+            expected, actual = scalar(), batched()
+            different = [
+                character_info.uid
+                for character_info, left, right in zip(character_infos, expected, actual)
+                if left != right
+            ]
+            if len(expected) != len(actual):
+                different.append("<length>")
+            if different:
+                mismatches.append(f"{module_name}: {len(different)} 个角色, 如 {different[0]}")
+
+            scalar_time = min(measure(scalar, rounds, min_round_time))
+            batch_time = min(measure(batched, rounds, min_round_time))
+            table.add_row(
+                module_name,
+                f"{scalar_time * 1e3:.2f}",
+                f"{batch_time * 1e3:.2f}",
+                f"{scalar_time / batch_time:.1f}x",
+                "[red bold]不一致[/]" if different else "[green]一致[/]",
+            )
+    console.print(table)
+
+    if mismatches:
+        raise click.ClickException("批量计算与逐个执行的结果不一致:\n" + "\n".join(mismatches))
@@ -0,0 +1,149 @@
+import json
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+
+import rich_click as click
+from rich.table import Table
+
+from ..common import console
+
+# 每个场景在全新的解释器中执行, 输出耗时以及不应被导入却被导入的模块
+SCENARIO_TEMPLATE = """
+import json, sys, time
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+allowed = {allowed!r}
+unexpected = [
+    name for name in sys.modules
+    if any(name == prefix or name.startswith(prefix + ".") for prefix in {forbidden!r})
+    and name not in allowed
+]
+print(json.dumps({{"elapsed": elapsed, "unexpected": unexpected}}))
+"""
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class Scenario:
+    name: str
+    body: str
+    forbidden: tuple[str, ...]
+    allowed: tuple[str, ...] = ()
+
+    @property
+    def script(self) -> str:
+        return SCENARIO_TEMPLATE.format(
+            body=self.body, forbidden=self.forbidden, allowed=self.allowed
+        )
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class ScenarioResult:
+    name: str
+    timings: list[float]
+    unexpected: list[str]
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.timings)
+
+
+def build_scenarios(modules: list[str]) -> list[Scenario]:
+    selected = tuple(
+        f"skland_api.{package}.{module}"
+        for package in ("modules", "cli.dashboard.formatter")
+        for module in modules
+    )
+    return [
+        Scenario(
+            name="skland --help",
+            body="import skland_api.cli",
+            forbidden=("httpx", "skland_api.modules", "skland_api.cli.dashboard.formatter"),
+        ),
+        Scenario(
+            name=f"skland dashboard --modules {','.join(modules)}",
+            body=(
+                "import skland_api.cli\n"
+                "from types import SimpleNamespace\n"
+                "from skland_api.cli.dashboard import DashBoardLauncher\n"
+                "from skland_api.cli.dashboard.formatter import render\n"
+                "import skland_api.models\n"
+                # module_registry 只读取 module-config
+                "options = SimpleNamespace(config={'module-config': {}})\n"
+                f"DashBoardLauncher(options, None, {','.join(modules)!r}).module_registry"
+            ),
+            forbidden=("skland_api.modules", "skland_api.cli.dashboard.formatter", "pkgutil"),
+            allowed=(
+                "skland_api.modules",
+                "skland_api.modules._manifest",
+                "skland_api.cli.dashboard.formatter",
+                *selected,
+            ),
+        ),
+    ]
+
+
+def run_scenario(scenario: Scenario, repeat: int) -> ScenarioResult:
+    timings = []
+    unexpected = []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-c", scenario.script],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if process.returncode != 0:
+            raise click.ClickException(f"场景 {scenario.name!r} 执行失败:\n{process.stderr}")
+        output = json.loads(process.stdout.splitlines()[-1])
+        timings.append(output["elapsed"])
+        unexpected = output["unexpected"]
+    return ScenarioResult(name=scenario.name, timings=timings, unexpected=unexpected)
+
+
+@click.command(name="import")
+@click.option(
+    "--repeat", type=click.IntRange(min=1), default=5, show_default=True, help="每个场景的重复次数"
+)
+@click.option(
+    "--modules",
+    "modules_str",
+    metavar="module1,module2,...",
+    default="sanity",
+    show_default=True,
+    help="dashboard 场景中选择的模块",
+)
+@click.option(
+    "--budget-ms",
+    type=float,
+    help="耗时中位数上限 (毫秒), 超出时返回非零退出码",
+)
+def importtime(repeat: int, modules_str: str, budget_ms: float | None) -> None:
+    """
+    测量冷启动导入耗时, 并检查是否导入了不需要的模块
+    """
+    table = Table(title="冷启动导入耗时")
+    table.add_column("场景")
+    table.add_column("中位数 (ms)", justify="right")
+    table.add_column("最小值 (ms)", justify="right")
+    table.add_column("多余导入")
+
+    failures = []
+    for scenario in build_scenarios(modules_str.split(",")):
+        result = run_scenario(scenario, repeat)
+        table.add_row(
+            result.name,
+            f"{result.median * 1000:.1f}",
+            f"{min(result.timings) * 1000:.1f}",
+            ", ".join(result.unexpected) or "-",
+        )
+        if result.unexpected:
+            failures.append(f"{result.name}: 导入了 {', '.join(result.unexpected)}")
+        if budget_ms is not None and result.median * 1000 > budget_ms:
+            failures.append(f"{result.name}: {result.median * 1000:.1f}ms 超出预算 {budget_ms}ms")
+
+    console.print(table)
+    if failures:
+        raise click.ClickException("\n".join(failures))
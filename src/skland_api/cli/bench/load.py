@@ -0,0 +1,290 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+
+import rich_click as click
+from rich.table import Table
+
+from ..common import console
+
+if TYPE_CHECKING:
+    from skland_api.instrumentation import AuthTier
+
+DASHBOARD_SCRIPT = "from skland_api.cli import main; main()"
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class LoadResult:
+    """
+    wall: 子进程的总耗时 (秒, 包含解释器启动)
+    latencies: 每个账号的耗时 (秒)
+    peak_rss: 子进程的峰值内存 (字节), 平台不支持时为 None
+    """
+
+    target: str
+    accounts: int
+    wall: float
+    latencies: list[float]
+    failures: int
+    peak_rss: int | None
+    server_stats: dict
+
+    @property
+    def throughput(self) -> float:
+        return self.accounts / self.wall
+
+    def percentile(self, q: int) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[q - 1]
+
+
+class FakeServerProcess:
+    def __init__(self, fleet_args: list[str], server_args: list[str]):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "skland_api.testing", "serve", *fleet_args, *server_args],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        assert self.process.stdout is not None
+        self.base_url = self.process.stdout.readline().strip()
+        if not self.base_url:
+            self.process.wait()
+            raise click.ClickException("测试服务器启动失败")
+
+    def stats(self) -> dict:
+        import httpx
+
+        return httpx.get(f"{self.base_url}/_fake/stats").json()
+
+    def close(self) -> None:
+        self.process.terminate()
+        self.process.wait()
+
+
+def run_measured(args: list[str], env: dict | None = None) -> tuple[str, float, int | None]:
+    """
+    返回子进程的标准输出, 耗时与峰值内存
+    """
+    start = time.perf_counter()
+    with tempfile.TemporaryFile() as stdout:
+        process = subprocess.Popen(args, stdout=stdout, stderr=subprocess.DEVNULL, env=env)
+        if hasattr(os, "wait4"):
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            # Linux 上单位为 KiB, macOS 上为字节
+            peak_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+        else:
+            process.wait()
+            peak_rss = None
+        wall = time.perf_counter() - start
+        stdout.seek(0)
+        output = stdout.read().decode("utf-8")
+    if process.returncode != 0:
+        raise click.ClickException(f"{args[-1]!r} 执行失败, 退出码 {process.returncode}")
+    return output, wall, peak_rss
+
+
+def run_library(base_url: str, fleet_args: list[str], tier: str, modules: str) -> tuple:
+    output, wall, peak_rss = run_measured(
+        [
+            sys.executable,
+            "-m",
+            "skland_api.testing",
+            "drive",
+            *fleet_args,
+            "--base-url",
+            base_url,
+            "--tier",
+            tier,
+            "--modules",
+            modules,
+        ]
+    )
+    results = json.loads(output)["results"]
+    latencies = [result["latency"] for result in results]
+    failures = sum(result["error"] is not None for result in results)
+    return wall, latencies, failures, peak_rss
+
+
+def run_dashboard(
+    base_url: str, accounts: int, characters: int, seed: int, tier: AuthTier, modules: str
+) -> tuple:
+    from skland_api.testing import make_fleet
+
+    with tempfile.TemporaryDirectory() as temp:
+        temp = Path(temp)
+        auth = {
+            account.name: account.auth_info(tier)
+            for account in make_fleet(accounts, characters, seed)
+        }
+        (temp / "auth.json").write_text(json.dumps(auth), encoding="utf-8")
+        (temp / "config.json").write_text(json.dumps({"module-config": {}}), encoding="utf-8")
+        trace_file = temp / "traces.jsonl"
+        env = os.environ | {
+            "SKLAND_API_CONFIG_DIR": str(temp),
+            "SKLAND_API_CACHE_DIR": str(temp),
+            "SKLAND_API_BASE_URL": base_url,
+            "SKLAND_API_TRACE_FILE": str(trace_file),
+        }
+        _, wall, peak_rss = run_measured(
+            [sys.executable, "-c", DASHBOARD_SCRIPT, "dashboard", "--modules", modules], env=env
+        )
+        # 每个账号的耗时取自 trace 中的根 span (account), 不包含模块计算与渲染;
+        # 没有成功加载任何角色的账号视为失败
+        latencies = []
+        loaded = set()
+        with trace_file.open(encoding="utf-8") as fp:
+            for line in fp:
+                span = json.loads(line)
+                if span["name"] == "account":
+                    latencies.append((span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e9)
+                elif span["name"] == "load_character" and span["status"]["code"] == "OK":
+                    loaded.add(span["attributes"]["account.hash"])
+    return wall, latencies, accounts - len(loaded), peak_rss
+
+
+@click.command(name="load")
+@click.option(
+    "--accounts", type=click.IntRange(min=1), default=100, show_default=True, help="账号数量"
+)
+@click.option(
+    "--characters",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="每个账号的角色数量",
+)
+@click.option(
+    "--latency",
+    default="lognormal:30,150",
+    show_default=True,
+    help="服务端延迟分布 (毫秒), 如 20, uniform:10,50, lognormal:<中位数>,<p99>",
+)
+@click.option(
+    "--error-rate",
+    type=click.FloatRange(0, 1),
+    default=0,
+    show_default=True,
+    help="注入服务端错误的概率",
+)
+@click.option(
+    "--throttle-rate",
+    type=click.FloatRange(0, 1),
+    default=0,
+    show_default=True,
+    help="注入限流的概率",
+)
+@click.option(
+    "--tier",
+    type=click.Choice(["cred", "token", "password"]),
+    default="cred",
+    show_default=True,
+    help="账号使用的认证方式",
+)
+@click.option(
+    "--target",
+    "targets",
+    type=click.Choice(["library", "dashboard"]),
+    multiple=True,
+    default=("library", "dashboard"),
+    show_default=True,
+    help="负载驱动方式, 可重复指定",
+)
+@click.option(
+    "--modules",
+    "modules_str",
+    metavar="module1,module2,...",
+    default="profile,update,checkin,online,sanity,routine,mission,recruit,infrast_basic",
+    show_default=True,
+    help="运行的功能模块",
+)
+@click.option("--seed", type=int, default=0, show_default=True, help="随机种子")
+def load(
+    accounts: int,
+    characters: int,
+    latency: str,
+    error_rate: float,
+    throttle_rate: float,
+    tier: str,
+    targets: tuple[str, ...],
+    modules_str: str,
+    seed: int,
+) -> None:
+    """
+    启动本地的测试服务器, 分别以库和 skland dashboard 的方式处理合成的账号,
+    报告吞吐量, 账号耗时的 p50/p99 与峰值内存
+    """
+    from skland_api.testing import Latency
+
+    try:
+        Latency.parse(latency)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--latency")
+
+    fleet_args = ["--accounts", str(accounts), "--characters", str(characters), "--seed", str(seed)]
+    server_args = [
+        "--latency",
+        latency,
+        "--error-rate",
+        str(error_rate),
+        "--throttle-rate",
+        str(throttle_rate),
+    ]
+
+    results = []
+    for target in targets:
+        # 每个目标使用新的服务器, 避免签到等状态互相影响
+        server = FakeServerProcess(fleet_args, server_args)
+        try:
+            if target == "library":
+                measured = run_library(server.base_url, fleet_args, tier, modules_str)
+            else:
+                measured = run_dashboard(
+                    server.base_url, accounts, characters, seed, cast("AuthTier", tier), modules_str
+                )
+            wall, latencies, failures, peak_rss = measured
+            results.append(
+                LoadResult(
+                    target=target,
+                    accounts=accounts,
+                    wall=wall,
+                    latencies=latencies,
+                    failures=failures,
+                    peak_rss=peak_rss,
+                    server_stats=server.stats(),
+                )
+            )
+        finally:
+            server.close()
+
+    table = Table(title=f"负载测试 ({accounts} 账号 x {characters} 角色, 延迟 {latency})")
+    table.add_column("方式")
+    table.add_column("总耗时 (s)", justify="right")
+    table.add_column("账号/秒", justify="right")
+    table.add_column("p50 (ms)", justify="right")
+    table.add_column("p99 (ms)", justify="right")
+    table.add_column("峰值内存 (MiB)", justify="right")
+    table.add_column("请求数", justify="right")
+    table.add_column("被拒绝", justify="right")
+    table.add_column("失败账号", justify="right")
+    for result in results:
+        table.add_row(
+            result.target,
+            f"{result.wall:.2f}",
+            f"{result.throughput:.1f}",
+            f"{result.percentile(50) * 1000:.1f}",
+            f"{result.percentile(99) * 1000:.1f}",
+            f"{result.peak_rss / 2**20:.1f}" if result.peak_rss is not None else "-",
+            str(sum(result.server_stats["requests"].values())),
+            str(sum(result.server_stats["rejected"].values())),
+            str(result.failures),
+        )
+    console.print(table)
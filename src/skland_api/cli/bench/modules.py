@@ -0,0 +1,265 @@
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+
+import rich_click as click
+from rich.console import Console
+from rich.table import Table
+
+from ..common import GlobalOptions, console
+
+if TYPE_CHECKING:
+    from skland_api.testing.payloads import PayloadSizeName
+
+SIZES = ("small", "medium", "large")
+BASELINE_FILE = "bench-modules.json"
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class CaseResult:
+    """
+    timings: 每轮中单次调用的平均耗时 (秒)
+    """
+
+    module: str
+    stage: str
+    size: str
+    timings: list[float]
+
+    @property
+    def key(self) -> str:
+        return f"{self.module}/{self.stage}/{self.size}"
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.timings)
+
+
+def measure(call: Callable[[], object], rounds: int, min_round_time: float) -> list[float]:
+    """
+    先确定每轮的调用次数, 使每轮耗时不少于 min_round_time, 再执行 rounds 轮
+    """
+
+    def run(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        return time.perf_counter() - start
+
+    number = 1
+    while (elapsed := run(number)) < min_round_time:
+        number = max(number * 2, int(number * min_round_time / max(elapsed, 1e-9)))
+    return [run(number) / number for _ in range(rounds)]
+
+
+def load_baseline(file: Path) -> dict[str, float]:
+    if not file.exists():
+        return {}
+    with file.open(encoding="utf-8") as fp:
+        return json.load(fp)["cases"]
+
+
+def write_baseline(file: Path, results: list[CaseResult]) -> None:
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": {result.key: result.median for result in results},
+    }
+    with file.open("w", encoding="utf-8") as fp:
+        json.dump(data, fp, indent=2)
+
+
+def bench_module(
+    module_name: str,
+    sizes: list[PayloadSizeName],
+    rounds: int,
+    min_round_time: float,
+    workdir: Path,
+) -> list[CaseResult]:
+    from skland_api.models import CharacterInfo
+    from skland_api.modules import manifest
+    from skland_api.testing.payloads import PayloadGenerator
+
+    from ..dashboard import load_formatter
+    from ..dashboard.formatter import render
+
+    entry = load_formatter(manifest[module_name]).module_entry
+    null_console = Console(file=open(os.devnull, "w", encoding="utf-8"), width=120)
+
+    results = []
+    for size in sizes:
+        generator = PayloadGenerator(f"bench:{size}", size)
+        character = generator.character("10000001")
+        config = None
+        if module_name == "infrast_assignment":
+            roster_file = workdir / f"roster-{size}.json"
+            roster_file.write_text(
+                json.dumps(generator.maa_roster(character.player_info), ensure_ascii=False),
+                encoding="utf-8",
+            )
+            config = {"bench": str(roster_file)}
+
+        def new_character_info() -> CharacterInfo:
+            # 每次调用使用新的实例, 避免 cached_property 的缓存影响计时
+            return CharacterInfo(
+                name="bench",
+                api=None,
+                uid="10000001",
+                cultivate=character.cultivate,
+                player_info=character.player_info,
+            )
+
+        result = entry(new_character_info(), config)
+        results.append(
+            CaseResult(
+                module=module_name,
+                stage="main",
+                size=size,
+                timings=measure(
+                    lambda: entry(new_character_info(), config), rounds, min_round_time
+                ),
+            )
+        )
+        if result is not None:
+            results.append(
+                CaseResult(
+                    module=module_name,
+                    stage="render",
+                    size=size,
+                    timings=measure(
+                        lambda: null_console.print(render(result)), rounds, min_round_time
+                    ),
+                )
+            )
+    null_console.file.close()
+    return results
+
+
+@click.command(name="modules")
+@click.option(
+    "--modules",
+    "modules_str",
+    metavar="module1,module2,...",
+    help="要测试的模块, 缺省时为全部同步的内置模块",
+)
+@click.option(
+    "--sizes",
+    "sizes_str",
+    metavar="small,medium,large",
+    default=",".join(SIZES),
+    show_default=True,
+    help="合成数据的规模",
+)
+@click.option("--rounds", type=click.IntRange(min=1), default=5, show_default=True, help="轮数")
+@click.option(
+    "--min-round-time",
+    type=float,
+    default=0.05,
+    show_default=True,
+    help="每轮的最短耗时 (秒)",
+)
+@click.option(
+    "--baseline",
+    "baseline_file",
+    type=click.Path(path_type=Path),
+    help=f"基线文件的路径, 缺省时为缓存目录下的 {BASELINE_FILE}",
+)
+@click.option("--save-baseline", is_flag=True, help="将本次结果保存为基线")
+@click.option(
+    "--tolerance",
+    type=float,
+    default=0.25,
+    show_default=True,
+    help="相对基线允许的变慢比例, 超出时返回非零退出码",
+)
+@click.pass_obj
+def modules_benchmark(
+    global_options: GlobalOptions,
+    modules_str: str | None,
+    sizes_str: str,
+    rounds: int,
+    min_round_time: float,
+    baseline_file: Path | None,
+    save_baseline: bool,
+    tolerance: float,
+) -> None:
+    """
+    在合成数据上测量每个模块的 main 与对应 render 的耗时, 并与基线比较
+    """
+    from skland_api.modules import manifest
+
+    if modules_str is not None:
+        module_names = modules_str.split(",")
+        if unknown := [name for name in module_names if name not in manifest]:
+            raise click.BadParameter(f"未知的模块: {', '.join(unknown)}", param_hint="--modules")
+    else:
+        # 异步模块依赖网络请求, 不在此处测试
+        module_names = [name for name, spec in manifest.builtins.items() if spec.is_async is False]
+    sizes = sizes_str.split(",")
+    if unknown := [size for size in sizes if size not in SIZES]:
+        raise click.BadParameter(f"未知的规模: {', '.join(unknown)}", param_hint="--sizes")
+
+    if baseline_file is None:
+        baseline_file = global_options.cache_dir / BASELINE_FILE
+    baseline = load_baseline(baseline_file.expanduser())
+
+    results: list[CaseResult] = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for module_name in module_names:
+            results.extend(
+                bench_module(
+                    module_name,
+                    cast("list[PayloadSizeName]", sizes),
+                    rounds,
+                    min_round_time,
+                    Path(workdir),
+                )
+            )
+
+    table = Table(title="模块微基准")
+    table.add_column("模块")
+    table.add_column("阶段")
+    table.add_column("规模")
+    table.add_column("中位数 (µs)", justify="right")
+    table.add_column("最小值 (µs)", justify="right")
+    table.add_column("基线 (µs)", justify="right")
+    table.add_column("变化", justify="right")
+
+    regressions = []
+    for result in results:
+        if (reference := baseline.get(result.key)) is not None:
+            change = result.median / reference - 1
+            style = "red bold" if change > tolerance else "green" if change < -tolerance else ""
+            change_str = f"[{style}]{change:+.1%}[/]" if style else f"{change:+.1%}"
+            reference_str = f"{reference * 1e6:.1f}"
+            if change > tolerance:
+                regressions.append(f"{result.key}: {change:+.1%}")
+        else:
+            change_str = reference_str = "-"
+        table.add_row(
+            result.module,
+            result.stage,
+            result.size,
+            f"{result.median * 1e6:.1f}",
+            f"{min(result.timings) * 1e6:.1f}",
+            reference_str,
+            change_str,
+        )
+    console.print(table)
+
+    if save_baseline:
+        baseline_file = baseline_file.expanduser()
+        baseline_file.parent.mkdir(parents=True, exist_ok=True)
+        write_baseline(baseline_file, results)
+        console.print(f"基线已保存至 {baseline_file}")
+    elif regressions:
+        raise click.ClickException(
+            f"以下用例相对基线变慢超过 {tolerance:.0%}:\n" + "\n".join(regressions)
+        )
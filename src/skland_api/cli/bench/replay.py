@@ -0,0 +1,183 @@
+import functools
+import gc
+import os
+import time
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import rich_click as click
+from loguru import logger
+from rich.console import Console
+from rich.table import Table
+
+from ..common import GlobalOptions, console
+
+
+@dataclass(kw_only=True, slots=True)
+class StageStats:
+    calls: int = 0
+    wall: float = 0
+    # 以下为单独一轮 tracemalloc 下的统计 (字节)
+    peak: int = 0
+    retained: int = 0
+
+
+@click.command(name="replay")
+@click.option(
+    "--names",
+    "names_str",
+    metavar="name1,name2,...",
+    help="只回放这些账号的数据",
+)
+@click.option(
+    "--modules",
+    "modules_str",
+    metavar="module1,module2,...",
+    help="要运行的功能模块, 缺省时与 dashboard 的默认模块一致 (不含异步模块)",
+)
+@click.option(
+    "--iterations", type=click.IntRange(min=1), default=20, show_default=True, help="回放轮数"
+)
+@click.option("--no-render", is_flag=True, help="只运行模块, 不进行渲染")
+@click.option("--no-tracemalloc", is_flag=True, help="不统计内存分配 (tracemalloc 会额外运行一轮)")
+@click.pass_obj
+def replay(
+    global_options: GlobalOptions,
+    names_str: str | None,
+    modules_str: str | None,
+    iterations: int,
+    no_render: bool,
+    no_tracemalloc: bool,
+) -> None:
+    """
+    对缓存目录中已记录的 player_info/cultivate 数据反复运行模块与渲染, 不访问网络,
+    报告吞吐量与内存分配情况
+    """
+    from skland_api.models import CharacterInfo
+    from skland_api.modules import manifest
+
+    from ..dashboard import DashBoardLauncher, load_formatter
+    from ..dashboard.formatter import render
+
+    names = names_str.split(",") if names_str is not None else list(global_options.auth)
+    dumps = [
+        (name, uid)
+        for name in names
+        for uid in CharacterInfo.cached_uids(global_options.cache_dir, name)
+    ]
+    if not dumps:
+        raise click.ClickException(
+            f"{global_options.cache_dir} 中没有已记录的数据, 请先运行 skland dashboard"
+        )
+
+    module_names = (
+        modules_str.split(",") if modules_str is not None else DashBoardLauncher.DEFAULT_MODULES
+    )
+    entries = {}
+    for module_name in module_names:
+        if (spec := manifest.get(module_name)) is None:
+            raise click.BadParameter(f"未知的模块: {module_name}", param_hint="--modules")
+        if spec.is_async:
+            logger.warning(f"async module {module_name!r} requires network, skipped")
+            continue
+        entries[module_name] = load_formatter(spec).module_entry
+    module_config = global_options.config["module-config"]
+
+    # 解析 JSON 的开销不计入回放
+    snapshots = [
+        CharacterInfo.load_from(global_options.cache_dir, name, uid) for name, uid in dumps
+    ]
+    null_console = Console(file=open(os.devnull, "w", encoding="utf-8"), width=120)
+    stats: dict[tuple[str, str], StageStats] = defaultdict(StageStats)
+
+    def print_rendered(result: object) -> None:
+        null_console.print(render(result))
+
+    def timed(key: tuple[str, str], call: Callable[[], object], trace: bool) -> object:
+        stage_stats = stats[key]
+        if not trace:
+            start = time.perf_counter()
+            result = call()
+            stage_stats.wall += time.perf_counter() - start
+            stage_stats.calls += 1
+            return result
+        start_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = call()
+        current, peak = tracemalloc.get_traced_memory()
+        stage_stats.peak = max(stage_stats.peak, peak - start_memory)
+        stage_stats.retained += current - start_memory
+        return result
+
+    def run_once(trace: bool) -> None:
+        for snapshot in snapshots:
+            # 每轮使用新的实例, 与 dashboard 中每个角色只计算一次 cached_property 的情况一致
+            character_info = CharacterInfo(
+                name=snapshot.name,
+                api=snapshot.api,
+                uid=snapshot.uid,
+                cultivate=snapshot.cultivate,
+                player_info=snapshot.player_info,
+            )
+            for module_name, entry in entries.items():
+                result = timed(
+                    (module_name, "main"),
+                    functools.partial(entry, character_info, module_config.get(module_name)),
+                    trace,
+                )
+                if not no_render and result is not None:
+                    timed(
+                        (module_name, "render"),
+                        functools.partial(print_rendered, result),
+                        trace,
+                    )
+
+    gc.collect()
+    collections_before = sum(generation["collections"] for generation in gc.get_stats())
+    start = time.perf_counter()
+    for _ in range(iterations):
+        run_once(trace=False)
+    total_wall = time.perf_counter() - start
+    collections = sum(generation["collections"] for generation in gc.get_stats())
+    collections -= collections_before
+
+    if not no_tracemalloc:
+        tracemalloc.start()
+        try:
+            run_once(trace=True)
+        finally:
+            tracemalloc.stop()
+    null_console.file.close()
+
+    table = Table(title=f"回放 {len(snapshots)} 个角色 x {iterations} 轮")
+    table.add_column("模块")
+    table.add_column("阶段")
+    table.add_column("次数", justify="right")
+    table.add_column("平均 (µs)", justify="right")
+    table.add_column("总计 (ms)", justify="right")
+    if not no_tracemalloc:
+        table.add_column("峰值分配 (KiB)", justify="right")
+        table.add_column("保留 (KiB)", justify="right")
+    for (module_name, stage), stage_stats in stats.items():
+        row = [
+            module_name,
+            stage,
+            str(stage_stats.calls),
+            f"{stage_stats.wall / stage_stats.calls * 1e6:.1f}",
+            f"{stage_stats.wall * 1000:.1f}",
+        ]
+        if not no_tracemalloc:
+            row += [
+                f"{stage_stats.peak / 1024:.1f}",
+                f"{stage_stats.retained / len(snapshots) / 1024:.1f}",
+            ]
+        table.add_row(*row)
+    console.print(table)
+
+    characters = len(snapshots) * iterations
+    console.print(
+        f"总耗时 {total_wall:.3f}s, 吞吐量 [bold]{characters / total_wall:.1f}[/] 角色/秒, "
+        f"GC 回收 {collections} 次"
+    )
@@ -0,0 +1,219 @@
+import functools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+
+import rich_click as click
+from rich.table import Table
+
+from ..common import console
+
+if TYPE_CHECKING:
+    from skland_api.testing.payloads import PayloadSizeName
+
+WORKER_SCRIPT = "from skland_api.cli.bench.threads import worker_main; worker_main()"
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class ThroughputOptions:
+    """
+    以 JSON 传递给其他解释器中的 worker
+    """
+
+    thread_counts: list[int]
+    characters: int
+    size: PayloadSizeName
+    rounds: int
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class ThroughputResult:
+    """
+    throughput: 线程数 -> 吞吐量 (角色/秒)
+    """
+
+    label: str
+    throughput: dict[int, float]
+
+
+def describe_interpreter() -> str:
+    from skland_api.executor import gil_enabled
+
+    build = "free-threaded" if sysconfig.get_config_var("Py_GIL_DISABLED") else "default"
+    return (
+        f"{platform.python_implementation()} {platform.python_version()} "
+        f"({build}, GIL {'on' if gil_enabled() else 'off'})"
+    )
+
+
+def measure_throughput(options: ThroughputOptions) -> ThroughputResult:
+    """
+    在合成数据上并行执行全部同步的内置模块
+    """
+    from loguru import logger
+
+    from skland_api.executor import run_in_threads
+    from skland_api.models import CharacterInfo
+    from skland_api.modules import manifest
+    from skland_api.testing.payloads import PayloadGenerator
+
+    # 模块对合成数据输出的警告 (如排班表不匹配) 与计时无关
+    logger.disable("skland_api")
+    generator = PayloadGenerator(f"bench:{options.size}", options.size)
+    snapshots = [generator.character(str(10000001 + index)) for index in range(options.characters)]
+    entries = {
+        name: spec.load() for name, spec in manifest.builtins.items() if spec.is_async is False
+    }
+
+    throughput = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        roster_file = Path(workdir) / "roster.json"
+        roster_file.write_text(
+            json.dumps(generator.maa_roster(snapshots[0].player_info), ensure_ascii=False),
+            encoding="utf-8",
+        )
+        configs = {"infrast_assignment": {"bench": str(roster_file)}}
+
+        for threads in options.thread_counts:
+            timings = []
+            for _ in range(options.rounds):
+                # 每轮为每个角色创建一个新的实例, 由该角色的所有模块共享:
+                # 各线程竞争首次计算同一实例的 locked_cached_property, 之后的模块直接复用
+                character_infos = [
+                    CharacterInfo(
+                        name="bench",
+                        api=None,
+                        uid=str(10000001 + index),
+                        cultivate=snapshot.cultivate,
+                        player_info=snapshot.player_info,
+                    )
+                    for index, snapshot in enumerate(snapshots)
+                ]
+                calls = [
+                    functools.partial(entry, character_info, configs.get(name))
+                    for character_info in character_infos
+                    for name, entry in entries.items()
+                ]
+                start = time.perf_counter()
+                run_in_threads(calls, threads)
+                timings.append(time.perf_counter() - start)
+            throughput[threads] = options.characters / statistics.median(timings)
+    return ThroughputResult(label=describe_interpreter(), throughput=throughput)
+
+
+def worker_main() -> None:
+    """
+    在其他解释器或者其他 GIL 设置下运行时的入口, 参数与结果均为 JSON
+    """
+    options = ThroughputOptions(**json.loads(sys.argv[1]))
+    print(json.dumps(asdict(measure_throughput(options))))
+
+
+def run_worker(
+    python: str, options: ThroughputOptions, env: dict[str, str] | None = None
+) -> ThroughputResult:
+    process = subprocess.run(
+        [python, "-c", WORKER_SCRIPT, json.dumps(asdict(options))],
+        capture_output=True,
+        text=True,
+        env=os.environ | env if env is not None else None,
+    )
+    if process.returncode != 0:
+        raise click.ClickException(f"{python} 运行失败:\n{process.stderr.strip()}")
+    result = json.loads(process.stdout)
+    return ThroughputResult(
+        label=result["label"],
+        throughput={int(threads): value for threads, value in result["throughput"].items()},
+    )
+
+
+@click.command(name="threads")
+@click.option(
+    "--threads",
+    "threads_str",
+    metavar="1,2,4,...",
+    help="要测试的线程数, 缺省时为 1, 2, 4, ... 直到 CPU 核心数",
+)
+@click.option(
+    "--characters", type=click.IntRange(min=1), default=32, show_default=True, help="角色数"
+)
+@click.option(
+    "--size",
+    type=click.Choice(["small", "medium", "large"]),
+    default="medium",
+    show_default=True,
+    help="合成数据的规模",
+)
+@click.option("--rounds", type=click.IntRange(min=1), default=5, show_default=True, help="轮数")
+@click.option(
+    "--python",
+    "pythons",
+    multiple=True,
+    metavar="PATH",
+    help="同时在这些解释器中运行 (如 python3.14t), 可以多次指定",
+)
+def threads_benchmark(
+    threads_str: str | None,
+    characters: int,
+    size: str,
+    rounds: int,
+    pythons: tuple[str, ...],
+) -> None:
+    """
+    比较启用与禁用 GIL 时多线程执行同步模块的吞吐量.
+    当前解释器为自由线程构建时, 会额外以相反的 PYTHON_GIL 设置运行一次
+    """
+    from skland_api.executor import gil_enabled
+
+    if threads_str is not None:
+        thread_counts = [int(threads) for threads in threads_str.split(",")]
+    else:
+        cpu_count = os.process_cpu_count() or 1
+        thread_counts = [1]
+        while thread_counts[-1] * 2 <= cpu_count:
+            thread_counts.append(thread_counts[-1] * 2)
+        if thread_counts[-1] != cpu_count:
+            thread_counts.append(cpu_count)
+    options = ThroughputOptions(
+        thread_counts=thread_counts,
+        characters=characters,
+        size=cast("PayloadSizeName", size),
+        rounds=rounds,
+    )
+
+    results = [measure_throughput(options)]
+    if sysconfig.get_config_var("Py_GIL_DISABLED"):
+        results.append(
+            run_worker(sys.executable, options, {"PYTHON_GIL": "0" if gil_enabled() else "1"})
+        )
+    else:
+        console.print(
+            "[yellow]当前解释器不是自由线程构建, 可以使用 --python 指定 python3.14t 进行对比[/]"
+        )
+    for python in pythons:
+        results.append(run_worker(python, options))
+
+    table = Table(title=f"多线程执行同步模块 ({characters} 个角色, {size})")
+    table.add_column("线程数", justify="right")
+    for result in results:
+        table.add_column(f"{result.label}\n角色/秒", justify="right")
+        table.add_column("加速比", justify="right")
+    for threads in thread_counts:
+        row = [str(threads)]
+        for result in results:
+            throughput = result.throughput
+            row += [
+                f"{throughput[threads]:.1f}",
+                f"{throughput[threads] / throughput[thread_counts[0]]:.2f}x",
+            ]
+        table.add_row(*row)
+    console.print(table)
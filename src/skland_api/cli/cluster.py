@@ -0,0 +1,210 @@
+import ipaddress
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import rich_click as click
+from loguru import logger
+from rich.table import Table
+
+from .common import GlobalOptions, async_command, console
+
+
+@click.command(name="cluster")
+@click.option(
+    "--names",
+    "names_str",
+    metavar="name1,name2,...",
+    help="要查询的账号名称列表，使用逗号分割",
+)
+@click.option(
+    "--modules",
+    "modules_str",
+    metavar="module1,module2,...",
+    help="要运行的功能模块列表，使用逗号分隔",
+)
+@click.option(
+    "--host",
+    default="127.0.0.1",
+    show_default=True,
+    help="coordinator 监听的地址, 非本机回环地址需要同时指定 --certfile",
+)
+@click.option("--port", type=int, default=8700, show_default=True, help="为 0 时使用随机端口")
+@click.option(
+    "--token",
+    envvar="SKLAND_API_CLUSTER_TOKEN",
+    show_envvar=True,
+    help="worker 需要携带的令牌, 缺省时随机生成并输出",
+)
+@click.option(
+    "--certfile",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="HTTPS 证书 (PEM), worker 通过心跳获取账号的认证信息 (包括密码), 跨机器运行时必须加密",
+)
+@click.option(
+    "--keyfile",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="证书的私钥, 缺省时从 --certfile 中读取",
+)
+@click.option(
+    "--insecure-plaintext",
+    is_flag=True,
+    help="允许在非本机回环地址上以明文 HTTP 传输认证信息 (仅用于已加密的内网, 如 VPN)",
+)
+@click.option(
+    "--min-workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="注册的 worker 达到该数量后才开始分配账号",
+)
+@click.option(
+    "--spawn-workers",
+    type=click.IntRange(min=0),
+    default=0,
+    help="在本机启动该数量的 worker 进程 (用于测试)",
+)
+@click.pass_obj
+@async_command
+async def cluster(
+    global_options: GlobalOptions,
+    names_str: str | None,
+    modules_str: str | None,
+    host: str,
+    port: int,
+    token: str | None,
+    certfile: Path | None,
+    keyfile: Path | None,
+    insecure_plaintext: bool,
+    min_workers: int,
+    spawn_workers: int,
+) -> None:
+    """
+    以 coordinator 身份运行看板: 账号按一致性哈希分配给 worker 节点,
+    worker 完成认证, 请求, 模块计算与渲染后将结果上报, 全部完成后按账号顺序输出.
+    worker 节点使用 `python -m skland_api.cluster worker --coordinator <地址>` 启动
+    """
+    import secrets
+
+    from skland_api.cluster import Coordinator, RunSpec
+
+    context = None
+    if certfile is not None:
+        import ssl
+
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(certfile.expanduser(), keyfile.expanduser() if keyfile else None)
+    elif keyfile is not None:
+        raise click.UsageError("--keyfile 需要与 --certfile 同时使用")
+    elif not is_loopback(host):
+        if not insecure_plaintext:
+            raise click.UsageError(
+                f"--host {host} 不是本机回环地址, worker 会通过心跳获取账号的认证信息 (包括密码), "
+                "请使用 --certfile 启用 HTTPS, 或者在已加密的网络中指定 --insecure-plaintext"
+            )
+        console.print(
+            "[bold red]警告: 认证信息与令牌将以明文 HTTP 传输, 任何能监听该网络的人都可以读取[/]"
+        )
+
+    from .dashboard import DashBoardLauncher
+
+    launcher = DashBoardLauncher(global_options, names_str, modules_str)
+    accounts = {}
+    for name in launcher.names:
+        if (info := global_options.auth.get(name)) is None:
+            logger.error(f"name {name!r} not in auth file")
+            continue
+        accounts[name] = info
+
+    if token is None:
+        token = secrets.token_urlsafe(24)
+        console.print(f"[bold]令牌:[/] {token}")
+    coordinator = Coordinator(
+        accounts,
+        RunSpec(
+            modules=list(launcher.module_registry),
+            module_config=global_options.config["module-config"],
+            render={
+                "width": console.width,
+                "color_system": console.color_system,
+                "force_terminal": console.is_terminal,
+            },
+        ),
+        token=token,
+        min_workers=max(min_workers, spawn_workers),
+    )
+    async with global_options.serve_metrics():
+        base_url = await coordinator.start(host, port, ssl=context)
+        console.print(f"[bold]coordinator 已启动:[/] {base_url}, 共 {len(accounts)} 个账号")
+
+        workers = []
+        if spawn_workers:
+            command = [
+                sys.executable,
+                "-m",
+                "skland_api.cluster",
+                "worker",
+                "--coordinator",
+                base_url,
+            ]
+            if global_options.api_base_url is not None:
+                command += ["--api-base-url", global_options.api_base_url]
+            if certfile is not None:
+                command += ["--cafile", str(certfile.expanduser())]
+            workers = [
+                subprocess.Popen(
+                    [*command, "--id", f"local-{index}"],
+                    env=os.environ | {"SKLAND_API_CLUSTER_TOKEN": token},
+                )
+                for index in range(spawn_workers)
+            ]
+        try:
+            results = await coordinator.wait()
+        finally:
+            await coordinator.close()
+            for worker in workers:
+                if not coordinator.done.is_set():
+                    worker.terminate()
+                worker.wait()
+
+    for account in results:
+        if account.auth is not None:
+            global_options.auth[account.name].update(account.auth)
+        if account.error is not None:
+            logger.error(f"User {account.name}: {account.error}")
+        for result in account.results:
+            if result.error is not None:
+                logger.error(
+                    f"Module {result.module!r} for {account.name!r} execution failed: {result.error}"
+                )
+            elif isinstance(result.value, str):
+                # worker 中已由 render_to_ansi 渲染为文本
+                console.file.write(result.value)
+    console.file.flush()
+    global_options.update_auth_file_if_live()
+
+    table = Table(title="worker 统计")
+    table.add_column("worker")
+    table.add_column("账号数", justify="right")
+    for worker_id, completed in sorted(coordinator.stats.per_worker.items()):
+        table.add_row(worker_id, str(completed))
+    console.print(table)
+    console.print(
+        f"加入 {coordinator.stats.joins} 次, 离开 {coordinator.stats.leaves} 次, "
+        f"重新分配 {coordinator.stats.rebalances} 次, 重复结果 {coordinator.stats.duplicates} 个"
+    )
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+__all__ = [
+    "cluster",
+]
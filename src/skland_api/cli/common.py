@@ -1,17 +1,18 @@
 import asyncio
 import inspect
 import json
+from contextlib import AbstractAsyncContextManager, nullcontext
 from dataclasses import dataclass
 from functools import wraps
 from pathlib import Path
-from typing import Self
+from typing import TYPE_CHECKING, Self
 
 import rich_click as click
 from rich.console import Console
-from rich.panel import Panel
-from rich.prompt import Prompt
 
-from skland_api.models import AuthInfo
+if TYPE_CHECKING:
+    from skland_api.api import SklandApi
+    from skland_api.transport import ApiFactory, Archive
 
 APPNAME = "skland-api"
 console = Console()
@@ -24,6 +25,16 @@ class GlobalOptions:
     log_file: Path
     auth: dict
     config: dict
+    # 非空时所有请求都发送到该地址, 用于本地测试服务器
+    api_base_url: str | None = None
+    # 录制请求与响应, 或者从录制中回放而不访问网络
+    record_archive: Archive | None = None
+    replay_archive: Archive | None = None
+    replay_latency_scale: float = 0
+    # 非空时命令结束与 --watch 的每一轮之后写入指标; 非空时长时间运行的命令在该端口提供 /metrics
+    metrics_file: Path | None = None
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int | None = None
 
     def update_auth_file(self) -> None:
         with self.auth_file.open("w", encoding="utf-8") as fp:
@@ -37,6 +48,13 @@ class GlobalOptions:
         config_file: Path | None,
         cache_dir: Path,
         log_file: Path | None,
+        api_base_url: str | None = None,
+        record_archive: Archive | None = None,
+        replay_archive: Archive | None = None,
+        replay_latency_scale: float = 0,
+        metrics_file: Path | None = None,
+        metrics_host: str = "127.0.0.1",
+        metrics_port: int | None = None,
     ) -> Self:
         config_dir = config_dir.expanduser()
 
@@ -65,18 +83,83 @@ class GlobalOptions:
         else:
             log_file = cache_dir / f"{APPNAME}.log"
 
+        if metrics_file is not None:
+            metrics_file = metrics_file.expanduser()
+
         return cls(
             cache_dir=cache_dir,
             auth_file=auth_file,
             log_file=log_file,
             auth=auth,
             config=config,
+            api_base_url=api_base_url,
+            record_archive=record_archive,
+            replay_archive=replay_archive,
+            replay_latency_scale=replay_latency_scale,
+            metrics_file=metrics_file,
+            metrics_host=metrics_host,
+            metrics_port=metrics_port,
+        )
+
+    def write_metrics(self) -> None:
+        if self.metrics_file is not None:
+            from skland_api.metrics import install_metrics
+
+            install_metrics().registry.write_to(self.metrics_file)
+
+    def serve_metrics(self) -> AbstractAsyncContextManager[str | None]:
+        """
+        用于 dashboard --watch 与 cluster 等长时间运行的命令, 未指定 --metrics-port 时什么也不做
+        """
+        if self.metrics_port is None:
+            return nullcontext()
+        from skland_api.metrics import install_metrics
+
+        return install_metrics().registry.serving(self.metrics_host, self.metrics_port)
+
+    @property
+    def replay_time(self) -> int | None:
+        """
+        回放时模块使用的 evaluation_clock (录制的时间), 不在回放或录制文件不含该时间时为 None
+        """
+        if self.replay_archive is None:
+            return None
+        return self.replay_archive.captured_at
+
+    def update_auth_file_if_live(self) -> None:
+        """
+        回放时响应中的 cred 与 token 已被脱敏, 不能写回认证文件
+        """
+        if self.replay_archive is None:
+            self.update_auth_file()
+
+    @property
+    def api_factory(self) -> ApiFactory:
+        """
+        只携带传输相关设置的工厂, 传递给子进程时不会带上认证信息与配置
+        """
+        from skland_api.transport import ApiFactory
+
+        return ApiFactory(
+            api_base_url=self.api_base_url,
+            record_archive=self.record_archive,
+            replay_archive=self.replay_archive,
+            replay_latency_scale=self.replay_latency_scale,
         )
 
+    def create_api(self) -> SklandApi:
+        return self.api_factory()
+
 
 def create_auth_file(file: Path) -> None:
     if file.exists():
         raise FileExistsError(file)
+
+    from rich.panel import Panel
+    from rich.prompt import Prompt
+
+    from skland_api.models import AuthInfo
+
     file.touch(mode=0o600)
 
     while True:
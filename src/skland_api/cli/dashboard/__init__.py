@@ -1,33 +1,70 @@
 import asyncio
 import functools
 import importlib
+import inspect
+import io
+import sys
+import time
 import typing
 from collections.abc import Coroutine
 from dataclasses import dataclass
 from functools import cached_property
-from typing import Callable
+from pathlib import Path
+from types import ModuleType
+from typing import TYPE_CHECKING, Callable, Literal
 
 import rich_click as click
 from loguru import logger
 
-from skland_api.api import SklandApiException
-from skland_api.models import AuthInfo, CharacterInfo, CharacterInfoLoader
+from skland_api import instrumentation
+from skland_api.deadline import stage
+from skland_api.instrumentation import (
+    SpanContext,
+    attach,
+    current_account,
+    current_context,
+    phase,
+    scope,
+)
 
 from ..common import GlobalOptions, async_command, console
-from .formatter import render
+
+if TYPE_CHECKING:
+    from skland_api.breaker import BreakerRegistry
+    from skland_api.changes import ChangeFeed
+    from skland_api.deadline import Deadline
+    from skland_api.executor import CharacterSnapshot, SubinterpreterExecutor
+    from skland_api.memo import ModuleMemo
+    from skland_api.models import CharacterInfo
+    from skland_api.modules import ModuleSpec
+    from skland_api.notify import Notifier
+
+FORMATTER_ENTRY_POINT_GROUP = "skland_api.formatters"
+ColorSystemName = Literal["standard", "256", "truecolor", "windows"]
 
 
 @dataclass(frozen=True, kw_only=True, slots=True)
 class LoadedModule:
     entry: Callable
     is_async: bool
+    spec: ModuleSpec
+    # 在 module-config 中选择了 subinterpreter
+    isolated: bool = False
 
 
 @dataclass(kw_only=True, slots=True)
 class ModuleTask:
     user_name: str
     module_name: str
+    uid: str
     entry: Callable
+    is_async: bool = False
+    # 在子解释器中执行, 提交后 entry 等待并返回结果
+    isolated: bool = False
+    # 结果已经提前计算 (异步模块, 或者在线程池中执行的同步模块), entry 只返回结果
+    resolved: bool = False
+    # 可以批量计算的同步模块, 批量计算时使用
+    character_info: CharacterInfo | None = None
 
 
 class DashBoardLauncher:
@@ -49,17 +86,49 @@ class DashBoardLauncher:
     all_module_task: list[list[ModuleTask]]
     async_tasks: list[ModuleTask]
     coroutines: list[Coroutine]
+    # 每个账号根 span 的上下文, 模块与渲染阶段在其中执行以归入同一 trace
+    account_contexts: dict[str, SpanContext | None]
+    # 在 module-config 中选择了 subinterpreter 的模块, 在需要时才创建
+    subinterpreter_executor: SubinterpreterExecutor | None
+    # 超过截止时间的账号
+    timed_out: set[str]
+    # 因熔断器打开而跳过的账号
+    shed: set[str]
+    # 使用缓存数据的账号 -> 缓存的写入时间
+    stale: dict[str, float]
 
     def __init__(
-        self, global_options: GlobalOptions, names_str: str | None, modules_str: str | None
+        self,
+        global_options: GlobalOptions,
+        names_str: str | None,
+        modules_str: str | None,
+        *,
+        stale_fallback: bool = False,
+        memo: ModuleMemo | None = None,
+        batch: bool = False,
+        changes: ChangeFeed | None = None,
+        notifier: Notifier | None = None,
+        quiet: bool = False,
     ) -> None:
         self.global_options = global_options
         self.names_str = names_str
         self.modules_str = modules_str
+        self.stale_fallback = stale_fallback
+        self.memo = memo
+        self.batch = batch
+        self.changes = changes
+        self.notifier = notifier
+        # 只检测变化, 不显示看板
+        self.quiet = quiet
 
         self.all_module_task = []
         self.async_tasks = []
         self.coroutines = []
+        self.account_contexts = {}
+        self.subinterpreter_executor = None
+        self.timed_out = set()
+        self.shed = set()
+        self.stale = {}
 
     @cached_property
     def names(self) -> list[str]:
@@ -83,53 +152,153 @@ class DashBoardLauncher:
 
     @cached_property
     def module_registry(self) -> dict[str, LoadedModule]:
+        from skland_api.executor import module_executor
+        from skland_api.modules import manifest
+        from skland_api.views import declared_views, resolve
+
         registry = {}
 
+        # 根据清单校验模块名, 只导入被选中的格式化模块
         for module_name in self.modules:
+            if (spec := manifest.get(module_name)) is None:
+                logger.error(f"{module_name!r} is not a valid module")
+                continue
             try:
-                entry = importlib.import_module(
-                    f".formatter.{module_name}", __package__
-                ).module_entry
-                registry[module_name] = LoadedModule(
-                    entry=entry,
-                    is_async=asyncio.iscoroutinefunction(entry),
-                )
+                entry = load_formatter(spec).module_entry
             except ImportError:
-                logger.error(f"{module_name!r} is not a valid module")
+                logger.error(f"{module_name!r} has no formatter")
+                continue
+            except Exception:
+                logger.exception(f"internal error in module {module_name!r}")
+                continue
+            try:
+                resolve(declared_views(entry))
+            except ValueError as e:
+                logger.error(f"invalid views for module {module_name!r}: {e}")
+                continue
+            is_async = (
+                spec.is_async if spec.is_async is not None else inspect.iscoroutinefunction(entry)
+            )
+            try:
+                isolated = (
+                    module_executor(self.global_options.config["module-config"].get(module_name))
+                    == "subinterpreter"
+                )
+            except ValueError as e:
+                logger.error(f"invalid config for module {module_name!r}: {e}")
+                isolated = False
+            if isolated and is_async:
+                logger.warning(
+                    f"async module {module_name!r} cannot run in a subinterpreter, running inline"
+                )
+                isolated = False
+            registry[module_name] = LoadedModule(
+                entry=entry, is_async=is_async, spec=spec, isolated=isolated
+            )
 
         return registry
 
+    @cached_property
+    def batch_modules(self) -> set[str]:
+        if not self.batch:
+            return set()
+        from skland_api import batch
+
+        return set(batch.registry)
+
+    @cached_property
+    def view_order(self) -> list[str]:
+        """
+        被选中的模块使用的视图及其依赖, 依赖在前
+        """
+        from skland_api.views import declared_views, resolve
+
+        return resolve(
+            name
+            for module in self.module_registry.values()
+            for name in declared_views(module.entry)
+        )
+
     async def fetch_character_info(self, name: str) -> list[CharacterInfo]:
+        from skland_api.breaker import CircuitOpenError
+
+        current_account.set(name)
+        with phase("account", cpu=False):
+            self.account_contexts[name] = current_context.get()
+            try:
+                async with stage():
+                    return await self.load_account(name)
+            except TimeoutError:
+                logger.error(f"User {name} timed out")
+                self.timed_out.add(name)
+            except CircuitOpenError as e:
+                logger.error(f"User {name} skipped: {e}")
+                self.shed.add(name)
+        if self.stale_fallback:
+            return self.load_cached(name)
+        return []
+
+    def load_cached(self, name: str) -> list[CharacterInfo]:
+        from skland_api.models import CharacterInfo
+
+        cache_dir = self.global_options.cache_dir
+        char_infos = []
+        for uid in CharacterInfo.cached_uids(cache_dir, name):
+            try:
+                char_infos.append(CharacterInfo.load_from(cache_dir, name, uid))
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to load cached character info of {name} ({uid}): {e}")
+                continue
+            mtime = (cache_dir / f"{name}-{uid}-player_info.json").stat().st_mtime
+            self.stale[name] = min(self.stale.get(name, mtime), mtime)
+        if not char_infos:
+            logger.warning(f"No cached character info for {name}")
+        return char_infos
+
+    async def load_account(self, name: str) -> list[CharacterInfo]:
+        from skland_api.api import SklandApiException
+        from skland_api.breaker import CircuitOpenError
+        from skland_api.models import AuthInfo, CharacterInfoLoader
+
         if (info := self.global_options.auth.get(name)) is None:
             logger.error(f"name {name!r} not in auth file")
             return []
         try:
             auth_info = AuthInfo(**info)
-            api = await auth_info.full_auth()
+            async with stage("auth"):
+                with phase("full_auth", cpu=False):
+                    api = await auth_info.full_auth(self.global_options.create_api())
             info.update(auth_info.to_dict())
         except ValueError:
             logger.error(f"User {name} login failed")
             return []
-        try:
-            characters = await api.binding_list()
-        except SklandApiException as e:
-            logger.error(f"User {name} fetch binding list failed: {e}")
-            return []
+        async with stage("fetch"):
+            try:
+                with phase("binding_list", cpu=False):
+                    characters = await api.binding_list()
+            except SklandApiException as e:
+                logger.error(f"User {name} fetch binding list failed: {e}")
+                return []
 
-        loader_tasks = [
-            CharacterInfoLoader(name, api, character).full_load()
-            for character in characters
-            if character["gameName"] == "明日方舟"
-        ]
+            loader_tasks = [
+                CharacterInfoLoader(name, api, character).full_load()
+                for character in characters
+                if character["gameName"] == "明日方舟"
+            ]
 
-        results = await asyncio.gather(*loader_tasks, return_exceptions=True)
+            with phase("full_load", cpu=False):
+                results = await asyncio.gather(*loader_tasks, return_exceptions=True)
 
         char_infos: list[CharacterInfo] = []
         for result in results:
+            if isinstance(result, (TimeoutError, CircuitOpenError)):
+                # 请求在截止时间到达时被取消或被熔断, 整个账号视为超时或跳过
+                raise result
             if isinstance(result, BaseException):
                 logger.error(f"Failed to load character info: {result}")
             else:
-                result.dump_to(self.global_options.cache_dir)
+                with phase("dump_to"):
+                    result.dump_to(self.global_options.cache_dir)
                 char_infos.append(result)
 
         return char_infos
@@ -138,37 +307,328 @@ class DashBoardLauncher:
         for name, character_infos in zip(self.names, all_character_info):
             module_tasks: list[ModuleTask] = []
             for character_info in character_infos:
-                for module_name in self.modules:
-                    module = self.module_registry[module_name]
+                snapshot = None
+                for module_name, module in self.module_registry.items():
+                    if module.is_async and name in self.stale:
+                        # 缓存数据没有可用的 api
+                        continue
+                    config = self.global_options.config["module-config"].get(module_name)
+                    if module.isolated:
+                        if snapshot is None:
+                            snapshot = self.snapshot(character_info)
+                        entry = functools.partial(
+                            self.get_subinterpreter_executor().submit,
+                            module.spec.entry,
+                            snapshot,
+                            config,
+                        )
+                    elif self.memo is not None and not module.is_async:
+                        entry = functools.partial(
+                            self.memo.call, module_name, module.entry, character_info, config
+                        )
+                    else:
+                        entry = functools.partial(module.entry, character_info, config)
                     module_task = ModuleTask(
                         user_name=name,
                         module_name=module_name,
-                        entry=functools.partial(
-                            module.entry,
-                            character_info,
-                            self.global_options.config["module-config"].get(module_name),
+                        uid=character_info.uid,
+                        entry=entry,
+                        is_async=module.is_async,
+                        isolated=module.isolated,
+                        character_info=(
+                            character_info
+                            if module_name in self.batch_modules
+                            and not module.is_async
+                            and not module.isolated
+                            else None
                         ),
                     )
                     module_tasks.append(module_task)
                     if module.is_async:
                         self.async_tasks.append(module_task)
-                        self.coroutines.append(module_task.entry())
+                        self.coroutines.append(self.run_async_module(module_task))
 
             self.all_module_task.append(module_tasks)
 
+    @staticmethod
+    def snapshot(character_info: CharacterInfo) -> CharacterSnapshot:
+        from skland_api.executor import CharacterSnapshot
+
+        with phase("snapshot", account=character_info.name, attributes={"uid": character_info.uid}):
+            return CharacterSnapshot.from_character_info(character_info)
+
+    def get_subinterpreter_executor(self) -> SubinterpreterExecutor:
+        if self.subinterpreter_executor is None:
+            from skland_api.executor import SubinterpreterExecutor
+
+            self.subinterpreter_executor = SubinterpreterExecutor()
+        return self.subinterpreter_executor
+
+    def submit_isolated_tasks(self) -> None:
+        """
+        提交在子解释器中执行的模块, 与异步模块的网络请求同时进行
+        """
+        for tasks in self.all_module_task:
+            for task in tasks:
+                if task.isolated:
+                    task.entry = task.entry().result
+
+    def run_isolated_tasks(self) -> None:
+        tasks = [task for tasks in self.all_module_task for task in tasks if task.isolated]
+        if not tasks:
+            return
+        for task in tasks:
+            with (
+                attach(self.account_contexts.get(task.user_name)),
+                phase(
+                    "module",
+                    account=task.user_name,
+                    module=task.module_name,
+                    cpu=False,
+                    attributes={"uid": task.uid, "executor": "subinterpreter"},
+                ),
+                scope(account=task.user_name, uid=task.uid, module=task.module_name),
+            ):
+                try:
+                    result = task.entry()
+                except Exception as e:
+                    logger.error(
+                        f"Module {task.module_name!r} for {task.user_name!r} execution failed: {e}"
+                    )
+                    instrumentation.module_failed(task.module_name, task.user_name, e)
+                    task.entry = dummy_func
+                else:
+                    task.entry = functools.partial(identity_func, result)
+            task.resolved = True
+        if self.subinterpreter_executor is not None:
+            self.subinterpreter_executor.close()
+            self.subinterpreter_executor = None
+
+    async def run_async_module(self, task: ModuleTask):
+        current_account.set(task.user_name)
+        with (
+            attach(self.account_contexts.get(task.user_name)),
+            phase("module", module=task.module_name, cpu=False, attributes={"uid": task.uid}),
+            scope(uid=task.uid, module=task.module_name),
+        ):
+            async with stage("module"):
+                return await task.entry()
+
     async def run_async_tasks_and_patch_module_tasks(self) -> None:
         for task, result in zip(
             self.async_tasks,
             await asyncio.gather(*self.coroutines, return_exceptions=True),
         ):
             task = typing.cast(ModuleTask, task)
-            if isinstance(result, BaseException):
+            if isinstance(result, TimeoutError):
+                logger.error(f"Module {task.module_name!r} for {task.user_name!r} timed out")
+                instrumentation.module_failed(task.module_name, task.user_name, result)
+                task.entry = dummy_func
+            elif isinstance(result, BaseException):
+                logger.error(
+                    f"Module {task.module_name!r} for {task.user_name!r} execution failed: {result}"
+                )
+                instrumentation.module_failed(task.module_name, task.user_name, result)
+                task.entry = dummy_func
+            else:
+                task.entry = functools.partial(identity_func, result)
+            task.resolved = True
+
+    def run_batch_tasks(self) -> None:
+        """
+        有批量实现的同步模块一次计算所有角色的结果. 批量计算失败时回退到逐个角色执行
+        """
+        from skland_api import batch
+
+        tasks_by_module: dict[str, list[ModuleTask]] = {}
+        for tasks in self.all_module_task:
+            for task in tasks:
+                if task.character_info is not None and not task.resolved:
+                    tasks_by_module.setdefault(task.module_name, []).append(task)
+
+        for module_name, tasks in tasks_by_module.items():
+            with phase("batch", module=module_name, attributes={"characters": len(tasks)}):
+                try:
+                    results = batch.evaluate(
+                        module_name,
+                        [task.character_info for task in tasks if task.character_info is not None],
+                    )
+                except Exception as e:
+                    logger.warning(
+                        f"Batch evaluation of {module_name!r} failed, running per character: {e}"
+                    )
+                    continue
+            for task, result in zip(tasks, results):
+                task.entry = functools.partial(identity_func, result)
+                task.resolved = True
+
+    def prepare_views(self, all_character_info: list[list[CharacterInfo]], threads: int) -> None:
+        """
+        按依赖顺序为每个角色准备视图, 不同角色并行. 之后的模块不会因为等待同一个视图而阻塞线程
+        """
+        from skland_api.executor import run_in_threads
+        from skland_api.views import prepare
+
+        character_infos = [
+            character_info
+            for character_infos in all_character_info
+            for character_info in character_infos
+        ]
+        if not self.view_order or not character_infos:
+            return
+        with phase("views", attributes={"views": ",".join(self.view_order)}):
+            results = run_in_threads(
+                [
+                    functools.partial(prepare, character_info, self.view_order)
+                    for character_info in character_infos
+                ],
+                threads,
+            )
+        for character_info, result in zip(character_infos, results):
+            if isinstance(result, Exception):
+                # 使用该视图的模块会重新计算并各自报告错误
+                logger.warning(
+                    f"Failed to prepare views for {character_info.name!r} ({character_info.uid}): {result}"
+                )
+
+    def run_sync_tasks_in_threads(self, threads: int) -> None:
+        """
+        在线程池中执行所有同步模块, 渲染仍然在主线程中按顺序进行
+        """
+        from skland_api.executor import run_in_threads
+
+        tasks = [task for tasks in self.all_module_task for task in tasks if not task.resolved]
+        results = run_in_threads(
+            [functools.partial(self.run_sync_module, task) for task in tasks], threads
+        )
+        for task, result in zip(tasks, results):
+            if isinstance(result, Exception):
                 logger.error(
                     f"Module {task.module_name!r} for {task.user_name!r} execution failed: {result}"
                 )
+                instrumentation.module_failed(task.module_name, task.user_name, result)
                 task.entry = dummy_func
             else:
                 task.entry = functools.partial(identity_func, result)
+            task.resolved = True
+
+    def run_sync_module(self, task: ModuleTask):
+        with (
+            attach(self.account_contexts.get(task.user_name)),
+            phase(
+                "module",
+                account=task.user_name,
+                module=task.module_name,
+                attributes={"uid": task.uid},
+            ),
+            scope(account=task.user_name, uid=task.uid, module=task.module_name),
+        ):
+            return task.entry()
+
+    async def run_in_processes(self, workers: int, shard_size: int) -> None:
+        """
+        在进程池中完成认证, 请求, 模块计算与渲染, 按账号顺序输出渲染后的文本
+        """
+        from skland_api.executor import ProcessExecutor
+
+        accounts = {}
+        for name in self.names:
+            if (info := self.global_options.auth.get(name)) is None:
+                logger.error(f"name {name!r} not in auth file")
+                continue
+            accounts[name] = info
+
+        postprocess = functools.partial(
+            render_to_ansi,
+            width=console.width,
+            color_system=console.color_system,
+            force_terminal=console.is_terminal,
+        )
+        async for account in ProcessExecutor(workers, shard_size).run(
+            accounts,
+            list(self.module_registry),
+            module_config=self.global_options.config["module-config"],
+            api_factory=self.global_options.api_factory,
+            postprocess=postprocess,
+            dump_dir=self.global_options.cache_dir,
+            evaluated_at=self.global_options.replay_time,
+        ):
+            if account.auth is not None:
+                self.global_options.auth[account.name].update(account.auth)
+            if account.error is not None:
+                logger.error(f"User {account.name}: {account.error}")
+            for result in account.results:
+                if result.error is not None:
+                    logger.error(
+                        f"Module {result.module!r} for {account.name!r} execution failed: {result.error}"
+                    )
+                elif isinstance(result.value, str):
+                    # worker 中已由 render_to_ansi 渲染为文本
+                    console.file.write(result.value)
+            console.file.flush()
+
+    async def run(self, deadline: Deadline | None, threads: int, *, clear: bool = False) -> None:
+        """
+        获取数据, 执行模块并渲染. 模块与渲染使用获取完成时 (回放时为录制时) 的 evaluation_clock
+        clear: 渲染前清屏, 用于 --watch
+        """
+        from skland_api.deadline import use_deadline
+        from skland_api.models import evaluation_clock
+
+        with use_deadline(deadline):
+            all_character_info = await asyncio.gather(
+                *[self.fetch_character_info(name) for name in self.names]
+            )
+            self.global_options.update_auth_file_if_live()
+            with evaluation_clock(self.global_options.replay_time):
+                self.build_all_module_tasks(all_character_info)
+                self.submit_isolated_tasks()
+                await self.run_async_tasks_and_patch_module_tasks()
+                self.run_isolated_tasks()
+                if self.batch:
+                    self.run_batch_tasks()
+                if threads > 1:
+                    self.prepare_views(all_character_info, threads)
+                    self.run_sync_tasks_in_threads(threads)
+                if clear and not self.quiet:
+                    console.clear()
+                self.render_all()
+
+    def render_all(self) -> None:
+        from .formatter import render
+
+        for name, tasks in zip(self.names, self.all_module_task):
+            if (cached_at := self.stale.get(name)) is not None and not self.quiet:
+                console.print(
+                    f"[yellow]{name}: 未能获取最新数据, 以下为 "
+                    f"{time.strftime('%m-%d %H:%M', time.localtime(cached_at))} 缓存的数据"
+                )
+            for task in tasks:
+                with attach(self.account_contexts.get(task.user_name)):
+                    if task.resolved:
+                        result = task.entry()
+                    else:
+                        result = self.run_sync_module(task)
+                    # 缓存的旧数据不参与变化检测与通知
+                    if name not in self.stale:
+                        if self.changes is not None:
+                            self.changes.observe(name, task.uid, task.module_name, result)
+                        if self.notifier is not None:
+                            self.notifier.observe(name, task.uid, task.module_name, result)
+                    if result is not None and not self.quiet:
+                        with phase("render", account=task.user_name, attributes={"uid": task.uid}):
+                            console.print(render(result))
+        if self.changes is not None:
+            self.changes.finish()
+            self.changes.save()
+        if self.quiet:
+            return
+        if missing := [
+            name for name in self.names if name in self.timed_out and name not in self.stale
+        ]:
+            console.print(f"[red]以下账号超时: {', '.join(missing)}")
+        if missing := [name for name in self.names if name in self.shed and name not in self.stale]:
+            console.print(f"[red]以下账号因熔断被跳过: {', '.join(missing)}")
 
 
 @click.command(name="dashboard")
@@ -184,24 +644,338 @@ class DashBoardLauncher:
     metavar="module1,module2,...",
     help="要运行的功能模块列表，使用逗号分隔",
 )
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=0,
+    help="使用多个进程处理账号, 0 为在当前进程中处理",
+)
+@click.option(
+    "--shard-size",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="多进程模式下每个分片的账号数",
+)
+@click.option(
+    "--threads",
+    type=click.IntRange(min=1),
+    help="并行执行同步模块的线程数, 缺省时在自由线程构建的 Python 上为 CPU 核心数, 否则为 1",
+)
+@click.option(
+    "--deadline",
+    type=click.FloatRange(min=0, min_open=True),
+    help="整体的截止时间 (秒), 超过时未完成的账号被取消并报告为超时",
+)
+@click.option(
+    "--stage-budget",
+    "stage_budget_str",
+    metavar="auth=3,fetch=5,module=2",
+    help="认证, 获取数据, 异步模块各阶段每个账号可用的最长时间 (秒)",
+)
+@click.option(
+    "--stale-fallback",
+    is_flag=True,
+    help="超时或因熔断被跳过的账号使用缓存目录中上次获取的数据 (不运行异步模块)",
+)
+@click.option(
+    "--circuit-breaker",
+    is_flag=True,
+    help="按接口启用熔断器, 阈值在配置文件的 circuit-breaker 中设置; 结束时 (--watch 时为每一轮之后) 输出各接口的状态",
+)
+@click.option("--profile", is_flag=True, help="统计各阶段、账号与模块的耗时并输出汇总表")
+@click.option(
+    "--profile-pstats",
+    is_flag=True,
+    help="同时使用 cProfile 采样, 并将 pstats 文件写入缓存目录 (隐含 --profile)",
+)
+@click.option(
+    "--profile-trace",
+    is_flag=True,
+    help="将 Chrome Trace 格式的时间线写入缓存目录 (隐含 --profile)",
+)
+@click.option(
+    "--watch",
+    type=click.FloatRange(min=1),
+    metavar="SECONDS",
+    help="每隔若干秒重新获取数据并刷新, 数据没有变化的角色不再重新计算模块",
+)
+@click.option(
+    "--batch",
+    is_flag=True,
+    help="使用 numpy 批量计算所有角色的 sanity, recruit, routine, infrast_basic 模块 (需要 batch 依赖)",
+)
+@click.option(
+    "--changes",
+    "changes_path",
+    type=click.Path(dir_okay=False, allow_dash=True, path_type=Path),
+    metavar="FILE",
+    help="将与上次运行相比发生变化的模块结果以 ndjson 追加写入文件; 为 - 时写入标准输出且不显示看板",
+)
+@click.option(
+    "--notify",
+    is_flag=True,
+    help="按配置文件 notify 中的规则检查模块结果, 将满足条件的事件合并后发送到 webhook",
+)
 @click.pass_context
 @async_command
 async def dashboard(
-    ctx: click.Context, names_str: str | None = None, modules_str: str | None = None
+    ctx: click.Context,
+    names_str: str | None = None,
+    modules_str: str | None = None,
+    workers: int = 0,
+    shard_size: int = 1,
+    threads: int | None = None,
+    deadline: float | None = None,
+    stage_budget_str: str | None = None,
+    stale_fallback: bool = False,
+    circuit_breaker: bool = False,
+    profile: bool = False,
+    profile_pstats: bool = False,
+    profile_trace: bool = False,
+    watch: float | None = None,
+    batch: bool = False,
+    changes_path: Path | None = None,
+    notify: bool = False,
 ) -> None:
-    launcher = DashBoardLauncher(ctx.obj, names_str, modules_str)
+    from skland_api.deadline import Deadline, parse_budgets
 
-    all_character_info = await asyncio.gather(
-        *[launcher.fetch_character_info(name) for name in launcher.names]
+    if batch:
+        try:
+            import skland_api.batch  # noqa: F401
+        except ImportError as e:
+            raise click.UsageError(str(e)) from None
+
+    memo = None
+    if watch is not None:
+        from skland_api.memo import ModuleMemo
+
+        memo = ModuleMemo()
+
+    changes = None
+    changes_fp = None
+    quiet = False
+    if changes_path is not None:
+        from skland_api.changes import STATE_FILE, ChangeFeed, NdjsonWriter
+
+        if str(changes_path) == "-":
+            changes_fp = sys.stdout
+            quiet = True
+        else:
+            changes_fp = changes_path.open("a", encoding="utf-8")
+            ctx.call_on_close(changes_fp.close)
+        changes = ChangeFeed.load(ctx.obj.cache_dir / STATE_FILE, NdjsonWriter(changes_fp))
+
+    notifier = None
+    if notify:
+        from skland_api.notify import STATE_FILE as NOTIFY_STATE_FILE
+        from skland_api.notify import Notifier
+
+        try:
+            notifier = Notifier.from_config(
+                ctx.obj.config.get("notify", {}), ctx.obj.cache_dir / NOTIFY_STATE_FILE
+            )
+        except ValueError as e:
+            raise click.UsageError(f"invalid notify config: {e}") from None
+
+    launcher = DashBoardLauncher(
+        ctx.obj,
+        names_str,
+        modules_str,
+        stale_fallback=stale_fallback,
+        memo=memo,
+        batch=batch,
+        changes=changes,
+        notifier=notifier,
+        quiet=quiet,
     )
-    launcher.global_options.update_auth_file()
-    launcher.build_all_module_tasks(all_character_info)
-    await launcher.run_async_tasks_and_patch_module_tasks()
+    budgets = {}
+    if stage_budget_str is not None:
+        try:
+            budgets = parse_budgets(stage_budget_str)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--stage-budget") from None
 
-    for tasks in launcher.all_module_task:
-        for task in tasks:
-            if (result := task.entry()) is not None:
-                console.print(render(result))
+    registry = None
+    if circuit_breaker:
+        from skland_api import breaker
+
+        try:
+            policy = breaker.BreakerPolicy(
+                **launcher.global_options.config.get("circuit-breaker", {})
+            )
+        except (TypeError, ValueError) as e:
+            raise click.UsageError(f"invalid circuit-breaker config: {e}") from None
+        registry = breaker.enable(policy)
+
+    if workers:
+        if deadline is not None or budgets:
+            raise click.UsageError("--deadline 与 --stage-budget 不支持多进程模式")
+        if circuit_breaker:
+            raise click.UsageError("--circuit-breaker 不支持多进程模式")
+        if profile or profile_pstats or profile_trace:
+            raise click.UsageError("--profile 系列选项不支持多进程模式")
+        if launcher.global_options.record_archive is not None:
+            raise click.UsageError("--record 不支持多进程模式")
+        if watch is not None:
+            raise click.UsageError("--watch 不支持多进程模式")
+        if batch:
+            raise click.UsageError("--batch 不支持多进程模式")
+        if changes is not None:
+            raise click.UsageError("--changes 不支持多进程模式")
+        if notifier is not None:
+            raise click.UsageError("--notify 不支持多进程模式")
+        await launcher.run_in_processes(workers, shard_size)
+        launcher.global_options.update_auth_file_if_live()
+        return
+
+    profiler = None
+    if profile or profile_pstats or profile_trace:
+        if watch is not None:
+            raise click.UsageError("--profile 系列选项不支持 --watch")
+        from skland_api.profiling import Profiler
+
+        profiler = Profiler()
+        instrumentation.install(profiler)
+    if profile_pstats:
+        import cProfile
+
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    if threads is None:
+        from skland_api.executor import default_thread_count
+
+        threads = default_thread_count()
+
+    if watch is None:
+        await launcher.run(
+            Deadline.after(deadline, budgets) if deadline or budgets else None, threads
+        )
+        if changes_fp is not None:
+            changes_fp.flush()
+        if notifier is not None:
+            await notifier.flush()
+            notifier.save()
+            await notifier.aclose()
+        if registry is not None:
+            print_breaker_states(registry)
+    else:
+        # watch 模式下总是创建了 memo
+        assert memo is not None
+        async with launcher.global_options.serve_metrics():
+            while True:
+                hits, misses = memo.stats.hits, memo.stats.misses
+                await launcher.run(
+                    Deadline.after(deadline, budgets) if deadline or budgets else None,
+                    threads,
+                    clear=True,
+                )
+                hits, misses = memo.stats.hits - hits, memo.stats.misses - misses
+                if changes_fp is not None:
+                    changes_fp.flush()
+                if notifier is not None:
+                    if notifier.due():
+                        await notifier.flush()
+                    notifier.save()
+                launcher.global_options.write_metrics()
+                if not quiet:
+                    if registry is not None:
+                        print_breaker_states(registry)
+                    console.print(
+                        f"[dim]{time.strftime('%H:%M:%S')} 更新, {watch:g} 秒后刷新, "
+                        f"模块缓存命中 {hits}/{hits + misses}"
+                    )
+                await asyncio.sleep(watch)
+                launcher = DashBoardLauncher(
+                    ctx.obj,
+                    names_str,
+                    modules_str,
+                    stale_fallback=stale_fallback,
+                    memo=memo,
+                    batch=batch,
+                    changes=changes,
+                    notifier=notifier,
+                    quiet=quiet,
+                )
+    if profiler is not None:
+        from .profiling import print_profile_report, write_chrome_trace, write_pstats
+
+        instrumentation.uninstall(profiler)
+        if profile_pstats:
+            cprofile.disable()
+            write_pstats(cprofile, launcher.global_options.cache_dir)
+        if profile_trace:
+            write_chrome_trace(profiler, launcher.global_options.cache_dir)
+        print_profile_report(profiler)
+
+
+def print_breaker_states(registry: BreakerRegistry) -> None:
+    """
+    只列出出现过失败的接口
+    """
+    from rich.table import Table
+
+    states = [state for state in registry.states() if state.failures or state.rejected]
+    if not states:
+        return
+    table = Table(title="熔断器状态")
+    table.add_column("接口")
+    table.add_column("状态")
+    table.add_column("请求", justify="right")
+    table.add_column("失败", justify="right")
+    table.add_column("打开次数", justify="right")
+    table.add_column("拒绝", justify="right")
+    styles = {"closed": "green", "open": "red", "half_open": "yellow"}
+    for state in states:
+        table.add_row(
+            f"{state.host}{state.endpoint}",
+            f"[{styles[state.state]}]{state.state}",
+            str(state.requests),
+            str(state.failures),
+            str(state.opened),
+            str(state.rejected),
+        )
+    console.print(table)
+
+
+def load_formatter(spec: ModuleSpec) -> ModuleType:
+    """
+    内置模块的格式化模块位于 `.formatter` 包中, 插件模块的格式化模块通过 entry points 注册
+    """
+    if not spec.is_plugin:
+        return importlib.import_module(f".formatter.{spec.name}", __package__)
+
+    from importlib.metadata import entry_points
+
+    for entry_point in entry_points(group=FORMATTER_ENTRY_POINT_GROUP, name=spec.name):
+        return entry_point.load()
+    raise ImportError(f"no formatter registered for plugin module {spec.name!r}")
+
+
+def render_to_ansi(
+    module_name: str, value: object, *, width: int, color_system: str | None, force_terminal: bool
+) -> str:
+    """
+    在 worker 进程中渲染模块结果, 使用与主进程的终端相同的宽度与颜色设置
+    """
+    from rich.console import Console
+
+    from skland_api.modules import manifest
+
+    from .formatter import render
+
+    # 导入格式化模块以注册对应的 render
+    load_formatter(manifest[module_name])
+    buffer = io.StringIO()
+    Console(
+        file=buffer,
+        width=width,
+        # Console.color_system 返回的名称与构造参数接受的名称相同
+        color_system=typing.cast(ColorSystemName | None, color_system),
+        force_terminal=force_terminal,
+    ).print(render(value))
+    return buffer.getvalue()
 
 
 def dummy_func() -> None:
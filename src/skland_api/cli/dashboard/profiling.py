@@ -0,0 +1,86 @@
+import cProfile
+import json
+from collections.abc import Mapping
+from datetime import datetime
+from pathlib import Path
+
+from rich.table import Table
+
+from skland_api.profiling import PhaseSummary, Profiler, RequestSummary
+
+from ..common import console
+
+# Mapping 的键是不变的, 按账号统计时键可能为 None, 按阶段/模块/接口统计时键总是 str
+PhaseSummaries = Mapping[str, PhaseSummary] | Mapping[str | None, PhaseSummary]
+RequestSummaries = Mapping[str, RequestSummary] | Mapping[str | None, RequestSummary]
+
+
+def format_seconds(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000:.1f}"
+
+
+def format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KiB"
+    return f"{size / 1024 / 1024:.1f} MiB"
+
+
+def phase_table(title: str, key_title: str, summaries: PhaseSummaries) -> Table:
+    table = Table(title=title)
+    table.add_column(key_title)
+    table.add_column("次数", justify="right")
+    table.add_column("墙钟 (ms)", justify="right")
+    table.add_column("CPU (ms)", justify="right")
+    for key, summary in sorted(summaries.items(), key=lambda item: -item[1].wall):
+        table.add_row(
+            key or "-",
+            str(summary.count),
+            format_seconds(summary.wall),
+            format_seconds(summary.cpu),
+        )
+    return table
+
+
+def request_table(title: str, key_title: str, summaries: RequestSummaries) -> Table:
+    table = Table(title=title)
+    table.add_column(key_title)
+    table.add_column("请求数", justify="right")
+    table.add_column("总耗时 (ms)", justify="right")
+    table.add_column("响应大小", justify="right")
+    for key, summary in sorted(summaries.items(), key=lambda item: -item[1].wall):
+        table.add_row(
+            key or "-",
+            str(summary.count),
+            format_seconds(summary.wall),
+            format_size(summary.size),
+        )
+    return table
+
+
+def print_profile_report(profiler: Profiler) -> None:
+    console.print(phase_table("各阶段耗时", "阶段", profiler.by_phase()))
+    console.print(phase_table("各账号耗时", "账号", profiler.by_account()))
+    console.print(phase_table("各模块耗时", "模块", profiler.by_module()))
+    console.print(request_table("各账号请求", "账号", profiler.requests_by_account()))
+    console.print(request_table("各接口请求", "接口", profiler.requests_by_endpoint()))
+
+
+def profile_file(cache_dir: Path, suffix: str) -> Path:
+    return cache_dir / f"profile-{datetime.now():%Y%m%d-%H%M%S}{suffix}"
+
+
+def write_pstats(cprofile: cProfile.Profile, cache_dir: Path) -> None:
+    file = profile_file(cache_dir, ".pstats")
+    cprofile.dump_stats(file)
+    console.print(f"[bold green]pstats written to:[/]\n  {file}")
+
+
+def write_chrome_trace(profiler: Profiler, cache_dir: Path) -> None:
+    file = profile_file(cache_dir, ".trace.json")
+    with file.open("w", encoding="utf-8") as fp:
+        json.dump(profiler.chrome_trace(), fp)
+    console.print(f"[bold green]Chrome trace written to:[/]\n  {file}")
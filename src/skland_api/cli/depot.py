@@ -0,0 +1,105 @@
+import time
+
+import rich_click as click
+from rich.table import Table
+
+from .common import GlobalOptions, console
+
+
+@click.command(name="depot")
+@click.option(
+    "--items",
+    "items_str",
+    metavar="item1,item2,...",
+    help="只统计这些物品 (名称或 id), 缺省时为所有物品",
+)
+@click.option(
+    "--holders",
+    "holders_item",
+    metavar="ITEM",
+    help="列出持有该物品的角色, 与 --min 或 --top 一起使用",
+)
+@click.option(
+    "--min",
+    "minimum",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="--holders 的最少持有数量",
+)
+@click.option(
+    "--top",
+    type=click.IntRange(min=1),
+    help="--holders 只列出持有最多的若干个角色",
+)
+@click.option("--rebuild", is_flag=True, help="丢弃已保存的矩阵并重新建立")
+@click.pass_obj
+def depot(
+    global_options: GlobalOptions,
+    items_str: str | None,
+    holders_item: str | None,
+    minimum: int,
+    top: int | None,
+    rebuild: bool,
+) -> None:
+    """
+    统计所有角色的仓库物品. 数据来自 dashboard 写入缓存目录的角色数据,
+    仓库矩阵保存在缓存目录中, 只有数据变化的角色会被重新写入
+    """
+    try:
+        from skland_api.depot import DEPOT_FILE, DepotMatrix, item_column
+    except ImportError as e:
+        raise click.ClickException(str(e)) from None
+
+    def check_item(item: str, param_hint: str) -> None:
+        try:
+            item_column(item)
+        except KeyError:
+            raise click.BadParameter(f"未知的物品: {item}", param_hint=param_hint) from None
+
+    items = items_str.split(",") if items_str is not None else None
+    for item in items or ():
+        check_item(item, "--items")
+    if holders_item is not None:
+        check_item(holders_item, "--holders")
+
+    matrix_file = global_options.cache_dir / DEPOT_FILE
+    start = time.perf_counter()
+    matrix = DepotMatrix() if rebuild else DepotMatrix.load(matrix_file)
+    stats = matrix.refresh(global_options.cache_dir, global_options.auth)
+    if stats.updated or stats.removed or rebuild:
+        matrix.save(matrix_file)
+    refreshed = time.perf_counter()
+
+    if holders_item is not None:
+        holdings = (
+            matrix.top(holders_item, top)
+            if top is not None
+            else matrix.holders(holders_item, minimum)
+        )
+        finished = time.perf_counter()
+        table = Table(title=f"{holders_item} 持有者")
+        table.add_column("账号")
+        table.add_column("uid")
+        table.add_column("数量", justify="right")
+        for holding in holdings:
+            table.add_row(holding.name, holding.uid, str(holding.count))
+    else:
+        totals = matrix.totals(items)
+        finished = time.perf_counter()
+        table = Table(title=f"仓库合计 ({len(matrix)} 个角色)")
+        table.add_column("物品")
+        table.add_column("总数", justify="right")
+        for item, total in totals.items():
+            if total or items is not None:
+                table.add_row(item, str(total))
+    console.print(table)
+    console.print(
+        f"[dim]矩阵更新 {stats.updated} 个, 移除 {stats.removed} 个角色, "
+        f"耗时 {(refreshed - start) * 1e3:.1f} ms; 统计耗时 {(finished - refreshed) * 1e3:.2f} ms"
+    )
+
+
+__all__ = [
+    "depot",
+]
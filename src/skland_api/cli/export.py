@@ -0,0 +1,104 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+
+import rich_click as click
+from loguru import logger
+from rich.table import Table
+
+from .common import GlobalOptions, console
+
+if TYPE_CHECKING:
+    from skland_api.export import ExportFormat
+
+
+@click.command(name="export")
+@click.argument("directory", type=click.Path(path_type=Path, file_okay=False))
+@click.option(
+    "--names",
+    "names_str",
+    metavar="name1,name2,...",
+    help="要导出的账号列表, 缺省时为认证文件中的所有账号",
+)
+@click.option(
+    "--modules",
+    "modules_str",
+    metavar="module1,module2,...",
+    help="要导出结果的同步模块, 缺省时为 profile, update, online, sanity, mission, routine, recruit, infrast_basic",
+)
+@click.option("--no-snapshot", is_flag=True, help="不导出 operators 与 depot 表")
+@click.option(
+    "--format",
+    "export_format",
+    type=click.Choice(["parquet", "arrow"]),
+    default="parquet",
+    show_default=True,
+    help="文件格式",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=1024,
+    show_default=True,
+    help="每个 row group 的行数, 也是每张表在内存中缓存的最大行数",
+)
+@click.pass_obj
+def export(
+    global_options: GlobalOptions,
+    directory: Path,
+    names_str: str | None,
+    modules_str: str | None,
+    no_snapshot: bool,
+    export_format: str,
+    batch_size: int,
+) -> None:
+    """
+    将缓存目录中的角色数据与模块结果导出为按运行时间分区的 Parquet / Arrow 文件,
+    每次导出在 DIRECTORY/<表>/run=<时间>/ 下写入新的分区
+    """
+    try:
+        from skland_api.export import DEFAULT_MODULES, FleetExporter
+    except ImportError as e:
+        raise click.ClickException(str(e)) from None
+    from skland_api.models import CharacterInfo
+    from skland_api.modules import manifest
+
+    modules = modules_str.split(",") if modules_str is not None else DEFAULT_MODULES
+    if unknown := [name for name in modules if name not in manifest]:
+        raise click.BadParameter(f"未知的模块: {', '.join(unknown)}", param_hint="--modules")
+    names = names_str.split(",") if names_str is not None else list(global_options.auth)
+
+    try:
+        exporter = FleetExporter(
+            directory.expanduser(),
+            modules=modules,
+            module_config=global_options.config["module-config"],
+            snapshot=not no_snapshot,
+            format=cast("ExportFormat", export_format),
+            batch_size=batch_size,
+        )
+    except (TypeError, ValueError, FileExistsError) as e:
+        raise click.ClickException(str(e)) from None
+
+    characters = 0
+    with exporter, console.status("导出中...") as status:
+        for name in names:
+            for uid in CharacterInfo.cached_uids(global_options.cache_dir, name):
+                # 每次只加载一个角色, 写入后即释放
+                character_info = CharacterInfo.load_from(global_options.cache_dir, name, uid)
+                for module_name, error in exporter.add(character_info).items():
+                    logger.error(f"Module {module_name!r} for {name!r} execution failed: {error}")
+                characters += 1
+                status.update(f"导出中... {characters} 个角色")
+    written = exporter.close()
+
+    table = Table(title=f"导出 {characters} 个角色到 {directory} ({exporter.partition})")
+    table.add_column("表")
+    table.add_column("行数", justify="right")
+    for name, rows in written.items():
+        table.add_row(name, str(rows))
+    console.print(table)
+
+
+__all__ = [
+    "export",
+]
@@ -0,0 +1,33 @@
+import rich_click as click
+from rich.table import Table
+
+from .common import console
+
+
+@click.command(name="modules")
+def modules() -> None:
+    """
+    列出所有可用模块 (包括通过 entry points 注册的插件模块), 不会导入任何模块
+    """
+    from skland_api.modules import manifest
+
+    table = Table()
+    table.add_column("模块名")
+    table.add_column("来源")
+    table.add_column("入口点")
+    table.add_column("异步")
+
+    for name, spec in manifest.items():
+        table.add_row(
+            name,
+            spec.distribution or "内置",
+            spec.entry,
+            {True: "是", False: "否", None: "未知"}[spec.is_async],
+        )
+
+    console.print(table)
+
+
+__all__ = [
+    "modules",
+]
@@ -0,0 +1,67 @@
+import time
+
+import rich_click as click
+from rich.table import Table
+
+from .common import GlobalOptions, console
+
+
+@click.command(name="query")
+@click.argument("predicates", nargs=-1, required=True, metavar="干员[:E2][:S3M3]...")
+@click.option(
+    "--names",
+    "names_str",
+    metavar="name1,name2,...",
+    help="只显示这些账号的角色",
+)
+@click.option("--rebuild", is_flag=True, help="丢弃已保存的索引并重新建立")
+@click.pass_obj
+def query(
+    global_options: GlobalOptions,
+    predicates: tuple[str, ...],
+    names_str: str | None,
+    rebuild: bool,
+) -> None:
+    """
+    查询拥有指定干员的角色, 多个条件同时满足. 条件的格式为 干员名称或 char_id,
+    后接可选的 :E<精英化等级> 与 :S<技能序号>M<专精等级> (或任一技能 :M<专精等级>), 等级均为 "至少".
+    例如 `skland query 银灰:E2:S3M3 艾雅法拉:E2`
+
+    数据来自 dashboard 写入缓存目录的角色数据, 索引保存在缓存目录中, 只有数据变化的角色会被重新索引
+    """
+    from skland_api.index import INDEX_FILE, OperatorIndex
+
+    index_file = global_options.cache_dir / INDEX_FILE
+    start = time.perf_counter()
+    index = OperatorIndex() if rebuild else OperatorIndex.load(index_file)
+    stats = index.refresh(global_options.cache_dir, global_options.auth)
+    if stats.updated or stats.removed or rebuild:
+        index.save(index_file)
+    refreshed = time.perf_counter()
+
+    try:
+        parsed = [index.parse(predicate) for predicate in predicates]
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="PREDICATES") from None
+    results = index.query(parsed)
+    if names_str is not None:
+        names = set(names_str.split(","))
+        results = [character for character in results if character.name in names]
+    finished = time.perf_counter()
+
+    table = Table(title=" ".join(predicates))
+    table.add_column("账号")
+    table.add_column("uid")
+    for character in results:
+        table.add_row(character.name, character.uid)
+    console.print(table)
+    console.print(
+        f"[dim]{len(results)}/{len(index)} 个角色满足条件; "
+        f"索引更新 {stats.updated} 个, 移除 {stats.removed} 个角色, "
+        f"耗时 {(refreshed - start) * 1e3:.1f} ms; 查询耗时 {(finished - refreshed) * 1e3:.2f} ms"
+    )
+
+
+__all__ = [
+    "query",
+]
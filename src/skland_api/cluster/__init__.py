@@ -0,0 +1,17 @@
+"""
+多节点运行: coordinator 持有全部账号, 按账号名的一致性哈希分配给各个 worker 节点
+"""
+
+from .coordinator import Coordinator, RunSpec
+from .ring import HashRing
+from .worker import Worker
+
+TOKEN_ENVVAR = "SKLAND_API_CLUSTER_TOKEN"
+
+__all__ = [
+    "Coordinator",
+    "HashRing",
+    "RunSpec",
+    "TOKEN_ENVVAR",
+    "Worker",
+]
@@ -0,0 +1,87 @@
+"""
+worker 节点的入口, coordinator 由 `skland cluster` 启动
+
+    python -m skland_api.cluster worker --coordinator http://10.0.0.1:8700
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from contextlib import nullcontext
+
+from loguru import logger
+
+from . import TOKEN_ENVVAR
+from .worker import DEFAULT_HEARTBEAT_INTERVAL, Worker
+
+
+async def work(args: argparse.Namespace) -> None:
+    from skland_api.transport import ApiFactory
+
+    api_factory = ApiFactory(api_base_url=args.api_base_url)
+
+    verify = True
+    if args.cafile is not None:
+        import ssl
+
+        verify = ssl.create_default_context(cafile=args.cafile)
+
+    worker = Worker(
+        args.coordinator,
+        args.id,
+        token=args.token,
+        concurrency=args.concurrency,
+        interval=args.interval,
+        api_factory=api_factory,
+        verify=verify,
+    )
+    serving = nullcontext()
+    if args.metrics_port is not None:
+        from skland_api.metrics import install_metrics
+
+        serving = install_metrics().registry.serving(args.metrics_host, args.metrics_port)
+    async with serving:
+        completed = await worker.run()
+    logger.info(f"worker {worker.worker_id!r} finished {completed} accounts")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m skland_api.cluster")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    worker_parser = subparsers.add_parser("worker", help="启动 worker 节点")
+    worker_parser.add_argument("--coordinator", required=True, help="coordinator 的地址")
+    worker_parser.add_argument(
+        "--token",
+        default=os.environ.get(TOKEN_ENVVAR),
+        help=f"与 coordinator 共享的令牌, 缺省时读取环境变量 {TOKEN_ENVVAR}",
+    )
+    worker_parser.add_argument(
+        "--cafile", help="校验 coordinator 的 HTTPS 证书使用的 CA 文件 (如自签名证书本身)"
+    )
+    worker_parser.add_argument("--id", help="worker 的标识, 缺省时为 主机名-进程号")
+    worker_parser.add_argument("--concurrency", type=int, default=16, help="同时处理的账号数")
+    worker_parser.add_argument(
+        "--interval", type=float, default=DEFAULT_HEARTBEAT_INTERVAL, help="心跳间隔 (秒)"
+    )
+    worker_parser.add_argument("--api-base-url", help="将请求发送到该地址 (用于本地测试服务器)")
+    worker_parser.add_argument(
+        "--metrics-port", type=int, help="运行期间在该端口提供 /metrics 供 Prometheus 抓取"
+    )
+    worker_parser.add_argument(
+        "--metrics-host", default="127.0.0.1", help="--metrics-port 监听的地址"
+    )
+
+    args = parser.parse_args()
+    if not args.token:
+        parser.error(f"需要通过 --token 或环境变量 {TOKEN_ENVVAR} 提供令牌")
+    try:
+        asyncio.run(work(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
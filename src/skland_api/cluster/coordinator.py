@@ -0,0 +1,229 @@
+import asyncio
+import hmac
+import time
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+from skland_api._httpd import HttpRequest, HttpResponse, serve_http
+from skland_api.executor import AccountResult, ModuleResult
+
+from .ring import HashRing
+
+if TYPE_CHECKING:
+    from ssl import SSLContext
+
+# 超过该时间 (秒) 没有心跳的 worker 视为已离开
+DEFAULT_HEARTBEAT_TIMEOUT = 5.0
+
+
+@dataclass(kw_only=True, slots=True)
+class WorkerState:
+    worker_id: str
+    last_seen: float
+    completed: int = 0
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class RunSpec:
+    """
+    下发给 worker 的运行参数
+
+    render: 非空时 worker 将模块结果渲染为文本, 为 render_to_ansi 的关键字参数
+    """
+
+    modules: list[str]
+    module_config: dict
+    render: dict | None = None
+
+
+@dataclass(kw_only=True, slots=True)
+class ClusterStats:
+    """
+    rebalances: 开始分配后, worker 加入或离开导致未完成的账号重新分配的次数
+    """
+
+    joins: int = 0
+    leaves: int = 0
+    rebalances: int = 0
+    duplicates: int = 0
+    per_worker: dict[str, int] = field(default_factory=dict)
+
+
+class Coordinator:
+    """
+    持有全部账号, 按账号名的一致性哈希将未完成的账号分配给已注册的 worker.
+    worker 通过心跳获取自己的分片并上报结果; worker 加入或离开 (心跳超时) 时重新分配未完成的账号
+
+    min_workers: 注册的 worker 首次达到该数量之前不分配账号, 避免全部账号落在第一个 worker 上.
+        开始分配后 worker 离开导致数量不足时仍继续分配
+    token: worker 需要在 Authorization 头中携带的令牌. 心跳的响应中包含认证信息, 因此必须设置,
+        并且令牌与认证信息只有在 HTTPS 或本机回环地址上才不会被窃听
+    """
+
+    def __init__(
+        self,
+        accounts: dict[str, dict],
+        spec: RunSpec,
+        *,
+        token: str,
+        min_workers: int = 1,
+        heartbeat_timeout: float = DEFAULT_HEARTBEAT_TIMEOUT,
+    ):
+        self.accounts = accounts
+        self.spec = spec
+        self.token = token
+        self.min_workers = min_workers
+        self.heartbeat_timeout = heartbeat_timeout
+        self.ring = HashRing()
+        self.workers: dict[str, WorkerState] = {}
+        self.results: dict[str, AccountResult] = {}
+        self.epoch = 0
+        self.started = False
+        self.stats = ClusterStats()
+        self.done = asyncio.Event()
+        self.server: asyncio.Server | None = None
+        self.reaper: asyncio.Task | None = None
+
+    @property
+    def pending(self) -> list[str]:
+        return [name for name in self.accounts if name not in self.results]
+
+    def join(self, worker_id: str) -> None:
+        if worker_id in self.workers:
+            self.workers[worker_id].last_seen = time.monotonic()
+            return
+        self.workers[worker_id] = WorkerState(worker_id=worker_id, last_seen=time.monotonic())
+        self.ring.add(worker_id)
+        self.epoch += 1
+        self.stats.joins += 1
+        if self.started and self.pending:
+            self.stats.rebalances += 1
+        if len(self.workers) >= self.min_workers:
+            self.started = True
+        logger.info(f"worker {worker_id!r} joined, {len(self.workers)} workers, epoch {self.epoch}")
+
+    def leave(self, worker_id: str, reason: str) -> None:
+        if self.workers.pop(worker_id, None) is None:
+            return
+        self.ring.remove(worker_id)
+        self.epoch += 1
+        self.stats.leaves += 1
+        if self.started and self.pending:
+            self.stats.rebalances += 1
+        logger.info(f"worker {worker_id!r} left ({reason}), {len(self.workers)} workers")
+
+    def reap(self) -> None:
+        deadline = time.monotonic() - self.heartbeat_timeout
+        for worker_id, state in list(self.workers.items()):
+            if state.last_seen < deadline:
+                self.leave(worker_id, "heartbeat timeout")
+
+    def assignment(self, worker_id: str) -> dict[str, dict]:
+        if not self.started:
+            return {}
+        return {
+            name: self.accounts[name] for name in self.pending if self.ring.owner(name) == worker_id
+        }
+
+    def accept(self, worker_id: str, data: dict) -> None:
+        result = AccountResult(
+            name=data["name"],
+            auth=data.get("auth"),
+            results=[ModuleResult(**item) for item in data.get("results", [])],
+            error=data.get("error"),
+        )
+        if result.name not in self.accounts:
+            logger.warning(f"worker {worker_id!r} reported unknown account")
+            return
+        if result.name in self.results:
+            # 账号在 worker 处理期间被重新分配时可能收到重复的结果, 以先到者为准
+            self.stats.duplicates += 1
+            return
+        self.results[result.name] = result
+        self.stats.per_worker[worker_id] = self.stats.per_worker.get(worker_id, 0) + 1
+        if (state := self.workers.get(worker_id)) is not None:
+            state.completed += 1
+        if not self.pending:
+            self.done.set()
+
+    async def handle(self, request: HttpRequest) -> HttpResponse:
+        authorization = request.headers.get("authorization", "")
+        if not hmac.compare_digest(authorization, f"Bearer {self.token}"):
+            return HttpResponse(status=401)
+        parts = request.path.strip("/").split("/")
+        match request.method, parts:
+            case "POST", ["workers", worker_id, "heartbeat"]:
+                self.reap()
+                self.join(worker_id)
+                return HttpResponse.from_json(
+                    {
+                        "epoch": self.epoch,
+                        "done": self.done.is_set(),
+                        "accounts": self.assignment(worker_id),
+                        "spec": asdict(self.spec),
+                    }
+                )
+            case "DELETE", ["workers", worker_id]:
+                self.leave(worker_id, "shutdown")
+                return HttpResponse.from_json({"epoch": self.epoch})
+            case "POST", ["workers", worker_id, "results"]:
+                self.accept(worker_id, request.json())
+                return HttpResponse.from_json({"done": self.done.is_set()})
+            case "GET", ["status"]:
+                return HttpResponse.from_json(
+                    {
+                        "epoch": self.epoch,
+                        "workers": sorted(self.workers),
+                        "pending": len(self.pending),
+                        "completed": len(self.results),
+                        "stats": asdict(self.stats),
+                    }
+                )
+        return HttpResponse(status=404)
+
+    async def start(
+        self, host: str = "127.0.0.1", port: int = 0, ssl: SSLContext | None = None
+    ) -> str:
+        """
+        心跳的响应中包含账号的认证信息 (可能有密码), 监听非本机地址时应当提供 ssl
+        """
+        self.server = await serve_http(self.handle, host, port, ssl=ssl)
+        self.reaper = asyncio.create_task(self.reap_periodically())
+        if not self.accounts:
+            self.done.set()
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"{'https' if ssl is not None else 'http'}://{host}:{port}"
+
+    async def reap_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_timeout / 2)
+            self.reap()
+
+    async def wait(self) -> list[AccountResult]:
+        """
+        等待全部账号完成, 按账号顺序返回结果
+        """
+        await self.done.wait()
+        return [self.results[name] for name in self.accounts]
+
+    async def close(self, grace: float = DEFAULT_HEARTBEAT_TIMEOUT) -> None:
+        """
+        最多等待 grace 秒, 让 worker 通过心跳得知运行已结束并主动离开
+        """
+        deadline = time.monotonic() + grace
+        while self.workers and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self.reaper is not None:
+            self.reaper.cancel()
+        if self.server is not None:
+            self.server.close()
+            self.server.close_clients()
+            await self.server.wait_closed()
+
+
+__all__ = [
+    "Coordinator",
+    "RunSpec",
+]
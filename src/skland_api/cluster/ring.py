@@ -0,0 +1,70 @@
+import bisect
+import hashlib
+from collections.abc import Iterable
+
+# 每个节点在环上的虚拟节点数, 越多分布越均匀
+DEFAULT_REPLICAS = 64
+
+
+def ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    一致性哈希环. 节点加入或离开时, 只有环上相邻区间内的键会改变归属
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = DEFAULT_REPLICAS):
+        self.replicas = replicas
+        self.points: list[int] = []
+        self.owners: dict[int, str] = {}
+        self.nodes: set[str] = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for replica in range(self.replicas):
+            point = ring_hash(f"{node}#{replica}")
+            self.owners[point] = node
+            bisect.insort(self.points, point)
+
+    def remove(self, node: str) -> None:
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        for replica in range(self.replicas):
+            point = ring_hash(f"{node}#{replica}")
+            if self.owners.get(point) == node:
+                del self.owners[point]
+                self.points.remove(point)
+
+    def owner(self, key: str) -> str | None:
+        if not self.points:
+            return None
+        index = bisect.bisect(self.points, ring_hash(key)) % len(self.points)
+        return self.owners[self.points[index]]
+
+    def assign(self, keys: Iterable[str]) -> dict[str, list[str]]:
+        """
+        node -> keys, 保持 keys 的顺序
+        """
+        assignment: dict[str, list[str]] = {node: [] for node in self.nodes}
+        for key in keys:
+            if (node := self.owner(key)) is not None:
+                assignment[node].append(key)
+        return assignment
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, node: object) -> bool:
+        return node in self.nodes
+
+
+__all__ = [
+    "HashRing",
+]
@@ -0,0 +1,162 @@
+import asyncio
+import functools
+import json
+import os
+import socket
+import ssl
+from dataclasses import asdict
+
+import httpx
+from loguru import logger
+
+from skland_api.executor import ShardJob, run_account
+from skland_api.transport import ApiFactory
+
+from .coordinator import RunSpec
+
+DEFAULT_HEARTBEAT_INTERVAL = 1.0
+# 连续多少次心跳失败后退出
+MAX_HEARTBEAT_FAILURES = 5
+
+
+class Worker:
+    """
+    通过心跳从 coordinator 获取分片, 处理分片中的账号并上报结果.
+    分片变化 (其他 worker 加入或离开) 时取消不再属于自己的账号, 开始处理新分配的账号
+
+    concurrency: 同时处理的账号数
+    verify: 校验 coordinator 证书的方式, 与 httpx 的 verify 参数相同 (如使用自签名证书时的 SSLContext)
+    """
+
+    def __init__(
+        self,
+        coordinator_url: str,
+        worker_id: str | None = None,
+        *,
+        token: str,
+        concurrency: int = 16,
+        interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+        api_factory: ApiFactory = ApiFactory(),
+        verify: ssl.SSLContext | bool = True,
+    ):
+        self.coordinator_url = coordinator_url
+        self.token = token
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.interval = interval
+        self.api_factory = api_factory
+        self.verify = verify
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.inflight: dict[str, asyncio.Task] = {}
+        self.finished: set[str] = set()
+
+    def make_job(self, spec: RunSpec) -> ShardJob:
+        postprocess = None
+        if spec.render is not None:
+            from skland_api.cli.dashboard import render_to_ansi
+
+            postprocess = functools.partial(render_to_ansi, **spec.render)
+        return ShardJob(
+            modules=spec.modules,
+            module_config=spec.module_config,
+            api_factory=self.api_factory,
+            postprocess=postprocess,
+            dump_dir=None,
+        )
+
+    async def process(
+        self,
+        client: httpx.AsyncClient,
+        name: str,
+        info: dict,
+        job: ShardJob,
+        transport: httpx.AsyncBaseTransport,
+    ):
+        async with self.semaphore:
+            result = await run_account(name, info, job, transport)
+        if self.inflight.get(name) is not asyncio.current_task():
+            # 账号已分配给其他 worker 或本 worker 正在退出. 取消可能在连接池中被吞掉,
+            # 此时的结果可能来自已关闭的连接, 不能上报
+            return
+        response = await client.post(
+            f"/workers/{self.worker_id}/results",
+            content=json.dumps(asdict(result), ensure_ascii=False, default=str),
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+        self.finished.add(name)
+
+    def on_done(self, name: str, task: asyncio.Task) -> None:
+        if self.inflight.get(name) is task:
+            del self.inflight[name]
+        if not task.cancelled() and (error := task.exception()) is not None:
+            logger.error(f"failed to report result of {name!r}: {error!r}")
+
+    def update(
+        self,
+        client: httpx.AsyncClient,
+        assigned: dict[str, dict],
+        job: ShardJob,
+        transport: httpx.AsyncBaseTransport,
+    ) -> None:
+        for name in list(self.inflight):
+            if name not in assigned:
+                logger.info(f"account {name!r} moved to another worker, cancelled")
+                self.inflight.pop(name).cancel()
+        for name, info in assigned.items():
+            if name in self.inflight or name in self.finished:
+                continue
+            task = asyncio.create_task(self.process(client, name, info, job, transport))
+            task.add_done_callback(functools.partial(self.on_done, name))
+            self.inflight[name] = task
+
+    async def run(self) -> int:
+        """
+        运行到 coordinator 报告全部账号完成, 返回本 worker 完成的账号数.
+        本 worker 处理的所有账号共享一个 transport (及其连接池)
+        """
+        transport = self.api_factory.transport()
+        async with httpx.AsyncClient(
+            base_url=self.coordinator_url,
+            headers={"Authorization": f"Bearer {self.token}"},
+            timeout=30,
+            verify=self.verify,
+        ) as client:
+            failures = 0
+            job = None
+            try:
+                while True:
+                    try:
+                        response = await client.post(f"/workers/{self.worker_id}/heartbeat")
+                        response.raise_for_status()
+                    except httpx.HTTPError as e:
+                        failures += 1
+                        if failures >= MAX_HEARTBEAT_FAILURES:
+                            raise
+                        logger.warning(f"heartbeat failed ({failures}): {e!r}")
+                        await asyncio.sleep(self.interval)
+                        continue
+                    failures = 0
+                    data = response.json()
+                    if data["done"]:
+                        break
+                    if job is None:
+                        job = self.make_job(RunSpec(**data["spec"]))
+                    self.update(client, data["accounts"], job, transport)
+                    await asyncio.sleep(self.interval)
+            finally:
+                tasks = list(self.inflight.values())
+                self.inflight.clear()
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                try:
+                    await client.delete(f"/workers/{self.worker_id}")
+                except httpx.HTTPError:
+                    pass
+                await transport.aclose()
+        return len(self.finished)
+
+
+__all__ = [
+    "Worker",
+]
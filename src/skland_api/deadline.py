@@ -0,0 +1,101 @@
+"""
+截止时间与各阶段的时间预算
+
+    deadline = Deadline.after(10, budgets={"auth": 3, "fetch": 5})
+    with use_deadline(deadline):
+        async with stage("auth"):
+            ...
+
+截止时间通过 contextvar 向下传递: 在其中创建的任务会继承它, SklandClient 发出的请求也会在截止时间到达时被取消.
+未设置截止时间时, stage 不做任何事.
+"""
+
+import asyncio
+import math
+import time
+from collections.abc import Iterator, Mapping
+from contextlib import AbstractAsyncContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Literal, Self
+
+Stage = Literal["auth", "fetch", "module"]
+STAGES: tuple[Stage, ...] = ("auth", "fetch", "module")
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class Deadline:
+    """
+    at: time.monotonic() 的读数, 与事件循环的时钟一致. 为 math.inf 时只有阶段预算生效
+    budgets: 阶段名 -> 每次进入该阶段时可用的最长时间 (秒), 不会超过截止时间
+    """
+
+    at: float
+    budgets: Mapping[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def after(cls, seconds: float | None, budgets: Mapping[str, float] | None = None) -> Self:
+        at = math.inf if seconds is None else time.monotonic() + seconds
+        return cls(at=at, budgets=budgets or {})
+
+    def remaining(self) -> float:
+        return max(self.at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.at
+
+    def stage_deadline(self, name: str | None) -> float:
+        if name is not None and (budget := self.budgets.get(name)) is not None:
+            return min(self.at, time.monotonic() + budget)
+        return self.at
+
+
+current_deadline: ContextVar[Deadline | None] = ContextVar("current_deadline", default=None)
+
+
+@contextmanager
+def use_deadline(deadline: Deadline | None) -> Iterator[None]:
+    token = current_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        current_deadline.reset(token)
+
+
+def stage(name: Stage | None = None) -> AbstractAsyncContextManager:
+    """
+    在阶段预算与截止时间中较早者到达时取消其中的代码, 并抛出 TimeoutError. name 为 None 时只受截止时间限制
+    """
+    if (deadline := current_deadline.get()) is None:
+        return nullcontext()
+    if (when := deadline.stage_deadline(name)) == math.inf:
+        return nullcontext()
+    return asyncio.timeout_at(when)
+
+
+def parse_budgets(text: str) -> dict[str, float]:
+    """
+    解析 "auth=3,fetch=5" 形式的阶段预算
+    """
+    budgets = {}
+    for item in text.split(","):
+        name, sep, value = item.partition("=")
+        name = name.strip()
+        if not sep or name not in STAGES:
+            raise ValueError(f"invalid stage budget {item!r}, expected one of {', '.join(STAGES)}")
+        try:
+            budgets[name] = float(value)
+        except ValueError:
+            raise ValueError(f"invalid budget for stage {name!r}: {value!r}") from None
+        if budgets[name] <= 0:
+            raise ValueError(f"budget for stage {name!r} must be positive")
+    return budgets
+
+
+__all__ = [
+    "Deadline",
+    "current_deadline",
+    "parse_budgets",
+    "stage",
+    "use_deadline",
+]
@@ -0,0 +1,206 @@
+"""
+多个角色的仓库矩阵
+
+DepotMatrix 将所有角色的 cultivate["items"] 保存为 (角色 × 物品) 的稠密矩阵, 列对应 ITEM_MAPPING 中的物品,
+之后的统计都是对矩阵的向量化运算:
+
+    matrix = DepotMatrix()
+    matrix.refresh(cache_path, names)
+    matrix.totals()                   # 物品 -> 所有角色的总数
+    matrix.holders("固源岩组", 100)    # 持有至少 100 个的角色
+    matrix.top("聚酸酯组", 10)         # 持有最多的 10 个角色
+
+矩阵保存在缓存目录中, 只有 cultivate 数据发生变化的角色会被重新写入. 需要安装 numpy: pip install 'skland-api[batch]'
+"""
+
+import json
+import os
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Self
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError("仓库矩阵需要安装额外的依赖, 请运行: pip install 'skland-api[batch]'") from e
+
+from loguru import logger
+
+from .cached_rows import CachedRows, RefreshStats
+from .memo import digest
+from .models import constants
+
+if TYPE_CHECKING:
+    from .models import CharacterInfo
+
+DEPOT_FILE = "depot-matrix.npz"
+ITEM_IDS: list[str] = list(constants.ITEM_MAPPING)
+ITEM_COLUMNS: dict[str, int] = {item_id: column for column, item_id in enumerate(ITEM_IDS)}
+ITEM_NAME_COLUMNS: dict[str, int] = {
+    name: column for column, name in enumerate(constants.ITEM_MAPPING.values())
+}
+INITIAL_CAPACITY = 64
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class Holding:
+    name: str
+    uid: str
+    count: int
+
+
+def item_column(item: str) -> int:
+    """
+    物品名称或 id -> 列号, 不在 ITEM_MAPPING 中时抛出 KeyError
+    """
+    if (column := ITEM_NAME_COLUMNS.get(item)) is not None:
+        return column
+    return ITEM_COLUMNS[item]
+
+
+class DepotMatrix:
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self.counts = np.zeros((capacity, len(ITEM_IDS)), dtype=np.int32)
+        # 行号 -> 角色, 删除后的行清零并在之后复用
+        self.table = CachedRows()
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @property
+    def active(self) -> np.ndarray:
+        return np.fromiter(self.table.ids.values(), dtype=np.intp, count=len(self.table))
+
+    def reserve(self, row_id: int) -> None:
+        if row_id >= len(self.counts):
+            grown = np.zeros((max(len(self.counts) * 2, row_id + 1), len(ITEM_IDS)), dtype=np.int32)
+            grown[: len(self.counts)] = self.counts
+            self.counts = grown
+
+    def remove(self, name: str, uid: str) -> bool:
+        if (row_id := self.table.remove(name, uid)) is None:
+            return False
+        self.counts[row_id] = 0
+        return True
+
+    def update(self, name: str, uid: str, cultivate: dict, mtime_ns: int | None = None) -> bool:
+        """
+        cultivate 没有变化时只更新 mtime_ns, 返回是否重新写入
+        """
+        items = cultivate["items"]
+        row_id, changed = self.table.stamp(name, uid, digest(items), mtime_ns)
+        if not changed:
+            return False
+        self.reserve(row_id)
+        entries = [
+            (ITEM_COLUMNS[entry["id"]], entry["count"])
+            for entry in items
+            if entry["id"] in ITEM_COLUMNS
+        ]
+        counts = self.counts[row_id]
+        counts[:] = 0
+        if entries:
+            columns, values = zip(*entries)
+            counts[list(columns)] = values
+        return True
+
+    def update_character(self, character_info: CharacterInfo) -> bool:
+        return self.update(character_info.name, character_info.uid, character_info.cultivate)
+
+    def totals(self, items: Iterable[str] | None = None) -> dict[str, int]:
+        """
+        物品名称 -> 所有角色的总数, items 缺省时为所有物品
+        """
+        columns = (
+            list(range(len(ITEM_IDS))) if items is None else [item_column(item) for item in items]
+        )
+        sums = self.counts[self.active][:, columns].sum(axis=0, dtype=np.int64)
+        return {
+            constants.ITEM_MAPPING[ITEM_IDS[column]]: total
+            for column, total in zip(columns, sums.tolist())
+        }
+
+    def holders(self, item: str, minimum: int) -> list[Holding]:
+        """
+        持有至少 minimum 个该物品的角色, 按数量从多到少排序
+        """
+        active = self.active
+        counts = self.counts[active, item_column(item)]
+        selected = np.flatnonzero(counts >= minimum)
+        selected = selected[np.argsort(-counts[selected], kind="stable")]
+        return self.holdings(active[selected], counts[selected])
+
+    def top(self, item: str, k: int) -> list[Holding]:
+        """
+        持有该物品最多的 k 个角色
+        """
+        active = self.active
+        counts = self.counts[active, item_column(item)]
+        if k < len(counts):
+            selected = np.argpartition(-counts, k - 1)[:k]
+        else:
+            selected = np.arange(len(counts))
+        selected = selected[np.argsort(-counts[selected], kind="stable")]
+        return self.holdings(active[selected], counts[selected])
+
+    def holdings(self, row_ids: np.ndarray, counts: np.ndarray) -> list[Holding]:
+        return [
+            Holding(name=self.table[row_id].name, uid=self.table[row_id].uid, count=count)
+            for row_id, count in zip(row_ids.tolist(), counts.tolist())
+        ]
+
+    def refresh(self, cache_path: Path, names: Iterable[str]) -> RefreshStats:
+        """
+        按 dump_to 写入的缓存文件更新矩阵. 修改时间未变的文件不读取,
+        不在 names 中或缓存文件已删除的角色被移除
+        """
+
+        def update(name: str, uid: str, file: Path, mtime_ns: int) -> bool:
+            with file.open(encoding="utf-8") as fp:
+                cultivate = json.load(fp)
+            return self.update(name, uid, cultivate, mtime_ns)
+
+        return self.table.refresh(cache_path, names, update, self.remove)
+
+    @classmethod
+    def load(cls, file: Path) -> Self:
+        """
+        文件不存在, 损坏或物品列表不同 (ITEM_MAPPING 更新) 时返回空矩阵
+        """
+        try:
+            with np.load(file, allow_pickle=False) as data:
+                if data["item_ids"].tolist() != ITEM_IDS:
+                    raise ValueError("item list changed")
+                counts = data["counts"]
+                rows = json.loads(str(data["rows"]))
+        except FileNotFoundError:
+            return cls()
+        except (ValueError, KeyError, OSError) as e:
+            logger.warning(f"Ignoring invalid depot matrix {file}: {e}")
+            return cls()
+        matrix = cls(capacity=max(INITIAL_CAPACITY, len(counts)))
+        matrix.counts[: len(counts)] = counts
+        matrix.table = CachedRows.from_list(rows)
+        return matrix
+
+    def save(self, file: Path) -> None:
+        rows = self.table.to_list()
+        # np.savez 会为没有 .npz 后缀的文件名补上后缀
+        temp = file.with_name(f".{file.stem}.{os.getpid()}.tmp.npz")
+        np.savez_compressed(
+            temp,
+            counts=self.counts[: len(rows)],
+            item_ids=np.array(ITEM_IDS),
+            rows=np.array(json.dumps(rows, ensure_ascii=False)),
+        )
+        temp.replace(file)
+
+
+__all__ = [
+    "DEPOT_FILE",
+    "DepotMatrix",
+    "Holding",
+    "RefreshStats",
+    "item_column",
+]
@@ -0,0 +1,401 @@
+"""
+多进程与多线程执行器
+
+单个事件循环中, 大响应的 JSON 解析, 数据类的构造与渲染等 CPU 密集的工作只能使用一个核心.
+ProcessExecutor 将账号按顺序切分为若干分片, 交给进程池中的 worker 执行认证, 请求与模块计算,
+每个 worker 有独立的事件循环, 同一分片的账号共享一个 transport (及其连接池),
+结果按账号顺序流式返回给调用方.
+
+在自由线程 (free-threaded) 构建的 Python 上, run_in_threads 可以在同一进程中并行执行同步模块.
+SubinterpreterExecutor 在子解释器中执行同步模块, 每个子解释器有独立的 GIL 与全局状态.
+"""
+
+import asyncio
+import contextvars
+import importlib
+import os
+import pickle
+import sys
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Mapping, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, Self
+
+from loguru import logger
+
+from .transport import ApiFactory
+
+if TYPE_CHECKING:
+    import httpx
+
+    from .models import CharacterInfo
+
+# 模块配置中选择执行方式的键, 如 {"module-config": {"infrast_assignment": {"executor": "subinterpreter"}}}
+EXECUTOR_CONFIG_KEY = "executor"
+ModuleExecutorName = Literal["inline", "subinterpreter"]
+# 每个子解释器中缓存的已解码快照数
+SNAPSHOT_CACHE_SIZE = 16
+
+# worker 进程中复用的事件循环, 由进程池的 initializer 创建
+_worker_loop: asyncio.AbstractEventLoop | None = None
+# 以下两项只在子解释器中使用
+_snapshot_cache: OrderedDict[str, CharacterInfo] = OrderedDict()
+_entry_cache: dict[str, Callable] = {}
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class ModuleResult:
+    """
+    value: 模块的返回值, 经过 postprocess 处理 (如果有)
+    error: 模块执行失败时的异常描述
+    """
+
+    module: str
+    uid: str
+    value: object = None
+    error: str | None = None
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class AccountResult:
+    """
+    auth: 认证后更新的认证信息, 调用方可以据此写回认证文件; 认证失败时为 None
+    results: 按 角色 -> 模块 的顺序排列
+    error: 认证或请求失败时的描述
+    """
+
+    name: str
+    auth: dict | None = None
+    results: list[ModuleResult] = field(default_factory=list)
+    error: str | None = None
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class ShardJob:
+    """
+    传递给 worker 的参数, 所有字段都需要可以 pickle
+
+    api_factory: 只携带传输相关设置的 ApiFactory, 每个分片由它创建一个共享的 transport
+    postprocess: 在 worker 中对模块结果的处理 (module_name, value) -> value, 如渲染为文本
+    dump_dir: 非空时将角色数据写入该目录 (与 CharacterInfo.dump_to 相同)
+    evaluated_at: 非空时模块在该时间的 evaluation_clock 下执行
+    """
+
+    modules: Sequence[str]
+    module_config: Mapping[str, dict]
+    api_factory: ApiFactory
+    postprocess: Callable[[str, object], object] | None
+    dump_dir: Path | None
+    evaluated_at: int | None = None
+
+
+def _init_worker() -> asyncio.AbstractEventLoop:
+    global _worker_loop
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    return _worker_loop
+
+
+def _run_shard(accounts: list[tuple[str, dict]], job: ShardJob) -> list[AccountResult]:
+    loop = _worker_loop if _worker_loop is not None else _init_worker()
+    return loop.run_until_complete(_run_accounts(accounts, job))
+
+
+async def _run_accounts(accounts: list[tuple[str, dict]], job: ShardJob) -> list[AccountResult]:
+    transport = job.api_factory.transport()
+    try:
+        return await asyncio.gather(
+            *[run_account(name, info, job, transport) for name, info in accounts]
+        )
+    finally:
+        await transport.aclose()
+
+
+async def run_account(
+    name: str, info: dict, job: ShardJob, transport: httpx.AsyncBaseTransport
+) -> AccountResult:
+    """
+    完成一个账号的认证, 请求与模块计算. 异常均记录在结果中, 不会抛出
+
+    transport: 由 job.api_factory.transport() 创建, 多个账号共享, 由调用方关闭
+    """
+    import httpx
+
+    from .api import SklandApiException
+    from .breaker import CircuitOpenError
+    from .instrumentation import current_account, scope
+    from .models import AuthInfo, CharacterInfoLoader
+    from .models.components import evaluation_time
+    from .modules import manifest
+
+    current_account.set(name)
+    if job.evaluated_at is not None:
+        evaluation_time.set(job.evaluated_at)
+    try:
+        auth_info = AuthInfo(**info)
+        api = await auth_info.full_auth(job.api_factory(transport))
+    except ValueError:
+        return AccountResult(name=name, error=f"User {name} login failed")
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        return AccountResult(name=name, error=f"User {name} login failed: {e!r}")
+    auth = info | auth_info.to_dict()
+    try:
+        characters = await api.binding_list()
+    except (SklandApiException, httpx.HTTPError, CircuitOpenError) as e:
+        return AccountResult(name=name, auth=auth, error=f"fetch binding list failed: {e}")
+
+    loaded = await asyncio.gather(
+        *[
+            CharacterInfoLoader(name, api, character).full_load()
+            for character in characters
+            if character["gameName"] == "明日方舟"
+        ],
+        return_exceptions=True,
+    )
+    results = []
+    for character_info in loaded:
+        if isinstance(character_info, BaseException):
+            logger.error(f"Failed to load character info: {character_info}")
+            continue
+        if job.dump_dir is not None:
+            character_info.dump_to(job.dump_dir)
+        for module_name in job.modules:
+            spec = manifest[module_name]
+            try:
+                with scope(uid=character_info.uid, module=module_name):
+                    value = spec.load()(character_info, job.module_config.get(module_name))
+                    if asyncio.iscoroutine(value):
+                        value = await value
+                if job.postprocess is not None and value is not None:
+                    value = job.postprocess(module_name, value)
+            except Exception as e:
+                results.append(
+                    ModuleResult(module=module_name, uid=character_info.uid, error=str(e))
+                )
+            else:
+                results.append(
+                    ModuleResult(module=module_name, uid=character_info.uid, value=value)
+                )
+    return AccountResult(name=name, auth=auth, results=results)
+
+
+def gil_enabled() -> bool:
+    """
+    自由线程构建的 Python 也可能因为环境变量 PYTHON_GIL=1 或导入了不兼容的扩展而启用 GIL
+    """
+    return sys._is_gil_enabled()
+
+
+def default_thread_count() -> int:
+    """
+    启用 GIL 时多线程执行同步模块没有收益, 因此只使用一个线程
+    """
+    if gil_enabled():
+        return 1
+    return os.process_cpu_count() or 1
+
+
+def run_in_threads[T](calls: Sequence[Callable[[], T]], threads: int) -> list[T | Exception]:
+    """
+    并行执行 calls, 按顺序返回结果, 执行失败时返回对应的异常. threads 为 1 时在当前线程中执行.
+    每个调用在调用方上下文的副本中执行, 以继承 evaluation_clock 等 contextvar.
+    线程池中结束的阶段在全部调用完成后才在当前线程中分发给 instrument
+    """
+    from .instrumentation import PhaseEvent, deferred_phases, phase_finished
+
+    def run(call: Callable[[], T]) -> T | Exception:
+        try:
+            return call()
+        except Exception as e:
+            return e
+
+    def run_deferred(call: Callable[[], T]) -> tuple[T | Exception, list[PhaseEvent]]:
+        events: list[PhaseEvent] = []
+        deferred_phases.set(events)
+        return run(call), events
+
+    def submit(
+        pool: ThreadPoolExecutor, call: Callable[[], T]
+    ) -> Future[tuple[T | Exception, list[PhaseEvent]]]:
+        context = contextvars.copy_context()
+        return pool.submit(lambda: context.run(run_deferred, call))
+
+    if threads <= 1 or len(calls) <= 1:
+        return [run(call) for call in calls]
+    with ThreadPoolExecutor(max_workers=min(threads, len(calls))) as pool:
+        futures = [submit(pool, call) for call in calls]
+        outcomes = [future.result() for future in futures]
+    results = []
+    for result, events in outcomes:
+        for event in events:
+            phase_finished(event)
+        results.append(result)
+    return results
+
+
+def module_executor(config: dict | None) -> ModuleExecutorName:
+    if isinstance(config, dict) and (name := config.get(EXECUTOR_CONFIG_KEY)) is not None:
+        if name not in ("inline", "subinterpreter"):
+            raise ValueError(f"unknown module executor: {name!r}")
+        return name
+    return "inline"
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class CharacterSnapshot:
+    """
+    传入子解释器的角色数据. player_info 与 cultivate 只序列化一次,
+    同一角色的多个模块共享同一份 data, 子解释器中按 key 缓存反序列化的结果
+    """
+
+    key: str
+    name: str
+    uid: str
+    data: bytes
+
+    @classmethod
+    def from_character_info(cls, character_info: CharacterInfo) -> Self:
+        return cls(
+            key=uuid.uuid4().hex,
+            name=character_info.name,
+            uid=character_info.uid,
+            data=pickle.dumps(
+                (character_info.player_info, character_info.cultivate),
+                protocol=pickle.HIGHEST_PROTOCOL,
+            ),
+        )
+
+    def to_character_info(self) -> CharacterInfo:
+        from .models import CharacterInfo
+
+        player_info, cultivate = pickle.loads(self.data)
+        return CharacterInfo(
+            name=self.name, api=None, uid=self.uid, cultivate=cultivate, player_info=player_info
+        )
+
+
+def _run_in_interpreter(
+    entry: str, snapshot: CharacterSnapshot, config: dict | None, now: int | None
+) -> object:
+    from .models import evaluation_clock
+
+    if (character_info := _snapshot_cache.get(snapshot.key)) is None:
+        character_info = _snapshot_cache[snapshot.key] = snapshot.to_character_info()
+        if len(_snapshot_cache) > SNAPSHOT_CACHE_SIZE:
+            _snapshot_cache.popitem(last=False)
+    else:
+        _snapshot_cache.move_to_end(snapshot.key)
+    if (function := _entry_cache.get(entry)) is None:
+        module_path, _, attr = entry.partition(":")
+        function = _entry_cache[entry] = getattr(importlib.import_module(module_path), attr)
+    with evaluation_clock(now):
+        return function(character_info, config)
+
+
+class SubinterpreterExecutor:
+    """
+    在子解释器池中执行同步模块, 模块中的异常与全局状态不会影响主解释器.
+    模块中没有 api 可用, 结果需要可以 pickle (内置模块的结果均为数据类)
+
+    workers: 子解释器数, 缺省时为 CPU 核心数
+    """
+
+    def __init__(self, workers: int | None = None):
+        from concurrent.futures import InterpreterPoolExecutor
+
+        self.pool = InterpreterPoolExecutor(max_workers=workers)
+
+    def submit(self, entry: str, snapshot: CharacterSnapshot, config: dict | None) -> Future:
+        """
+        entry: 模块的入口点, 格式与 ModuleSpec.entry 相同. 模块使用提交时的 evaluation_clock
+        """
+        from .models.components import evaluation_time
+
+        return self.pool.submit(_run_in_interpreter, entry, snapshot, config, evaluation_time.get())
+
+    def close(self) -> None:
+        self.pool.shutdown()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close()
+
+
+class ProcessExecutor:
+    """
+    workers: 进程数, 缺省时为 CPU 核心数
+    shard_size: 每个分片的账号数, 分片越小返回越及时, 越大则进程间通信的开销越少
+    """
+
+    def __init__(self, workers: int | None = None, shard_size: int = 1):
+        if shard_size < 1:
+            raise ValueError(f"shard_size must be positive, got {shard_size}")
+        self.workers = workers or os.process_cpu_count() or 1
+        self.shard_size = shard_size
+
+    async def run(
+        self,
+        accounts: Mapping[str, dict],
+        modules: Sequence[str],
+        *,
+        module_config: Mapping[str, dict] | None = None,
+        api_factory: ApiFactory = ApiFactory(),
+        postprocess: Callable[[str, object], object] | None = None,
+        dump_dir: Path | None = None,
+        evaluated_at: int | None = None,
+    ) -> AsyncIterator[AccountResult]:
+        """
+        accounts: 账号名 -> 认证信息 (与认证文件中的格式相同)
+        evaluated_at: 所有账号的模块使用的当前时间, 缺省时各自使用执行时的时间
+
+        按 accounts 的顺序逐个返回结果, 前面的分片完成前不会返回后面的账号
+        """
+        job = ShardJob(
+            modules=list(modules),
+            module_config=dict(module_config or {}),
+            api_factory=api_factory,
+            postprocess=postprocess,
+            dump_dir=dump_dir,
+            evaluated_at=evaluated_at,
+        )
+        items = list(accounts.items())
+        shards = [
+            items[start : start + self.shard_size]
+            for start in range(0, len(items), self.shard_size)
+        ]
+        if not shards:
+            return
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(shards)), initializer=_init_worker
+        ) as pool:
+            futures = [loop.run_in_executor(pool, _run_shard, shard, job) for shard in shards]
+            try:
+                for future in futures:
+                    for result in await future:
+                        yield result
+            finally:
+                for future in futures:
+                    future.cancel()
+
+
+__all__ = [
+    "AccountResult",
+    "CharacterSnapshot",
+    "EXECUTOR_CONFIG_KEY",
+    "ModuleResult",
+    "ProcessExecutor",
+    "ShardJob",
+    "SubinterpreterExecutor",
+    "default_thread_count",
+    "gil_enabled",
+    "module_executor",
+    "run_account",
+    "run_in_threads",
+]
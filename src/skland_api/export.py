@@ -0,0 +1,324 @@
+"""
+将模块结果与角色数据导出为 Parquet / Arrow 文件
+
+每个模块一张表, 表结构由模块 main 的返回值注解 (dataclass) 推导: 嵌套的 dataclass 为 struct,
+list / set 为 list, TimeStamp 为 timestamp, Duration 为 duration, X | None 为可空列.
+角色数据另外导出为 operators (每个干员一行) 与 depot (每种物品一行) 两张表. 所有表都带有 name, uid, run_at 三列.
+
+    with FleetExporter(directory, modules=["sanity", "routine"]) as exporter:
+        for character_info in character_infos:
+            exporter.add(character_info)
+
+每次导出写入 <directory>/<表>/run=<时间>/ 下的新分区, 之前的分区保持不变. 每张表最多缓存 batch_size 行,
+写满后作为一个 row group 写入文件, 内存占用与角色总数无关. 需要安装 pyarrow: pip install 'skland-api[export]'
+"""
+
+import dataclasses
+import time
+import types
+import typing
+from collections.abc import Callable, Sequence
+from collections.abc import Set as AbstractSet
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError as e:
+    raise ImportError("导出需要安装额外的依赖, 请运行: pip install 'skland-api[export]'") from e
+
+from .models import Duration, TimeStamp, constants
+
+if TYPE_CHECKING:
+    from .models import CharacterInfo
+
+ExportFormat = Literal["parquet", "arrow"]
+
+DEFAULT_MODULES = [
+    "profile",
+    "update",
+    "online",
+    "sanity",
+    "mission",
+    "routine",
+    "recruit",
+    "infrast_basic",
+]
+DEFAULT_BATCH_SIZE = 1024
+FILE_SUFFIXES: dict[str, str] = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class OperatorRow:
+    char_id: str
+    operator: str | None
+    level: int
+    evolve: int
+    mastery_levels: list[int]
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class DepotRow:
+    item_id: str
+    item: str | None
+    count: int
+
+
+def arrow_type(annotation: object) -> pa.DataType:
+    """
+    由类型注解推导 Arrow 类型, 无法表示时抛出 TypeError
+    """
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin in (types.UnionType, typing.Union):
+        types_ = [arg for arg in args if arg is not type(None)]
+        if len(types_) != 1:
+            raise TypeError(f"unsupported union type: {annotation!r}")
+        return arrow_type(types_[0])
+    if origin in (list, set, frozenset, tuple, AbstractSet, Sequence):
+        if origin is tuple and not (len(args) == 2 and args[1] is Ellipsis):
+            raise TypeError(f"unsupported tuple type: {annotation!r}")
+        return pa.list_(arrow_type(args[0]))
+    if origin is dict:
+        return pa.map_(arrow_type(args[0]), arrow_type(args[1]))
+    if isinstance(annotation, type) and dataclasses.is_dataclass(annotation):
+        return pa.struct(fields(annotation))
+    # 子类在前: TimeStamp 与 Duration 都是 int 的子类, bool 也是 int 的子类
+    for base, data_type in [
+        (TimeStamp, pa.timestamp("s", tz="UTC")),
+        (Duration, pa.duration("s")),
+        (bool, pa.bool_()),
+        (int, pa.int64()),
+        (float, pa.float64()),
+        (str, pa.string()),
+    ]:
+        if isinstance(annotation, type) and issubclass(annotation, base):
+            return data_type
+    raise TypeError(f"unsupported type: {annotation!r}")
+
+
+def fields(cls: type) -> list[pa.Field]:
+    hints = typing.get_type_hints(cls)
+    return [
+        pa.field(field.name, arrow_type(hints[field.name]), nullable=True)
+        for field in dataclasses.fields(cls)
+    ]
+
+
+def schema_of(cls: type) -> pa.Schema:
+    return pa.schema(
+        [
+            pa.field("name", pa.string(), nullable=False),
+            pa.field("uid", pa.string(), nullable=False),
+            pa.field("run_at", pa.timestamp("s", tz="UTC"), nullable=False),
+            *fields(cls),
+        ]
+    )
+
+
+def module_result_type(entry: Callable) -> type:
+    result_type = typing.get_type_hints(entry).get("return")
+    if not dataclasses.is_dataclass(result_type):
+        raise TypeError(f"return type {result_type!r} is not a dataclass")
+    return result_type
+
+
+def to_arrow_row(value: object) -> dict[str, object]:
+    """
+    dataclass 实例 -> 字段名到 Arrow 值的映射, 不是 dataclass 实例时抛出 TypeError
+    """
+    if not dataclasses.is_dataclass(value) or isinstance(value, type):
+        raise TypeError(f"{value!r} is not a dataclass instance")
+    return {
+        field.name: to_arrow_value(getattr(value, field.name))
+        for field in dataclasses.fields(value)
+    }
+
+
+def to_arrow_value(value: object) -> object:
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return to_arrow_row(value)
+    if isinstance(value, (set, frozenset)):
+        return [to_arrow_value(item) for item in sorted(value)]
+    if isinstance(value, (list, tuple)):
+        return [to_arrow_value(item) for item in value]
+    if isinstance(value, dict):
+        return [(key, to_arrow_value(item)) for key, item in value.items()]
+    return value
+
+
+class TableWriter:
+    """
+    缓存至多 batch_size 行, 写满后作为一个 row group (或 record batch) 写入文件
+    """
+
+    def __init__(self, file: Path, schema: pa.Schema, format: ExportFormat, batch_size: int):
+        self.file = file
+        self.schema = schema
+        self.format = format
+        self.batch_size = batch_size
+        self.rows: list[dict] = []
+        self.writer: pq.ParquetWriter | pa.ipc.RecordBatchFileWriter | None = None
+        self.written = 0
+
+    def append(self, row: dict) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        batch = pa.RecordBatch.from_pylist(self.rows, schema=self.schema)
+        if self.writer is None:
+            self.file.parent.mkdir(parents=True, exist_ok=True)
+            if self.format == "parquet":
+                self.writer = pq.ParquetWriter(self.file, self.schema, compression="zstd")
+            else:
+                self.writer = pa.ipc.new_file(self.file, self.schema)
+        self.writer.write_batch(batch)
+        self.written += len(self.rows)
+        self.rows = []
+
+    def close(self) -> None:
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class FleetExporter:
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        modules: Sequence[str] = DEFAULT_MODULES,
+        module_config: dict | None = None,
+        snapshot: bool = True,
+        format: ExportFormat = "parquet",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        run_at: int | None = None,
+    ):
+        """
+        run_at: 本次导出的时间, 同时用作分区名与模块的 evaluation_clock, 缺省时为当前时间
+        """
+        from .modules import manifest
+
+        self.directory = directory
+        self.module_config = module_config or {}
+        self.snapshot = snapshot
+        self.format = format
+        self.batch_size = batch_size
+        self.run_at = TimeStamp(int(time.time()) if run_at is None else run_at)
+        self.partition = f"run={time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(self.run_at))}"
+
+        self.entries: dict[str, Callable] = {}
+        self.schemas: dict[str, pa.Schema] = {}
+        for module_name in modules:
+            spec = manifest[module_name]
+            if spec.is_async:
+                raise ValueError(f"async module {module_name!r} cannot be exported")
+            entry = spec.load()
+            self.entries[module_name] = entry
+            self.schemas[module_name] = schema_of(module_result_type(entry))
+        if snapshot:
+            self.schemas["operators"] = schema_of(OperatorRow)
+            self.schemas["depot"] = schema_of(DepotRow)
+
+        for table in self.schemas:
+            if (self.directory / table / self.partition).exists():
+                raise FileExistsError(f"partition {table}/{self.partition} already exists")
+        self.writers: dict[str, TableWriter] = {}
+
+    def writer(self, table: str) -> TableWriter:
+        if (writer := self.writers.get(table)) is None:
+            file = self.directory / table / self.partition / f"part-0{FILE_SUFFIXES[self.format]}"
+            writer = self.writers[table] = TableWriter(
+                file, self.schemas[table], self.format, self.batch_size
+            )
+        return writer
+
+    def write_row(self, table: str, name: str, uid: str, value: object) -> None:
+        self.writer(table).append(
+            {"name": name, "uid": uid, "run_at": self.run_at} | to_arrow_row(value)
+        )
+
+    def write_module(self, name: str, uid: str, module_name: str, value: object) -> None:
+        """
+        写入一个模块结果, 可用于 SklandFleet 等已经执行过模块的调用方. value 为 None 时不写入
+        """
+        if value is not None:
+            self.write_row(module_name, name, uid, value)
+
+    def write_snapshot(self, character_info: CharacterInfo) -> None:
+        name, uid = character_info.name, character_info.uid
+        operator_names = character_info.operator_name_mapping_with_fix
+        for entry in character_info.cultivate["characters"]:
+            self.write_row(
+                "operators",
+                name,
+                uid,
+                OperatorRow(
+                    char_id=entry["id"],
+                    operator=operator_names.get(entry["id"]),
+                    level=entry["level"],
+                    evolve=entry["evolvePhase"],
+                    mastery_levels=[skill["level"] for skill in entry["skills"]],
+                ),
+            )
+        for entry in character_info.cultivate["items"]:
+            self.write_row(
+                "depot",
+                name,
+                uid,
+                DepotRow(
+                    item_id=entry["id"],
+                    item=constants.ITEM_MAPPING.get(entry["id"]),
+                    count=entry["count"],
+                ),
+            )
+
+    def add(self, character_info: CharacterInfo) -> dict[str, Exception]:
+        """
+        执行所有模块并写入结果与角色数据, 返回执行失败的模块
+        """
+        from .models import evaluation_clock
+
+        errors = {}
+        with evaluation_clock(self.run_at):
+            for module_name, entry in self.entries.items():
+                try:
+                    value = entry(character_info, self.module_config.get(module_name))
+                except Exception as e:
+                    errors[module_name] = e
+                    continue
+                self.write_module(character_info.name, character_info.uid, module_name, value)
+        if self.snapshot:
+            self.write_snapshot(character_info)
+        return errors
+
+    def close(self) -> dict[str, int]:
+        """
+        返回每张表写入的行数
+        """
+        for writer in self.writers.values():
+            writer.close()
+        return {table: writer.written for table, writer in self.writers.items()}
+
+    def __enter__(self) -> FleetExporter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+__all__ = [
+    "DEFAULT_MODULES",
+    "DepotRow",
+    "FleetExporter",
+    "OperatorRow",
+    "arrow_type",
+    "schema_of",
+]
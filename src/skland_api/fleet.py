@@ -0,0 +1,172 @@
+"""
+面向大量账号的流式接口
+
+    fleet = SklandFleet({"账号A": AuthInfo(cred="..."), "账号B": AuthInfo(token="...")})
+    async for result in fleet.run(modules=["sanity", "recruit"]):
+        print(result.name, result.uid, result.values)
+
+同时处理的账号数有上限, 结果通过有界队列交给调用方: 调用方处理得慢时, 后续账号不会开始加载.
+每个角色的模块执行完后即不再持有其 CharacterInfo, 内存占用与账号总数无关.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+
+import httpx
+from loguru import logger
+
+from .api import SklandApi, SklandApiException
+from .breaker import CircuitOpenError
+from .instrumentation import current_account, phase, scope
+from .models import AuthInfo, CharacterInfoLoader
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_BUFFER_SIZE = 64
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class FleetResult:
+    """
+    一个角色的模块结果. 认证, 获取角色列表失败或出现未预期的异常时, uid 为 None 且 error 非空
+
+    values: 模块名 -> 返回值, 不包含执行失败的模块
+    errors: 模块名 -> 异常
+    """
+
+    name: str
+    uid: str | None
+    values: dict[str, object] = field(default_factory=dict)
+    errors: dict[str, Exception] = field(default_factory=dict)
+    error: Exception | None = None
+
+
+# 队列中表示一个 worker 已经结束
+_DONE = object()
+
+
+class SklandFleet:
+    """
+    accounts: 账号名 -> AuthInfo, 或者 (账号名, AuthInfo) 的可迭代对象 (可以是生成器, 按需读取).
+        认证成功后 AuthInfo 中的 token 与 cred 会被更新, 调用方可以在结束后保存
+    concurrency: 同时处理的账号数
+    buffer_size: 已完成但尚未被调用方取走的结果数的上限
+    transport: 所有账号共享的 transport (及其连接池), 缺省时创建新的 AsyncHTTPTransport
+    """
+
+    def __init__(
+        self,
+        accounts: Mapping[str, AuthInfo] | Iterable[tuple[str, AuthInfo]],
+        *,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be positive, got {concurrency}")
+        self.accounts = accounts.items() if isinstance(accounts, Mapping) else accounts
+        self.concurrency = concurrency
+        self.buffer_size = buffer_size
+        self.transport = transport
+
+    async def run(
+        self, modules: Sequence[str], *, module_config: Mapping[str, dict] | None = None
+    ) -> AsyncIterator[FleetResult]:
+        """
+        按完成顺序逐个返回每个角色的结果. 提前退出循环时, 尚未完成的账号会被取消
+        """
+        from .modules import registry
+
+        module_config = module_config or {}
+        entries = {name: registry[name] for name in modules}
+        owns_transport = self.transport is None
+        transport = self.transport or httpx.AsyncHTTPTransport()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.buffer_size)
+        accounts = iter(self.accounts)
+
+        async def worker() -> None:
+            # 被取消时不能再向可能已满的队列中放入 _DONE, 因此不使用 finally
+            try:
+                for name, auth_info in accounts:
+                    try:
+                        await self.run_account(
+                            name, auth_info, transport, entries, module_config, queue
+                        )
+                    except Exception as e:
+                        # 未预期的异常 (如 KeyError, TimeoutError) 只影响该账号
+                        logger.exception(f"User {name} failed: {e!r}")
+                        await queue.put(FleetResult(name=name, uid=None, error=e))
+            except Exception as e:
+                await queue.put(e)
+            else:
+                await queue.put(_DONE)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            running = len(workers)
+            while running:
+                item = await queue.get()
+                if item is _DONE:
+                    running -= 1
+                    continue
+                if isinstance(item, Exception):
+                    # 读取 accounts 时的异常
+                    raise item
+                yield item
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if owns_transport:
+                await transport.aclose()
+
+    @staticmethod
+    async def run_account(
+        name: str,
+        auth_info: AuthInfo,
+        transport: httpx.AsyncBaseTransport,
+        entries: Mapping,
+        module_config: Mapping[str, dict],
+        queue: asyncio.Queue,
+    ) -> None:
+        current_account.set(name)
+        try:
+            api = await auth_info.full_auth(SklandApi(transport, keep_alive=True))
+            characters = await api.binding_list()
+        except (ValueError, SklandApiException, httpx.HTTPError, CircuitOpenError) as e:
+            logger.error(f"User {name} failed: {e}")
+            await queue.put(FleetResult(name=name, uid=None, error=e))
+            return
+
+        for character in characters:
+            if character["gameName"] != "明日方舟":
+                continue
+            try:
+                character_info = await CharacterInfoLoader(name, api, character).full_load()
+            except (SklandApiException, httpx.HTTPError, CircuitOpenError) as e:
+                logger.error(f"Failed to load character info: {e}")
+                await queue.put(FleetResult(name=name, uid=character["uid"], error=e))
+                continue
+            result = FleetResult(name=name, uid=character_info.uid)
+            for module_name, entry in entries.items():
+                try:
+                    with (
+                        phase("module", module=module_name, cpu=False),
+                        scope(uid=character_info.uid, module=module_name),
+                    ):
+                        value = entry(character_info, module_config.get(module_name))
+                        if asyncio.iscoroutine(value):
+                            value = await value
+                except Exception as e:
+                    result.errors[module_name] = e
+                else:
+                    result.values[module_name] = value
+            # 结果中不引用 CharacterInfo, 此后该角色的原始数据即可被回收
+            del character_info
+            await queue.put(result)
+
+
+__all__ = [
+    "FleetResult",
+    "SklandFleet",
+]
@@ -0,0 +1,258 @@
+"""
+干员与专精的倒排索引
+
+为缓存目录中所有角色的 cultivate["characters"] 建立索引, 每个条件对应一个位图 (Python int, 第 i 位表示第 i 个角色):
+
+    char_id          拥有该干员
+    char_id/E{n}     精英化等级为 n
+    char_id/S{i}M{m} 第 i 个技能 (从 1 开始) 的专精等级为 m
+
+查询时对条件的位图取与, "至少 E2", "至少 M3" 等条件为若干位图的或. 索引保存在缓存目录中,
+只有 cultivate 数据发生变化的角色会被重新索引.
+"""
+
+import json
+import os
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Self
+
+from loguru import logger
+
+from .cached_rows import CachedRow, CachedRows, RefreshStats
+from .memo import digest
+from .models import constants
+
+INDEX_FILE = "operator-index.json"
+INDEX_VERSION = 1
+MAX_EVOLVE = 2
+MAX_MASTERY = 3
+MAX_SKILLS = 3
+
+# 银灰, 银灰:E2, 银灰:E2:S3M3, 银灰:M3 (任一技能), char_172_svrash:S2M1
+PREDICATE_PATTERN = re.compile(r"^(?P<operator>[^:]+)(?P<conditions>(?::[^:]+)*)$")
+CONDITION_PATTERN = re.compile(
+    r"^(?:E(?P<evolve>[0-2])|(?:S(?P<skill>[1-3]))?M(?P<mastery>[0-3]))$"
+)
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class OperatorPredicate:
+    """
+    evolve: 至少达到的精英化等级
+    skill: 技能序号 (从 1 开始), None 表示任一技能
+    mastery: 至少达到的专精等级
+    """
+
+    char_ids: tuple[str, ...]
+    evolve: int | None = None
+    skill: int | None = None
+    mastery: int | None = None
+
+
+class OperatorIndex:
+    def __init__(self):
+        # 文档编号 -> 角色, 删除后的编号留空并在之后复用
+        self.documents = CachedRows()
+        self.postings: dict[str, int] = {}
+        # char_id -> 显示名称, 来自各角色的 charInfoMap
+        self.names: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @staticmethod
+    def keys(characters: list[dict]) -> Iterator[str]:
+        for entry in characters:
+            char_id = entry["id"]
+            yield char_id
+            yield f"{char_id}/E{entry['evolvePhase']}"
+            for index, skill in enumerate(entry["skills"], start=1):
+                yield f"{char_id}/S{index}M{skill['level']}"
+
+    def clear(self, doc_id: int) -> None:
+        mask = 1 << doc_id
+        for key in [key for key, bits in self.postings.items() if bits & mask]:
+            if bits := self.postings[key] & ~mask:
+                self.postings[key] = bits
+            else:
+                del self.postings[key]
+
+    def remove(self, name: str, uid: str) -> bool:
+        if (doc_id := self.documents.remove(name, uid)) is None:
+            return False
+        self.clear(doc_id)
+        return True
+
+    def update(
+        self,
+        name: str,
+        uid: str,
+        cultivate: dict,
+        names: dict[str, str] | None = None,
+        mtime_ns: int | None = None,
+    ) -> bool:
+        """
+        cultivate 没有变化时只更新 mtime_ns, 返回是否重新索引
+        """
+        characters = cultivate["characters"]
+        indexed = (name, uid) in self.documents.ids
+        doc_id, changed = self.documents.stamp(name, uid, digest(characters), mtime_ns)
+        if not changed:
+            return False
+        if indexed:
+            self.clear(doc_id)
+        bit = 1 << doc_id
+        for key in self.keys(characters):
+            self.postings[key] = self.postings.get(key, 0) | bit
+        if names:
+            self.names.update(names)
+        return True
+
+    def resolve_operator(self, operator: str) -> tuple[str, ...]:
+        """
+        名称或 char_id -> char_id, 同名时返回所有 char_id
+        """
+        if operator in self.names or operator in self.postings:
+            return (operator,)
+        return tuple(char_id for char_id, name in self.names.items() if name == operator)
+
+    def parse(self, text: str) -> OperatorPredicate:
+        """
+        解析 "干员[:E<n>][:S<i>M<m> | :M<m>]", 格式错误或干员不存在时抛出 ValueError
+        """
+        if (match := PREDICATE_PATTERN.match(text.strip())) is None:
+            raise ValueError(f"invalid predicate: {text!r}")
+        operator = match["operator"]
+        if not (char_ids := self.resolve_operator(operator)):
+            raise ValueError(f"unknown operator: {operator!r}")
+        evolve = skill = mastery = None
+        for condition in filter(None, match["conditions"].split(":")):
+            if (condition_match := CONDITION_PATTERN.match(condition.upper())) is None:
+                raise ValueError(f"invalid condition {condition!r} in {text!r}")
+            if condition_match["evolve"] is not None:
+                evolve = int(condition_match["evolve"])
+            else:
+                skill = int(condition_match["skill"]) if condition_match["skill"] else None
+                mastery = int(condition_match["mastery"])
+        return OperatorPredicate(char_ids=char_ids, evolve=evolve, skill=skill, mastery=mastery)
+
+    def match(self, predicate: OperatorPredicate) -> int:
+        bits = 0
+        for char_id in predicate.char_ids:
+            operator_bits = self.postings.get(char_id, 0)
+            if predicate.evolve is not None:
+                operator_bits &= self.union(
+                    f"{char_id}/E{evolve}" for evolve in range(predicate.evolve, MAX_EVOLVE + 1)
+                )
+            if predicate.mastery is not None:
+                skills = (
+                    [predicate.skill] if predicate.skill is not None else range(1, MAX_SKILLS + 1)
+                )
+                operator_bits &= self.union(
+                    f"{char_id}/S{skill}M{mastery}"
+                    for skill in skills
+                    for mastery in range(predicate.mastery, MAX_MASTERY + 1)
+                )
+            bits |= operator_bits
+        return bits
+
+    def union(self, keys: Iterable[str]) -> int:
+        bits = 0
+        for key in keys:
+            bits |= self.postings.get(key, 0)
+        return bits
+
+    def query(self, predicates: Iterable[OperatorPredicate]) -> list[CachedRow]:
+        """
+        返回满足所有条件的角色, 按文档编号排序
+        """
+        bits = -1
+        for predicate in predicates:
+            bits &= self.match(predicate)
+        if bits == -1:
+            bits = sum(1 << doc_id for doc_id in self.documents.ids.values())
+        result = []
+        while bits:
+            low = bits & -bits
+            result.append(self.documents[low.bit_length() - 1])
+            bits ^= low
+        return result
+
+    def refresh(self, cache_path: Path, names: Iterable[str]) -> RefreshStats:
+        """
+        按 dump_to 写入的缓存文件更新索引. 修改时间未变的文件不读取,
+        不在 names 中或缓存文件已删除的角色从索引中移除
+        """
+
+        def update(name: str, uid: str, file: Path, mtime_ns: int) -> bool:
+            with file.open(encoding="utf-8") as fp:
+                cultivate = json.load(fp)
+            unknown = [
+                entry["id"] for entry in cultivate["characters"] if entry["id"] not in self.names
+            ]
+            # 只有出现了新干员时才读取 player_info 中的名称
+            names_update = (
+                self.read_names(cache_path / f"{name}-{uid}-player_info.json") if unknown else None
+            )
+            return self.update(name, uid, cultivate, names_update, mtime_ns)
+
+        return self.documents.refresh(cache_path, names, update, self.remove)
+
+    @staticmethod
+    def read_names(file: Path) -> dict[str, str]:
+        with file.open(encoding="utf-8") as fp:
+            player_info = json.load(fp)
+        names = {entry["id"]: entry["name"] for entry in player_info["charInfoMap"].values()}
+        return names | constants.OPERATOR_NAME_MAPPING_FIX
+
+    def to_dict(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "documents": self.documents.to_list(),
+            "postings": {key: format(bits, "x") for key, bits in self.postings.items()},
+            "names": self.names,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Self:
+        index = cls()
+        index.documents = CachedRows.from_list(data["documents"])
+        index.postings = {key: int(bits, 16) for key, bits in data["postings"].items()}
+        index.names = data["names"]
+        return index
+
+    @classmethod
+    def load(cls, file: Path) -> Self:
+        """
+        文件不存在, 损坏或版本不同时返回空索引
+        """
+        try:
+            with file.open(encoding="utf-8") as fp:
+                data = json.load(fp)
+            if data.get("version") != INDEX_VERSION:
+                raise ValueError(f"unsupported index version {data.get('version')!r}")
+            return cls.from_dict(data)
+        except FileNotFoundError:
+            return cls()
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring invalid operator index {file}: {e}")
+            return cls()
+
+    def save(self, file: Path) -> None:
+        temp = file.with_name(f".{file.name}.{os.getpid()}.tmp")
+        temp.write_text(
+            json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8",
+        )
+        temp.replace(file)
+
+
+__all__ = [
+    "INDEX_FILE",
+    "OperatorIndex",
+    "OperatorPredicate",
+    "RefreshStats",
+]
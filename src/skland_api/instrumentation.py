@@ -0,0 +1,308 @@
+"""
+埋点接口
+
+库中的关键位置 (请求, 认证, 模块, 各执行阶段) 会通知所有已安装的 Instrument.
+未安装任何 Instrument 时, 各埋点只做一次列表判空, 不产生额外开销.
+"""
+
+import hashlib
+import random
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Literal
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import httpx
+
+AuthTier = Literal["cred", "token", "password"]
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class SpanContext:
+    """
+    阶段的上下文, 子阶段据此确定所属的 trace 与父阶段. 外部的上下文 (如 traceparent) 的 depth 为 -1
+    """
+
+    trace_id: int
+    span_id: int
+    depth: int
+
+
+current_account: ContextVar[str | None] = ContextVar("current_account", default=None)
+current_context: ContextVar[SpanContext | None] = ContextVar("current_context", default=None)
+# 正在处理的角色与模块, 用作日志记录的结构化字段
+current_uid: ContextVar[str | None] = ContextVar("current_uid", default=None)
+current_module: ContextVar[str | None] = ContextVar("current_module", default=None)
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class PhaseEvent:
+    """
+    start: time.perf_counter() 的读数
+    cpu: 当前线程的 CPU 时间, 包含 await 的阶段会混入其他协程的开销, 因此不统计
+    depth: 嵌套深度, 最外层为 0
+    """
+
+    name: str
+    account: str | None
+    module: str | None
+    start: float
+    wall: float
+    cpu: float | None
+    depth: int
+    context: SpanContext
+    parent: SpanContext | None
+    attributes: dict
+    error: BaseException | None
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class RequestEvent:
+    """
+    status_code: HTTP 状态码, 传输层失败时为 None
+    error_code: SklandApiException 的错误码, 请求成功时为 None
+    parent: 发起请求时所在阶段的上下文
+    """
+
+    account: str | None
+    method: str
+    host: str
+    endpoint: str
+    start: float
+    wall: float
+    size: int
+    status_code: int | None
+    error_code: int | None
+    parent: SpanContext | None
+    error: BaseException | None
+
+
+class Instrument:
+    """
+    所有钩子默认不做任何事, 子类按需覆盖. 钩子在事件循环线程中同步调用, 应尽量轻量
+    """
+
+    def phase_finished(self, event: PhaseEvent) -> None:
+        pass
+
+    def request_finished(self, event: RequestEvent) -> None:
+        pass
+
+    def auth_attempted(self, tier: AuthTier, success: bool) -> None:
+        pass
+
+    def module_failed(self, module: str, account: str | None, error: BaseException) -> None:
+        pass
+
+
+instruments: list[Instrument] = []
+# 非空时结束的阶段暂存于此而不是立即分发, 用于在线程池中执行的阶段: 钩子只在事件循环线程中调用
+deferred_phases: ContextVar[list[PhaseEvent] | None] = ContextVar("deferred_phases", default=None)
+
+
+def install(instrument: Instrument) -> None:
+    if instrument not in instruments:
+        instruments.append(instrument)
+
+
+def uninstall(instrument: Instrument) -> None:
+    if instrument in instruments:
+        instruments.remove(instrument)
+
+
+class Phase:
+    __slots__ = (
+        "name",
+        "account",
+        "module",
+        "cpu",
+        "attributes",
+        "parent",
+        "context",
+        "token",
+        "start",
+        "cpu_start",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        account: str | None,
+        module: str | None,
+        cpu: bool,
+        attributes: dict | None,
+    ):
+        self.name = name
+        self.account = account
+        self.module = module
+        self.cpu = cpu
+        self.attributes = attributes or {}
+
+    def __enter__(self) -> None:
+        self.parent = parent = current_context.get()
+        self.context = SpanContext(
+            trace_id=parent.trace_id if parent is not None else random.getrandbits(128),
+            span_id=random.getrandbits(64),
+            depth=parent.depth + 1 if parent is not None and parent.depth >= 0 else 0,
+        )
+        self.token = current_context.set(self.context)
+        self.start = time.perf_counter()
+        self.cpu_start = time.thread_time() if self.cpu else 0
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        wall = time.perf_counter() - self.start
+        current_context.reset(self.token)
+        event = PhaseEvent(
+            name=self.name,
+            account=self.account if self.account is not None else current_account.get(),
+            module=self.module,
+            start=self.start,
+            wall=wall,
+            cpu=time.thread_time() - self.cpu_start if self.cpu else None,
+            depth=self.context.depth,
+            context=self.context,
+            parent=self.parent,
+            attributes=self.attributes,
+            error=exc,
+        )
+        if (deferred := deferred_phases.get()) is not None:
+            deferred.append(event)
+        else:
+            phase_finished(event)
+
+
+def phase(
+    name: str,
+    *,
+    account: str | None = None,
+    module: str | None = None,
+    cpu: bool = True,
+    attributes: dict | None = None,
+) -> AbstractContextManager[None]:
+    """
+    account 缺省时使用 current_account
+    """
+    if not instruments:
+        return nullcontext()
+    return Phase(name, account, module, cpu, attributes)
+
+
+class Scope:
+    __slots__ = ("values", "tokens")
+
+    def __init__(self, values: list[tuple[ContextVar, str]]):
+        self.values = values
+
+    def __enter__(self) -> None:
+        self.tokens = [var.set(value) for var, value in self.values]
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        for (var, _), token in zip(reversed(self.values), reversed(self.tokens)):
+            var.reset(token)
+
+
+def scope(
+    *, account: str | None = None, uid: str | None = None, module: str | None = None
+) -> Scope:
+    """
+    在其中设置 current_account, current_uid 与 current_module, 为 None 的参数保持原来的值
+    """
+    return Scope(
+        [
+            (var, value)
+            for var, value in (
+                (current_account, account),
+                (current_uid, uid),
+                (current_module, module),
+            )
+            if value is not None
+        ]
+    )
+
+
+@contextmanager
+def attach(context: SpanContext | None) -> Iterator[None]:
+    """
+    在给定的上下文中执行, 其中的阶段将成为 context 的子阶段
+    """
+    token = current_context.set(context)
+    try:
+        yield
+    finally:
+        current_context.reset(token)
+
+
+def account_hash(name: str) -> str:
+    """
+    账号名的摘要, 用于在导出的数据中区分账号而不泄露账号名
+    """
+    return hashlib.sha256(name.encode("utf-8")).hexdigest()[:12]
+
+
+def phase_finished(event: PhaseEvent) -> None:
+    for instrument in instruments:
+        instrument.phase_finished(event)
+
+
+def request_finished(
+    *,
+    method: str,
+    url: str,
+    start: float,
+    response: httpx.Response | None,
+    error_code: int | None,
+    error: BaseException | None,
+) -> None:
+    parts = urlsplit(url)
+    event = RequestEvent(
+        account=current_account.get(),
+        method=method,
+        host=parts.hostname or "",
+        endpoint=parts.path,
+        start=start,
+        wall=time.perf_counter() - start,
+        size=len(response.content) if response is not None else 0,
+        status_code=response.status_code if response is not None else None,
+        error_code=error_code,
+        parent=current_context.get(),
+        error=error,
+    )
+    for instrument in instruments:
+        instrument.request_finished(event)
+
+
+def auth_attempted(tier: AuthTier, success: bool) -> None:
+    for instrument in instruments:
+        instrument.auth_attempted(tier, success)
+
+
+def module_failed(module: str, account: str | None, error: BaseException) -> None:
+    for instrument in instruments:
+        instrument.module_failed(module, account, error)
+
+
+__all__ = [
+    "AuthTier",
+    "Instrument",
+    "PhaseEvent",
+    "RequestEvent",
+    "Scope",
+    "SpanContext",
+    "account_hash",
+    "attach",
+    "current_account",
+    "current_context",
+    "current_module",
+    "current_uid",
+    "deferred_phases",
+    "install",
+    "instruments",
+    "phase",
+    "phase_finished",
+    "scope",
+    "uninstall",
+]
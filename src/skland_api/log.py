@@ -0,0 +1,202 @@
+"""
+命令行使用的日志配置
+
+    shutdown = configure(log_file, LogPolicy(**config.get("log", {})))
+    ...
+    shutdown()
+
+日志文件经由队列在后台线程中写入, 记录日志的代码 (包括事件循环中的请求与模块) 不会因文件 I/O 而阻塞.
+每条记录带有 account, uid, module, endpoint 字段: 前三者取自 instrumentation 的上下文,
+endpoint 取自记录日志时正在处理的请求异常. 文件按大小或时间轮转, 轮转后的文件被压缩, 只保留最近的若干个.
+
+同一代码位置的警告与错误在前 sample_first 条之后每 sample_every 条只记录一条, 大量账号出现相同问题
+(如未配置排班表) 时日志不会被同一条消息淹没; shutdown 时汇总每个位置被省略的数量.
+"""
+
+import os
+import sys
+import threading
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, TextIO
+
+from loguru import logger
+
+from .instrumentation import current_account, current_module, current_uid
+
+if TYPE_CHECKING:
+    from loguru import Message, Record
+
+LogFormat = Literal["json", "text"]
+SAMPLED_LEVELS = frozenset({"WARNING", "ERROR"})
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class LogPolicy:
+    """
+    rotation_size: 文件超过该大小 (字节) 时轮转, 0 为不按大小轮转
+    rotation_interval: 每隔该时间 (秒, 按 UTC 对齐) 轮转, 0 为不按时间轮转
+    retention: 保留的轮转文件数
+    compression: 轮转文件的压缩格式 (如 gz, bz2, xz, zip), 为 None 时不压缩
+    format: json 为每行一个 JSON 记录, text 为 loguru 的默认文本格式
+    sample_first / sample_every: 同一代码位置的警告与错误在前 sample_first 条之后每 sample_every 条记录一条,
+        sample_every 为 1 时不采样
+    """
+
+    rotation_size: int = 10 * 1024 * 1024
+    rotation_interval: float = 86400
+    retention: int = 7
+    compression: str | None = "gz"
+    format: LogFormat = "json"
+    sample_first: int = 10
+    sample_every: int = 100
+
+    def __post_init__(self):
+        if self.rotation_size < 0 or self.rotation_interval < 0:
+            raise ValueError("rotation_size and rotation_interval must not be negative")
+        if self.retention < 1 or self.sample_first < 0 or self.sample_every < 1:
+            raise ValueError("retention and sample_every must be positive")
+        if self.format not in ("json", "text"):
+            raise ValueError(f"unsupported log format {self.format!r}")
+
+
+class Rotation:
+    """
+    loguru 的 rotation 函数, 只在写入日志的后台线程中调用
+    """
+
+    def __init__(self, size: int, interval: float):
+        self.size = size
+        self.interval = interval
+        self.period: int | None = None
+
+    def period_of(self, timestamp: float) -> int:
+        return int(timestamp // self.interval)
+
+    def __call__(self, message: Message, file: TextIO) -> bool:
+        if self.size and file.tell() + len(message.encode("utf-8")) > self.size:
+            self.period = None
+            return True
+        if not self.interval:
+            return False
+        period = self.period_of(message.record["time"].timestamp())
+        if self.period is None:
+            # 已有的文件以最后一次写入的时间为准, 跨越多次运行的文件也会按时轮转
+            if file.tell() == 0:
+                self.period = period
+            else:
+                self.period = self.period_of(os.fstat(file.fileno()).st_mtime)
+        if period != self.period:
+            self.period = period
+            return True
+        return False
+
+
+class Sampler:
+    def __init__(self, first: int, every: int):
+        self.first = first
+        self.every = every
+        self.counts: Counter[tuple[str, int]] = Counter()
+        self.lock = threading.Lock()
+
+    def keep(self, record: Record) -> bool:
+        """
+        计数并判断是否记录, 带有异常信息的记录总是保留
+        """
+        if record["level"].name not in SAMPLED_LEVELS or record["exception"] is not None:
+            return True
+        key = record["file"].path, record["line"]
+        with self.lock:
+            self.counts[key] += 1
+            count = self.counts[key]
+        if count > self.first:
+            record["extra"]["occurrences"] = count
+        return count <= self.first or (count - self.first) % self.every == 0
+
+    def dropped(self) -> dict[tuple[str, int], int]:
+        """
+        代码位置 -> 被省略的记录数
+        """
+        with self.lock:
+            counts = dict(self.counts)
+        return {
+            key: count - self.first - (count - self.first) // self.every
+            for key, count in counts.items()
+            if count > self.first
+        }
+
+
+def endpoint_of(error: BaseException | None) -> str | None:
+    # 大多数记录不在处理异常时产生, 此时不导入 api (以及 httpx)
+    if error is None:
+        return None
+    from .api import SklandApiException
+    from .breaker import CircuitOpenError
+
+    if isinstance(error, CircuitOpenError):
+        return f"{error.host}{error.endpoint}"
+    if isinstance(error, SklandApiException):
+        url = error.response.request.url
+        return f"{url.host}{url.path}"
+    # 没有导入 httpx 时不可能出现其异常, 不为此导入 httpx
+    if (httpx := sys.modules.get("httpx")) is not None and isinstance(error, httpx.RequestError):
+        try:
+            url = error.request.url
+        except RuntimeError:
+            return None
+        return f"{url.host}{url.path}"
+    return None
+
+
+def patcher(sampler: Sampler) -> Callable[[Record], None]:
+    def patch(record: Record) -> None:
+        # 在调用日志的线程中执行, 因此可以读取调用方的上下文与正在处理的异常
+        extra = record["extra"]
+        extra.setdefault("account", current_account.get())
+        extra.setdefault("uid", current_uid.get())
+        extra.setdefault("module", current_module.get())
+        extra.setdefault("endpoint", endpoint_of(sys.exc_info()[1]))
+        if not sampler.keep(record):
+            extra["sampled_out"] = True
+
+    return patch
+
+
+def is_kept(record: Record) -> bool:
+    return "sampled_out" not in record["extra"]
+
+
+def configure(log_file: Path, policy: LogPolicy = LogPolicy()) -> Callable[[], None]:
+    """
+    替换 loguru 的所有 handler: 标准错误仍同步输出, 日志文件经由队列写入.
+    返回的函数输出采样的汇总并等待队列中的记录写入完成
+    """
+    sampler = Sampler(policy.sample_first, policy.sample_every)
+    logger.remove()
+    logger.configure(patcher=patcher(sampler))
+    logger.add(sys.stderr, filter=is_kept)
+    logger.add(
+        log_file,
+        filter=is_kept,
+        enqueue=True,
+        serialize=policy.format == "json",
+        rotation=Rotation(policy.rotation_size, policy.rotation_interval),
+        retention=policy.retention,
+        compression=policy.compression,
+        encoding="utf-8",
+    )
+
+    def shutdown() -> None:
+        for (path, line), count in sampler.dropped().items():
+            logger.info(f"{count} similar records from {path}:{line} were sampled out")
+        logger.complete()
+
+    return shutdown
+
+
+__all__ = [
+    "LogPolicy",
+    "configure",
+]
@@ -0,0 +1,192 @@
+"""
+模块结果的记忆化
+
+模块通过 reads 声明只读取 CharacterInfo 中的哪些子树:
+
+    @reads("player_info.status.ap", clock=True, stages=(prepare, project))
+    def main(character_info: CharacterInfo, config: dict | None) -> SanityStatus:
+        return project(prepare(character_info, config))
+
+ModuleMemo 以 (模块名, 这些子树的哈希, config) 为键缓存模块结果. 数据没有变化的角色 (如 dashboard --watch
+的后续轮次) 不再重新计算. 与时间有关的模块 (clock=True) 通过 stages 拆分为与时间无关的 prepare 与按当前时间推算的
+project, 只缓存 prepare 的结果, 命中时只执行 project; 没有拆分的模块以 evaluation_clock 固定的当前时间作为键的一部分.
+读取外部文件的模块通过 files 声明文件, 文件的修改时间与大小也作为键的一部分. 没有声明的模块不会被缓存.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .models import CharacterInfo
+
+DEFAULT_MAX_ENTRIES = 4096
+# 声明的输入保存在入口函数的该属性上
+INPUTS_ATTRIBUTE = "__skland_inputs__"
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class ModuleInputs:
+    """
+    paths: 以 "." 分隔的路径, 第一段为 CharacterInfo 的属性 (player_info, cultivate, name, uid)
+    clock: 结果是否依赖当前时间
+    stages: (prepare, project), prepare(character_info, config) 计算与时间无关的部分,
+        project(prepared) 按当前时间推算出与 main 相同的结果
+    files: (character_info, config) -> 模块读取的文件路径
+    """
+
+    paths: tuple[str, ...]
+    clock: bool = False
+    stages: tuple[Callable[[CharacterInfo, Any], Any], Callable[[Any], Any]] | None = None
+    files: Callable[[CharacterInfo, Any], Iterable[str | Path]] | None = None
+
+
+def reads[F: Callable](
+    *paths: str,
+    clock: bool = False,
+    stages: tuple[Callable[[CharacterInfo, Any], Any], Callable[[Any], Any]] | None = None,
+    files: Callable[[CharacterInfo, Any], Iterable[str | Path]] | None = None,
+) -> Callable[[F], F]:
+    inputs = ModuleInputs(paths=paths, clock=clock, stages=stages, files=files)
+
+    def decorator(func: F) -> F:
+        setattr(func, INPUTS_ATTRIBUTE, inputs)
+        return func
+
+    return decorator
+
+
+def declared_inputs(entry: Callable) -> ModuleInputs | None:
+    return getattr(entry, INPUTS_ATTRIBUTE, None)
+
+
+def digest(value: object) -> str:
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def subtree(character_info: CharacterInfo, path: str) -> object:
+    attribute, *keys = path.split(".")
+    node = getattr(character_info, attribute)
+    for key in keys:
+        node = node.get(key) if isinstance(node, dict) else None
+    return node
+
+
+def file_stamp(path: str | Path) -> tuple[str, int, int] | None:
+    """
+    文件不存在时为 None
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return str(path), stat.st_mtime_ns, stat.st_size
+
+
+@dataclass(kw_only=True, slots=True)
+class MemoStats:
+    hits: int = 0
+    misses: int = 0
+    # 没有声明输入而直接执行的次数
+    bypassed: int = 0
+
+
+class ModuleMemo:
+    """
+    进程内的 LRU 缓存, 可以在多个线程中同时使用.
+
+    子树的哈希按 (账号, uid, 路径) 保留到下一轮: 新一轮的子树与上一轮相等时直接复用哈希,
+    比较比重新序列化 charInfoMap, cultivate.characters 等大的子树快得多
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[tuple, object] = OrderedDict()
+        # (账号, uid, 路径) -> (子树, 哈希)
+        self.digests: dict[tuple[str, str, str], tuple[object, str]] = {}
+        self.lock = threading.Lock()
+        self.stats = MemoStats()
+
+    def subtree_digest(self, character_info: CharacterInfo, path: str) -> str:
+        """
+        同一个 CharacterInfo 的同一子树只计算一次哈希, 结果保存在实例的 __dict__ 中
+        """
+        digests = character_info.__dict__.setdefault("_subtree_digests", {})
+        if (value := digests.get(path)) is not None:
+            return value
+        node = subtree(character_info, path)
+        key = (character_info.name, character_info.uid, path)
+        with self.lock:
+            previous = self.digests.get(key)
+        if previous is not None and previous[0] == node:
+            value = previous[1]
+        else:
+            value = digest(node)
+            with self.lock:
+                self.digests[key] = (node, value)
+        digests[path] = value
+        return value
+
+    def key(
+        self, module_name: str, inputs: ModuleInputs, character_info: CharacterInfo, config: object
+    ) -> tuple:
+        from .models import TimeStamp
+
+        return (
+            module_name,
+            tuple(self.subtree_digest(character_info, path) for path in inputs.paths),
+            digest(config),
+            tuple(file_stamp(path) for path in inputs.files(character_info, config))
+            if inputs.files is not None
+            else (),
+            TimeStamp.now() if inputs.clock and inputs.stages is None else None,
+        )
+
+    def call(
+        self, module_name: str, entry: Callable, character_info: CharacterInfo, config: object
+    ) -> object:
+        if (inputs := declared_inputs(entry)) is None:
+            self.stats.bypassed += 1
+            return entry(character_info, config)
+        if inputs.stages is not None:
+            prepare, project = inputs.stages
+            return project(self.lookup(module_name, inputs, prepare, character_info, config))
+        return self.lookup(module_name, inputs, entry, character_info, config)
+
+    def lookup(
+        self,
+        module_name: str,
+        inputs: ModuleInputs,
+        func: Callable,
+        character_info: CharacterInfo,
+        config: object,
+    ) -> object:
+        key = self.key(module_name, inputs, character_info, config)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.stats.hits += 1
+                return self.entries[key]
+            self.stats.misses += 1
+        value = func(character_info, config)
+        with self.lock:
+            self.entries[key] = value
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+
+__all__ = [
+    "MemoStats",
+    "ModuleInputs",
+    "ModuleMemo",
+    "declared_inputs",
+    "reads",
+]
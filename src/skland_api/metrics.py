@@ -0,0 +1,224 @@
+import asyncio
+import os
+from bisect import bisect_left
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from .instrumentation import AuthTier, Instrument, PhaseEvent, RequestEvent, install, instruments
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    labels = [f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    if not labels:
+        return ""
+    return "{" + ",".join(labels) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.values.items():
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [每个桶的计数 (非累积, 最后一个为 +Inf)..., 总和]
+        self.series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if (series := self.series.get(labels)) is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                le = f'le="{format_value(bound)}"'
+                yield f"{self.name}_bucket{format_labels(self.labelnames, labels, le)} {format_value(cumulative)}"
+            yield f"{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(series[-1])}"
+            yield f"{self.name}_count{format_labels(self.labelnames, labels)} {format_value(cumulative)}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.metrics: dict[str, Counter | Histogram] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        metric = self.metrics[name] = Counter(name, documentation, labelnames)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        metric = self.metrics[name] = Histogram(name, documentation, labelnames, buckets)
+        return metric
+
+    def render(self) -> str:
+        """
+        Prometheus 文本格式 (text/plain; version=0.0.4)
+        """
+        return "".join(f"{line}\n" for metric in self.metrics.values() for line in metric.collect())
+
+    def write_to(self, file: Path) -> None:
+        """
+        先写入临时文件再替换, 以便 node_exporter 的 textfile collector 不会读到写了一半的文件
+        """
+        temp = file.with_name(f".{file.name}.{os.getpid()}.tmp")
+        temp.write_text(self.render(), encoding="utf-8")
+        temp.replace(file)
+
+    async def serve(self, host: str, port: int) -> asyncio.Server:
+        from ._httpd import HttpRequest, HttpResponse, serve_http
+
+        async def handler(request: HttpRequest) -> HttpResponse:
+            if request.path != "/metrics":
+                return HttpResponse(status=404)
+            return HttpResponse.from_text(self.render(), content_type="text/plain; version=0.0.4")
+
+        return await serve_http(handler, host, port)
+
+    @asynccontextmanager
+    async def serving(self, host: str, port: int) -> AsyncIterator[str]:
+        """
+        在上下文中提供 /metrics, 返回其 url. port 为 0 时使用随机端口
+        """
+        from loguru import logger
+
+        server = await self.serve(host, port)
+        host, port = server.sockets[0].getsockname()[:2]
+        url = f"http://{host}:{port}/metrics"
+        logger.info(f"serving metrics on {url}")
+        try:
+            yield url
+        finally:
+            server.close()
+            server.close_clients()
+            await server.wait_closed()
+
+
+class MetricsInstrument(Instrument):
+    def __init__(self, registry: MetricsRegistry | None = None):
+        self.registry = registry = registry or MetricsRegistry()
+        self.request_duration = registry.histogram(
+            "skland_request_duration_seconds",
+            "Latency of Skland API requests.",
+            ("host", "endpoint", "method"),
+        )
+        self.response_size = registry.histogram(
+            "skland_response_size_bytes",
+            "Size of decoded Skland API response bodies.",
+            ("host", "endpoint"),
+            SIZE_BUCKETS,
+        )
+        self.api_errors = registry.counter(
+            "skland_api_errors_total",
+            "SklandApiException raised by endpoint and error code.",
+            ("host", "endpoint", "code"),
+        )
+        self.transport_errors = registry.counter(
+            "skland_transport_errors_total",
+            "Requests that failed before a response was received.",
+            ("host", "endpoint", "error"),
+        )
+        self.auth_attempts = registry.counter(
+            "skland_auth_attempts_total",
+            "Authentication attempts by fallback tier and result.",
+            ("tier", "result"),
+        )
+        self.module_failures = registry.counter(
+            "skland_module_failures_total",
+            "Module executions that raised an exception.",
+            ("module", "error"),
+        )
+        self.phase_duration = registry.histogram(
+            "skland_phase_duration_seconds",
+            "Wall time of pipeline phases.",
+            ("phase",),
+        )
+
+    def request_finished(self, event: RequestEvent) -> None:
+        self.request_duration.observe(event.wall, event.host, event.endpoint, event.method)
+        if event.status_code is not None:
+            self.response_size.observe(event.size, event.host, event.endpoint)
+        if event.error_code is not None:
+            self.api_errors.inc(event.host, event.endpoint, str(event.error_code))
+        elif event.error is not None:
+            self.transport_errors.inc(event.host, event.endpoint, type(event.error).__name__)
+
+    def auth_attempted(self, tier: AuthTier, success: bool) -> None:
+        self.auth_attempts.inc(tier, "success" if success else "failure")
+
+    def module_failed(self, module: str, account: str | None, error: BaseException) -> None:
+        self.module_failures.inc(module, type(error).__name__)
+
+    def phase_finished(self, event: PhaseEvent) -> None:
+        self.phase_duration.observe(event.wall, event.name)
+
+
+def install_metrics() -> MetricsInstrument:
+    """
+    返回已安装的 MetricsInstrument, 没有时安装一个新的
+    """
+    for instrument in instruments:
+        if isinstance(instrument, MetricsInstrument):
+            return instrument
+    instrument = MetricsInstrument()
+    install(instrument)
+    return instrument
+
+
+__all__ = [
+    "Counter",
+    "Histogram",
+    "MetricsInstrument",
+    "MetricsRegistry",
+    "install_metrics",
+]
@@ -1,6 +1,8 @@
 from .auth import AuthInfo
+from .building import InfrastPresence, TrainingState
 from .character import CharacterInfo, CharacterInfoLoader
-from .components import Capacity, Duration, Progress, TimeStamp
+from .components import Capacity, Duration, Progress, TimeStamp, evaluation_clock
+from .status import PlayerStatus
 
 __all__ = [
     "AuthInfo",
@@ -8,6 +10,10 @@ __all__ = [
     "CharacterInfoLoader",
     "Capacity",
     "Duration",
+    "InfrastPresence",
+    "PlayerStatus",
     "Progress",
     "TimeStamp",
+    "TrainingState",
+    "evaluation_clock",
 ]
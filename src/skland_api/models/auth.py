@@ -2,7 +2,9 @@ from dataclasses import asdict, dataclass
 
 from loguru import logger
 
+from skland_api import instrumentation
 from skland_api.api import SklandApi, SklandApiException
+from skland_api.instrumentation import phase
 
 
 @dataclass(kw_only=True, slots=True)
@@ -32,28 +34,41 @@ class AuthInfo:
     def to_dict(self) -> dict:
         return asdict(self)
 
-    async def full_auth(self) -> SklandApi:
-        api = SklandApi()
+    async def full_auth(self, api: SklandApi | None = None) -> SklandApi:
+        """
+        api 缺省时创建新的 SklandApi, 可传入使用自定义 transport 的实例
+        """
+        if api is None:
+            api = SklandApi()
         if self.cred is not None:
             try:
-                await api.set_cred(self.cred)
+                with phase("auth_attempt", cpu=False, attributes={"auth.tier": "cred"}):
+                    await api.set_cred(self.cred)
+                instrumentation.auth_attempted("cred", True)
                 return api
             except SklandApiException:
+                instrumentation.auth_attempted("cred", False)
                 logger.warning("failed to get auth from cred")
 
         if self.token is not None:
             try:
-                self.cred = await api.cred_from_token(self.token)
+                with phase("auth_attempt", cpu=False, attributes={"auth.tier": "token"}):
+                    self.cred = await api.cred_from_token(self.token)
+                instrumentation.auth_attempted("token", True)
                 return api
             except SklandApiException:
+                instrumentation.auth_attempted("token", False)
                 logger.warning("failed to get auth from token")
 
         if self.phone is not None and self.password is not None:
             try:
-                self.token = await api.token_from_phone_password(self.phone, self.password)
-                self.cred = await api.cred_from_token(self.token)
+                with phase("auth_attempt", cpu=False, attributes={"auth.tier": "password"}):
+                    self.token = await api.token_from_phone_password(self.phone, self.password)
+                    self.cred = await api.cred_from_token(self.token)
+                instrumentation.auth_attempted("password", True)
                 return api
             except SklandApiException as e:
+                instrumentation.auth_attempted("password", False)
                 logger.error(f"failed to get auth from phone and password: {e}")
 
         raise ValueError("all provided information failed to auth")
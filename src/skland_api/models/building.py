@@ -0,0 +1,129 @@
+from collections import UserList
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Self
+
+from .character import CharacterInfo
+from .components import TimeStamp
+
+MORALE_DIVIDOR = 360000
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class StationedOperatorInfo:
+    name: str
+    morale: float
+
+    @classmethod
+    def from_skland_data(cls, data: dict, name_mapping: dict[str, str]) -> Self:
+        return cls(
+            name=name_mapping[data["charId"]],
+            morale=data["ap"] / MORALE_DIVIDOR,
+        )
+
+
+class FacilityPresence(UserList[StationedOperatorInfo]):
+    @classmethod
+    def from_skland_data(cls, data: dict, name_mapping: dict[str, str]) -> Self:
+        return cls(
+            [StationedOperatorInfo.from_skland_data(char, name_mapping) for char in data["chars"]]
+        )
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class InfrastPresence:
+    control: FacilityPresence
+    powers: list[FacilityPresence]
+    tradings: list[FacilityPresence]
+    manufactures: list[FacilityPresence]
+    hire: FacilityPresence
+    meeting: FacilityPresence
+    dormitories: list[FacilityPresence]
+
+    def __iter__(self) -> Iterator[StationedOperatorInfo]:
+        yield from self.control
+        for power in self.powers:
+            yield from power
+        for trading in self.tradings:
+            yield from trading
+        for manufacture in self.manufactures:
+            yield from manufacture
+        yield from self.hire
+        yield from self.meeting
+        for dormitory in self.dormitories:
+            yield from dormitory
+
+    @classmethod
+    def from_character_info(cls, character_info: CharacterInfo) -> Self:
+        data = character_info.player_info["building"]
+        name_mapping = character_info.operator_name_mapping
+        return cls(
+            control=FacilityPresence.from_skland_data(data["control"], name_mapping),
+            powers=[
+                FacilityPresence.from_skland_data(power, name_mapping) for power in data["powers"]
+            ],
+            tradings=[
+                FacilityPresence.from_skland_data(trading, name_mapping)
+                for trading in data["tradings"]
+            ],
+            manufactures=[
+                FacilityPresence.from_skland_data(manufacture, name_mapping)
+                for manufacture in data["manufactures"]
+            ],
+            hire=FacilityPresence.from_skland_data(data["hire"], name_mapping),
+            meeting=FacilityPresence.from_skland_data(data["meeting"], name_mapping),
+            dormitories=[
+                FacilityPresence.from_skland_data(dormitory, name_mapping)
+                for dormitory in data["dormitories"]
+            ],
+        )
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class TrainingState:
+    """
+    训练室中进行中的专精
+
+    remain_point: updated_at 时的剩余专精点数
+    remain_seconds: 按请求时间计算的剩余时间 (与无人机的 remainSecs 不同)
+    """
+
+    trainee_name: str
+    skill_id: int
+    skill_mastery_level: int
+    trainer_name: str | None
+    speed: float
+    remain_point: int
+    remain_seconds: int
+    updated_at: TimeStamp
+
+    @classmethod
+    def from_character_info(cls, character_info: CharacterInfo, updated_at: int) -> Self | None:
+        data = character_info.player_info["building"]["training"]
+        trainee = data["trainee"]
+        if trainee is None or trainee["targetSkill"] == -1:
+            return None
+        trainer = data["trainer"]
+        skill_id = trainee["targetSkill"]
+        return cls(
+            trainee_name=character_info.operator_name_mapping_with_fix[trainee["charId"]],
+            skill_id=skill_id,
+            skill_mastery_level=character_info.operators[trainee["charId"]].mastery_levels[
+                skill_id
+            ],
+            trainer_name=(
+                None if trainer is None else character_info.operator_name_mapping[trainer["charId"]]
+            ),
+            speed=data["speed"],
+            remain_point=data["remainPoint"],
+            remain_seconds=data["remainSecs"],
+            updated_at=TimeStamp(updated_at),
+        )
+
+
+__all__ = [
+    "FacilityPresence",
+    "InfrastPresence",
+    "StationedOperatorInfo",
+    "TrainingState",
+]
@@ -1,10 +1,14 @@
 import asyncio
+import glob
 import json
+import threading
+from collections.abc import Callable
 from dataclasses import dataclass
-from functools import cached_property
 from pathlib import Path
+from typing import Any, Self, overload
 
 from skland_api.api import SklandApi
+from skland_api.instrumentation import phase, scope
 
 from . import constants
 
@@ -20,30 +24,69 @@ class OperatorInfo:
     mastery_levels: list[int]
 
 
-# Cannot use frozen=True and slots=True because of cached_property
+class locked_cached_property[T]:
+    """
+    与 functools.cached_property 相同, 但多个线程同时首次访问同一实例的属性时只计算一次.
+    计算完成后值保存在实例的 __dict__ 中, 之后的访问不经过该描述符, 也不加锁
+    """
+
+    def __init__(self, func: Callable[[Any], T]):
+        self.func = func
+        self.attrname: str | None = None
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.attrname = name
+
+    @overload
+    def __get__(self, instance: None, owner: type | None = None) -> Self: ...
+
+    @overload
+    def __get__(self, instance: object, owner: type | None = None) -> T: ...
+
+    def __get__(self, instance: object, owner: type | None = None) -> Self | T:
+        if instance is None:
+            return self
+        if (name := self.attrname) is None:
+            raise TypeError("locked_cached_property is used without calling __set_name__")
+        cache = instance.__dict__
+        # dict.setdefault 是原子操作, 保证每个实例的每个属性只有一把锁
+        locks = cache.setdefault("_property_locks", {})
+        with locks.setdefault(name, threading.Lock()):
+            if name in cache:
+                return cache[name]
+            value = cache[name] = self.func(instance)
+            return value
+
+
+# Cannot use frozen=True and slots=True because of locked_cached_property
 @dataclass(kw_only=True)
 class CharacterInfo:
+    """
+    api: 离线读取的数据 (load_from, 快照, 基准测试的合成数据) 为 None, 只有需要请求的异步模块使用
+    """
+
     name: str
-    api: SklandApi
+    api: SklandApi | None
     uid: str
     cultivate: dict
     player_info: dict
 
-    @cached_property
+    @locked_cached_property
     def operator_name_mapping(self) -> dict[str, str]:
         """
         char_id -> display_name
         """
         return {entry["id"]: entry["name"] for entry in self.player_info["charInfoMap"].values()}
 
-    @cached_property
+    @locked_cached_property
     def operator_name_mapping_with_fix(self) -> dict[str, str]:
         """
         char_id -> display_name
         """
         return self.operator_name_mapping | constants.OPERATOR_NAME_MAPPING_FIX
 
-    @cached_property
+    @locked_cached_property
     def operators(self) -> dict[str, OperatorInfo]:
         """
         char_id -> OperatorInfo
@@ -56,7 +99,7 @@ class CharacterInfo:
             for entry in self.cultivate["characters"]
         }
 
-    @cached_property
+    @locked_cached_property
     def depot(self) -> dict[str, int]:
         """
         display_name -> count
@@ -67,6 +110,39 @@ class CharacterInfo:
             if entry["id"] in constants.ITEM_MAPPING
         }
 
+    def view(self, name: str) -> Any:
+        """
+        返回 skland_api.views 中注册的视图, 每个视图只计算一次
+        """
+        from skland_api.views import get_view
+
+        return get_view(self, name)
+
+    @classmethod
+    def load_from(cls, cache_path: Path, name: str, uid: str, api: SklandApi | None = None) -> Self:
+        """
+        读取 dump_to 写入的数据, 不需要 api 的模块可以在离线时使用
+        """
+        file = cache_path / f"{name}-{uid}-player_info.json"
+        with file.open(encoding="utf-8") as fp:
+            player_info = json.load(fp)
+        file = cache_path / f"{name}-{uid}-cultivate.json"
+        with file.open(encoding="utf-8") as fp:
+            cultivate = json.load(fp)
+        return cls(name=name, api=api, uid=uid, cultivate=cultivate, player_info=player_info)
+
+    @staticmethod
+    def cached_uids(cache_path: Path, name: str) -> list[str]:
+        """
+        返回 dump_to 为该账号写入过完整数据的角色 uid
+        """
+        uids = []
+        for file in sorted(cache_path.glob(f"{glob.escape(name)}-*-player_info.json")):
+            uid = file.name.removeprefix(f"{name}-").removesuffix("-player_info.json")
+            if "-" not in uid and (cache_path / f"{name}-{uid}-cultivate.json").exists():
+                uids.append(uid)
+        return uids
+
     def dump_to(self, cache_path: Path) -> None:
         file = cache_path / f"{self.name}-{self.uid}-player_info.json"
         with file.open(mode="w", encoding="utf-8") as fp:
@@ -103,10 +179,11 @@ class CharacterInfoLoader:
         )
 
     async def full_load(self) -> CharacterInfo:
-        cultivate, player_info = await asyncio.gather(
-            self.api.cultivate(self.uid),
-            self.api.player_info(self.uid),
-        )
+        with phase("load_character", cpu=False, attributes={"uid": self.uid}), scope(uid=self.uid):
+            cultivate, player_info = await asyncio.gather(
+                self.api.cultivate(self.uid),
+                self.api.player_info(self.uid),
+            )
         return CharacterInfo(
             name=self.name,
             api=self.api,
@@ -1,7 +1,13 @@
 import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
 from typing import Self
 
+# 设置后 TimeStamp.now() 返回该值, 使同一次运行中所有模块与渲染使用相同的 "当前时间"
+evaluation_time: ContextVar[int | None] = ContextVar("evaluation_time", default=None)
+
 
 @dataclass(frozen=True, slots=True)
 class Capacity:
@@ -40,4 +46,19 @@ class TimeStamp(int):
 
     @classmethod
     def now(cls) -> Self:
+        if (timestamp := evaluation_time.get()) is not None:
+            return cls(timestamp)
         return cls(int(time.time()))
+
+
+@contextmanager
+def evaluation_clock(timestamp: int | None = None) -> Iterator[TimeStamp]:
+    """
+    在其中固定 TimeStamp.now() 的返回值, timestamp 缺省时为进入时的时间
+    """
+    now = TimeStamp(int(time.time()) if timestamp is None else timestamp)
+    token = evaluation_time.set(now)
+    try:
+        yield now
+    finally:
+        evaluation_time.reset(token)
@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+from typing import Self
+
+from .character import CharacterInfo
+from .components import TimeStamp
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class ApStatus:
+    """
+    current: last_add_at 时的理智
+    """
+
+    current: int
+    total: int
+    last_add_at: TimeStamp
+    full_at: TimeStamp
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class PlayerStatus:
+    """
+    store_at: 森空岛最后一次同步游戏数据的时间, 其他数据均为该时刻的状态
+    """
+
+    name: str
+    store_at: TimeStamp
+    last_online_at: TimeStamp
+    ap: ApStatus
+
+    @classmethod
+    def from_character_info(cls, character_info: CharacterInfo) -> Self:
+        data = character_info.player_info["status"]
+        ap = data["ap"]
+        return cls(
+            name=data["name"],
+            store_at=TimeStamp(data["storeTs"]),
+            last_online_at=TimeStamp(data["lastOnlineTs"]),
+            ap=ApStatus(
+                current=ap["current"],
+                total=ap["max"],
+                last_add_at=TimeStamp(ap["lastApAddTime"]),
+                full_at=TimeStamp(ap["completeRecoveryTime"]),
+            ),
+        )
+
+
+__all__ = [
+    "ApStatus",
+    "PlayerStatus",
+]
@@ -1,32 +1,166 @@
 import importlib
-import pkgutil
+from collections.abc import Callable, Iterator, Mapping
+from dataclasses import dataclass
+from functools import cached_property
 
 from loguru import logger
 
-_registry: dict = {}
+ENTRY_POINT_GROUP = "skland_api.modules"
 
 
-def _load_registry() -> dict:
-    if _registry:
-        return _registry
-    for _, name, ispkg in pkgutil.iter_modules(__path__):
+@dataclass(frozen=True, kw_only=True, slots=True)
+class ModuleSpec:
+    """
+    name: 模块名
+    entry: 入口点, 格式为 "package.module:attr"
+    is_async: 入口点是否为协程函数, 插件模块在导入前未知
+    distribution: 提供插件模块的发行包, 内置模块为 None
+    """
+
+    name: str
+    entry: str
+    is_async: bool | None
+    distribution: str | None = None
+
+    @property
+    def is_plugin(self) -> bool:
+        return self.distribution is not None
+
+    def load(self) -> Callable:
+        module_path, _, attr = self.entry.partition(":")
+        return getattr(importlib.import_module(module_path), attr)
+
+
+class ModuleRegistry(Mapping[str, Callable]):
+    """
+    name -> entry
+
+    只在首次访问某个模块时才导入该模块
+    """
+
+    def __init__(self, specs: Mapping[str, ModuleSpec]):
+        self.specs = specs
+        self.loaded: dict[str, Callable] = {}
+
+    def __getitem__(self, name: str) -> Callable:
+        if (entry := self.loaded.get(name)) is not None:
+            return entry
+        entry = self.loaded[name] = self.specs[name].load()
+        return entry
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.specs)
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+
+class ModuleManifest(Mapping[str, ModuleSpec]):
+    """
+    name -> ModuleSpec
+
+    内置模块来自生成的清单; 插件模块通过 entry points 注册, 只读取元数据而不导入插件.
+    扫描 entry points 的开销较大, 因此仅在查找非内置模块或遍历全部模块时才进行
+    """
+
+    def __init__(self, builtins: dict[str, ModuleSpec]):
+        self.builtins = builtins
+
+    @cached_property
+    def plugins(self) -> dict[str, ModuleSpec]:
+        from importlib.metadata import entry_points
+
+        plugins = {}
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            if entry_point.name in self.builtins or entry_point.name in plugins:
+                logger.warning(f"plugin module {entry_point.name!r} is shadowed, ignored")
+                continue
+            plugins[entry_point.name] = ModuleSpec(
+                name=entry_point.name,
+                entry=entry_point.value,
+                is_async=None,
+                distribution=entry_point.dist.name if entry_point.dist else "<unknown>",
+            )
+        return plugins
+
+    def __getitem__(self, name: str) -> ModuleSpec:
+        if (spec := self.builtins.get(name)) is not None:
+            return spec
+        return self.plugins[name]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.builtins
+        yield from self.plugins
+
+    def __len__(self) -> int:
+        return len(self.builtins) + len(self.plugins)
+
+
+_module_manifest: ModuleManifest | None = None
+_registry: ModuleRegistry | None = None
+
+
+def _load_manifest() -> ModuleManifest:
+    global _module_manifest
+    if _module_manifest is None:
+        from ._manifest import MODULES
+
+        _module_manifest = ModuleManifest(
+            {
+                name: ModuleSpec(name=name, entry=entry, is_async=is_async)
+                for name, (entry, is_async) in MODULES.items()
+            }
+        )
+    return _module_manifest
+
+
+def _load_registry() -> ModuleRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ModuleRegistry(_load_manifest())
+    return _registry
+
+
+def scan_modules() -> dict[str, ModuleSpec]:
+    """
+    导入包内所有模块并生成清单, 仅供 `python -m skland_api.modules` 使用
+    """
+    import inspect
+    import pkgutil
+
+    specs = {}
+    for _, name, _ in pkgutil.iter_modules(__path__):
+        if name.startswith("_"):
+            continue
         try:
             module = importlib.import_module(f"{__name__}.{name}")
-            if hasattr(module, "main"):
-                _registry[name] = module.main
-            else:
-                logger.warning(f"module {name!r} has no entrypoint 'main'")
         except Exception:
             logger.exception(f"internal error in module {name!r}")
-    return _registry
+            continue
+        if not hasattr(module, "main"):
+            logger.warning(f"module {name!r} has no entrypoint 'main'")
+            continue
+        specs[name] = ModuleSpec(
+            name=name,
+            entry=f"{module.__name__}:main",
+            is_async=inspect.iscoroutinefunction(module.main),
+        )
+    return specs
 
 
 def __getattr__(name: str):
+    if name == "manifest":
+        return _load_manifest()
     if name == "registry":
         return _load_registry()
     raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
+    "ENTRY_POINT_GROUP",
+    "ModuleManifest",
+    "ModuleRegistry",
+    "ModuleSpec",
+    "manifest",
     "registry",
 ]
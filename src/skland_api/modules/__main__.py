@@ -0,0 +1,46 @@
+"""
+生成模块清单 `_manifest.py`
+
+    python -m skland_api.modules          # 重新生成清单
+    python -m skland_api.modules --check  # 检查清单是否过期
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from . import scan_modules
+
+MANIFEST_FILE = Path(__file__).with_name("_manifest.py")
+
+
+def render_manifest() -> str:
+    lines = [
+        "# Generated by `python -m skland_api.modules`, do not edit manually.",
+        "# name -> (entry, is_async)",
+        "MODULES: dict[str, tuple[str, bool]] = {",
+    ]
+    for name, spec in sorted(scan_modules().items()):
+        lines.append(f"    {json.dumps(name)}: ({json.dumps(spec.entry)}, {spec.is_async!r}),")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m skland_api.modules")
+    parser.add_argument("--check", action="store_true", help="只检查清单是否过期")
+    args = parser.parse_args()
+
+    content = render_manifest()
+    if args.check:
+        if MANIFEST_FILE.read_text(encoding="utf-8") != content:
+            print(f"{MANIFEST_FILE} is out of date", file=sys.stderr)
+            return 1
+        return 0
+    MANIFEST_FILE.write_text(content, encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+# Generated by `python -m skland_api.modules`, do not edit manually.
+# name -> (entry, is_async)
+MODULES: dict[str, tuple[str, bool]] = {
+    "checkin": ("skland_api.modules.checkin:main", True),
+    "infrast_assignment": ("skland_api.modules.infrast_assignment:main", False),
+    "infrast_basic": ("skland_api.modules.infrast_basic:main", False),
+    "mission": ("skland_api.modules.mission:main", False),
+    "online": ("skland_api.modules.online:main", False),
+    "profile": ("skland_api.modules.profile:main", False),
+    "recruit": ("skland_api.modules.recruit:main", False),
+    "routine": ("skland_api.modules.routine:main", False),
+    "sanity": ("skland_api.modules.sanity:main", False),
+    "update": ("skland_api.modules.update:main", False),
+}
@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 
-from skland_api.models import CharacterInfo
+from skland_api.models import CharacterInfo, TimeStamp
 
 UTC8 = timezone(timedelta(hours=8))
 
@@ -19,12 +19,18 @@ class CheckinResult:
 
 
 async def main(character_info: CharacterInfo, config: dict | None) -> CheckinResult:
-    checkin_status = await character_info.api.get_daily_checkin_status(character_info.uid)
+    if (api := character_info.api) is None:
+        raise ValueError("checkin requires an online character info")
+    checkin_status = await api.get_daily_checkin_status(character_info.uid)
 
     records = checkin_status["records"]
-    if records and datetime.fromtimestamp(int(records[-1]["ts"])).day == datetime.now(tz=UTC8).day:
+    if (
+        records
+        and datetime.fromtimestamp(int(records[-1]["ts"])).day
+        == datetime.fromtimestamp(TimeStamp.now(), tz=UTC8).day
+    ):
         return CheckinResult(already_checked_in=True)
-    awards = await character_info.api.execute_daily_checkin(character_info.uid)
+    awards = await api.execute_daily_checkin(character_info.uid)
     return CheckinResult(
         already_checked_in=False,
         awards=[
@@ -1,94 +1,21 @@
 from collections import UserList
 from collections.abc import Iterator
+from collections.abc import Set as AbstractSet
 from dataclasses import dataclass
 from itertools import permutations
 from typing import Self
 
 from loguru import logger
 
-from skland_api.models import CharacterInfo, TimeStamp
+from skland_api.memo import reads
+from skland_api.models import CharacterInfo, PlayerStatus, TimeStamp
+from skland_api.models.building import FacilityPresence, InfrastPresence, StationedOperatorInfo
+from skland_api.views import uses
 
-MORALE_DIVIDOR = 360000
 FULL_MORALE = 24
 FIAMMETTA_RECOVER_PER_SECOND = 2 / 3600
 
 
-@dataclass(frozen=True, kw_only=True, slots=True)
-class StationedOperatorInfo:
-    name: str
-    morale: float
-
-    @classmethod
-    def from_skland_data(cls, data: dict, name_mapping: dict[str, str]) -> Self:
-        return cls(
-            name=name_mapping[data["charId"]],
-            morale=data["ap"] / MORALE_DIVIDOR,
-        )
-
-
-class FacilityPresence(UserList[StationedOperatorInfo]):
-    @classmethod
-    def from_skland_data(cls, data: dict, name_mapping: dict[str, str]) -> Self:
-        return cls(
-            [StationedOperatorInfo.from_skland_data(char, name_mapping) for char in data["chars"]]
-        )
-
-
-@dataclass(frozen=True, kw_only=True, slots=True)
-class InfrastPresence:
-    control: FacilityPresence
-    powers: list[FacilityPresence]
-    tradings: list[FacilityPresence]
-    manufactures: list[FacilityPresence]
-    hire: FacilityPresence
-    meeting: FacilityPresence
-    dormitories: list[FacilityPresence]
-
-    def __iter__(self) -> Iterator[StationedOperatorInfo]:
-        yield from self.control
-        for power in self.powers:
-            yield from power
-        for trading in self.tradings:
-            yield from trading
-        for manufacture in self.manufactures:
-            yield from manufacture
-        yield from self.hire
-        yield from self.meeting
-        for dormitory in self.dormitories:
-            yield from dormitory
-
-    @classmethod
-    def from_character_info(cls, character_info: CharacterInfo) -> Self:
-        data = character_info.player_info["building"]
-        return cls(
-            control=FacilityPresence.from_skland_data(
-                data["control"], character_info.operator_name_mapping
-            ),
-            powers=[
-                FacilityPresence.from_skland_data(power, character_info.operator_name_mapping)
-                for power in data["powers"]
-            ],
-            tradings=[
-                FacilityPresence.from_skland_data(trading, character_info.operator_name_mapping)
-                for trading in data["tradings"]
-            ],
-            manufactures=[
-                FacilityPresence.from_skland_data(manufacture, character_info.operator_name_mapping)
-                for manufacture in data["manufactures"]
-            ],
-            hire=FacilityPresence.from_skland_data(
-                data["hire"], character_info.operator_name_mapping
-            ),
-            meeting=FacilityPresence.from_skland_data(
-                data["meeting"], character_info.operator_name_mapping
-            ),
-            dormitories=[
-                FacilityPresence.from_skland_data(dormitory, character_info.operator_name_mapping)
-                for dormitory in data["dormitories"]
-            ],
-        )
-
-
 @dataclass(frozen=True, kw_only=True, slots=True)
 class FacilityAudit:
     missing: list[str]
@@ -226,18 +153,23 @@ class FiammettaMonitor:
 
     @classmethod
     def new(
-        cls, infrast_presence: InfrastPresence, fiammetta_releated: set[str], update_time: int
+        cls,
+        infrast_presence: InfrastPresence,
+        fiammetta_releated: AbstractSet[str],
+        update_time: int,
     ) -> Self:
-        if "菲亚梅塔" in fiammetta_releated:
+        # 不修改传入的集合, 结果中的 missing_operators 是新的集合
+        missing = set(fiammetta_releated)
+        if "菲亚梅塔" in missing:
             logger.warning("'菲亚梅塔'在'菲亚梅塔'换班对象中，请检查排班表是否正确")
-            fiammetta_releated.remove("菲亚梅塔")
+            missing.remove("菲亚梅塔")
         present = []
         fiammetta = None
         fiammetta_recover_at = None
         for operator in infrast_presence:
-            if operator.name in fiammetta_releated:
+            if operator.name in missing:
                 present.append(operator)
-                fiammetta_releated.remove(operator.name)
+                missing.remove(operator.name)
             elif operator.name == "菲亚梅塔":
                 fiammetta = operator
         if fiammetta is not None:
@@ -245,11 +177,11 @@ class FiammettaMonitor:
                 update_time + int((FULL_MORALE - fiammetta.morale) / FIAMMETTA_RECOVER_PER_SECOND)
             )
         else:
-            fiammetta_releated.add("菲亚梅塔")
+            missing.add("菲亚梅塔")
 
         return cls(
             related_operators=present,
-            missing_operators=fiammetta_releated,
+            missing_operators=missing,
             fiammetta=fiammetta,
             fiammetta_recover_at=fiammetta_recover_at,
         )
@@ -261,6 +193,19 @@ class InfrastAssignmentReport:
     fiammetta_monitor: FiammettaMonitor | None = None
 
 
+def roster_files(character_info: CharacterInfo, config: dict | None) -> list[str]:
+    if config is None or (path := config.get(character_info.name)) is None:
+        return []
+    return [path]
+
+
+@reads(
+    "player_info.status.storeTs",
+    "player_info.building",
+    "player_info.charInfoMap",
+    files=roster_files,
+)
+@uses("status", "infrast_presence")
 def main(character_info: CharacterInfo, config: dict | None) -> InfrastAssignmentReport:
     if config is None or (path := config.get(character_info.name)) is None:
         logger.warning(f"no path configured for {character_info.name!r}")
@@ -276,7 +221,8 @@ def main(character_info: CharacterInfo, config: dict | None) -> InfrastAssignmen
     import json
     from datetime import datetime
 
-    update_time = character_info.player_info["status"]["storeTs"]
+    status: PlayerStatus = character_info.view("status")
+    update_time = status.store_at
     update_time_str = datetime.fromtimestamp(update_time).strftime("%H:%M")
 
     with file.open(mode="r", encoding="utf-8") as fp:
@@ -291,7 +237,7 @@ def main(character_info: CharacterInfo, config: dict | None) -> InfrastAssignmen
 
         if any(start < update_time_str < end for start, end in roster["period"]):
             active_rosters.append(roster)
-    infrast_presence = InfrastPresence.from_character_info(character_info)
+    infrast_presence: InfrastPresence = character_info.view("infrast_presence")
 
     if len(active_rosters) == 0:
         logger.warning(f"no active roster for {character_info.name!r}")
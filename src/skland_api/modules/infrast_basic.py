@@ -1,6 +1,16 @@
 from dataclasses import dataclass
 
-from skland_api.models import Capacity, CharacterInfo, Duration, Progress, TimeStamp
+from skland_api.memo import reads
+from skland_api.models import (
+    Capacity,
+    CharacterInfo,
+    Duration,
+    PlayerStatus,
+    Progress,
+    TimeStamp,
+    TrainingState,
+)
+from skland_api.views import uses
 
 TOTAL_TRAIN_POINT = [30000, 60000, 90000]
 # 基础速度为 8h 完成专精一级, 即 30000 点数
@@ -19,42 +29,29 @@ class Mastery:
 
 
 def get_mastery(character_info: CharacterInfo) -> Mastery | None:
-    mastery_data = character_info.player_info["building"]["training"]
-    update_time = character_info.player_info["status"]["storeTs"]
-    sec_since_update = Duration.to_now(TimeStamp(update_time))
+    return project_mastery(character_info.view("training"))
 
-    trainee = mastery_data["trainee"]
-    if trainee is None or trainee["targetSkill"] == -1:
-        return None
-
-    trainee_name = character_info.operator_name_mapping_with_fix[trainee["charId"]]
-    skill_id = trainee["targetSkill"]
-    skill_mastery_level = character_info.operators[trainee["charId"]].mastery_levels[skill_id]
 
-    trainer = mastery_data["trainer"]
-    if trainer is None:
-        trainer_name = None
-    else:
-        trainer_name = character_info.operator_name_mapping[trainer["charId"]]
+def project_mastery(training: TrainingState | None) -> Mastery | None:
+    if training is None:
+        return None
 
-    speed = mastery_data["speed"]
-    total = TOTAL_TRAIN_POINT[skill_mastery_level]
+    sec_since_update = Duration.to_now(training.updated_at)
+    total = TOTAL_TRAIN_POINT[training.skill_mastery_level]
     # 计算当前专精进度
     current = (
-        total - mastery_data["remainPoint"] + BASIC_TRAIN_PER_SECOND * speed * sec_since_update
+        total - training.remain_point + BASIC_TRAIN_PER_SECOND * training.speed * sec_since_update
     )
     progress = Progress(min(int(current), total), total)
-    # 专精的 remainSecs 数据按照请求时间计算（与无人机的 remainSecs 不同）
-    remain_seconds = Duration(mastery_data["remainSecs"])
 
     return Mastery(
-        trainee_name=trainee_name,
-        skill_id=skill_id,
-        skill_mastery_level=skill_mastery_level,
-        trainer_name=trainer_name,
-        speed=speed,
+        trainee_name=training.trainee_name,
+        skill_id=training.skill_id,
+        skill_mastery_level=training.skill_mastery_level,
+        trainer_name=training.trainer_name,
+        speed=training.speed,
         progress=progress,
-        remain_seconds=remain_seconds,
+        remain_seconds=Duration(training.remain_seconds),
     )
 
 
@@ -73,18 +70,42 @@ class InfrastOverview:
     mastery: Mastery | None
 
 
-def main(character_info: CharacterInfo, config: dict | None) -> InfrastOverview:
-    data = character_info.player_info["building"]
-    update_time = character_info.player_info["status"]["storeTs"]
+@dataclass(frozen=True, kw_only=True, slots=True)
+class InfrastSnapshot:
+    """
+    数据更新时的基建状态, 由 project 按当前时间推算为 InfrastOverview
+    """
 
+    drones: Capacity
+    drones_remain_seconds: int
+    store_at: TimeStamp
+    exhausted_operators: list[str]
+    training: TrainingState | None
+
+
+def prepare(character_info: CharacterInfo, config: dict | None) -> InfrastSnapshot:
+    data = character_info.player_info["building"]
+    status: PlayerStatus = character_info.view("status")
     drones_data = data["labor"]
-    current = drones_data["value"]
-    total = drones_data["maxValue"]
-    remain_seconds = drones_data["remainSecs"]
+    return InfrastSnapshot(
+        drones=Capacity(drones_data["value"], drones_data["maxValue"]),
+        drones_remain_seconds=drones_data["remainSecs"],
+        store_at=status.store_at,
+        exhausted_operators=[
+            character_info.operator_name_mapping[char["charId"]] for char in data["tiredChars"]
+        ],
+        training=character_info.view("training"),
+    )
+
+
+def project(snapshot: InfrastSnapshot) -> InfrastOverview:
+    current = snapshot.drones.current
+    total = snapshot.drones.total
+    remain_seconds = snapshot.drones_remain_seconds
 
     if remain_seconds > 0:
         # 无人机的 remainSecs 数据按照更新时间计算（与专精的 remainSecs 不同）
-        sec_since_update = Duration.to_now(update_time)
+        sec_since_update = Duration.to_now(snapshot.store_at)
         approximate_recover_speed = (total - current) / remain_seconds
         current = min(
             current + int(sec_since_update * approximate_recover_speed),
@@ -92,15 +113,24 @@ def main(character_info: CharacterInfo, config: dict | None) -> InfrastOverview:
         )
         remain_seconds = remain_seconds - sec_since_update
 
-    drones = Capacity(current, total)
-    drones_full_in = Duration(remain_seconds)
-    exhausted_operators = [
-        character_info.operator_name_mapping[char["charId"]] for char in data["tiredChars"]
-    ]
-    mastery = get_mastery(character_info)
     return InfrastOverview(
-        drones=drones,
-        drones_full_in=drones_full_in,
-        exhausted_operators=exhausted_operators,
-        mastery=mastery,
+        drones=Capacity(current, total),
+        drones_full_in=Duration(remain_seconds),
+        exhausted_operators=snapshot.exhausted_operators,
+        mastery=project_mastery(snapshot.training),
     )
+
+
+@reads(
+    "player_info.building.labor",
+    "player_info.building.tiredChars",
+    "player_info.building.training",
+    "player_info.status.storeTs",
+    "player_info.charInfoMap",
+    "cultivate.characters",
+    clock=True,
+    stages=(prepare, project),
+)
+@uses("status", "training")
+def main(character_info: CharacterInfo, config: dict | None) -> InfrastOverview:
+    return project(prepare(character_info, config))
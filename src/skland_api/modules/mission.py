@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 
+from skland_api.memo import reads
 from skland_api.models import CharacterInfo, Progress
 
 
@@ -9,6 +10,7 @@ class MissionStatus:
     weekly: Progress
 
 
+@reads("player_info.routine")
 def main(character_info: CharacterInfo, config: dict | None) -> MissionStatus:
     data = character_info.player_info["routine"]
     daily_data = data["daily"]
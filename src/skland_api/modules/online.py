@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 
-from skland_api.models import CharacterInfo, TimeStamp
+from skland_api.memo import reads
+from skland_api.models import CharacterInfo, PlayerStatus, TimeStamp
+from skland_api.views import uses
 
 
 @dataclass(frozen=True, kw_only=True, slots=True)
@@ -8,7 +10,8 @@ class OnlineStatus:
     last_online_at: TimeStamp
 
 
+@reads("player_info.status.lastOnlineTs")
+@uses("status")
 def main(character_info: CharacterInfo, config: dict | None) -> OnlineStatus:
-    return OnlineStatus(
-        last_online_at=TimeStamp(character_info.player_info["status"]["lastOnlineTs"])
-    )
+    status: PlayerStatus = character_info.view("status")
+    return OnlineStatus(last_online_at=status.last_online_at)
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 
-from skland_api.models import CharacterInfo
+from skland_api.memo import reads
+from skland_api.models import CharacterInfo, PlayerStatus
+from skland_api.views import uses
 
 
 @dataclass(frozen=True, kw_only=True, slots=True)
@@ -9,9 +11,11 @@ class Profile:
     suffix: str
 
 
+@reads("player_info.status.name")
+@uses("status")
 def main(character_info: CharacterInfo, config: dict | None) -> Profile:
-    name = character_info.player_info["status"]["name"]
-    nickname, suffix = name.rsplit("#", maxsplit=1)
+    status: PlayerStatus = character_info.view("status")
+    nickname, suffix = status.name.rsplit("#", maxsplit=1)
 
     return Profile(
         nickname=nickname,
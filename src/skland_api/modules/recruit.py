@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Self
 
+from skland_api.memo import reads
 from skland_api.models import Capacity, CharacterInfo, Duration, TimeStamp
 
 IS_RECRUITING = 2
@@ -30,7 +31,10 @@ class RecruitOverview:
     refresh_at: TimeStamp | None = None
 
 
-def main(character_info: CharacterInfo, config: dict | None) -> RecruitOverview:
+def prepare(character_info: CharacterInfo, config: dict | None) -> RecruitOverview:
+    """
+    refresh 为数据更新时的刷新次数
+    """
     recruits = [
         RecruitStatus.from_skland_data(item) for item in character_info.player_info["recruit"]
     ]
@@ -40,11 +44,20 @@ def main(character_info: CharacterInfo, config: dict | None) -> RecruitOverview:
         refresh_at = None
     else:
         refresh_at = TimeStamp(refresh_data["completeWorkTime"])
-        if Duration.from_now(refresh_at) < 0:
-            current_refresh += 1
 
     return RecruitOverview(
         recruits=recruits,
         refresh=Capacity(current_refresh, MAX_REFRESH_COUNT),
         refresh_at=refresh_at,
     )
+
+
+def project(overview: RecruitOverview) -> RecruitOverview:
+    if overview.refresh_at is None or Duration.from_now(overview.refresh_at) >= 0:
+        return overview
+    return replace(overview, refresh=Capacity(overview.refresh.current + 1, MAX_REFRESH_COUNT))
+
+
+@reads("player_info.recruit", "player_info.building.hire", clock=True, stages=(prepare, project))
+def main(character_info: CharacterInfo, config: dict | None) -> RecruitOverview:
+    return project(prepare(character_info, config))
@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime, time, timedelta, timezone
 
+from skland_api.memo import reads
 from skland_api.models import CharacterInfo, Progress, TimeStamp
 
 UTC8 = timezone(timedelta(hours=8))
@@ -23,7 +24,7 @@ class RoutineStatus:
 
 
 def get_annihilation_end_time() -> TimeStamp:
-    now = datetime.now(tz=UTC8)
+    now = datetime.fromtimestamp(TimeStamp.now(), tz=UTC8)
     target_date = now.date()
 
     # weekday()返回值规定 周一: 0, 周二: 1 ...
@@ -38,7 +39,10 @@ def get_annihilation_end_time() -> TimeStamp:
     return TimeStamp(int(target_time.timestamp()))
 
 
-def main(character_info: CharacterInfo, config: dict | None) -> RoutineStatus:
+def prepare(character_info: CharacterInfo, config: dict | None) -> RoutineStatus:
+    """
+    annihilation_reset_at 在 project 中按当前时间计算
+    """
     data = character_info.player_info["campaign"]["reward"]
     annihilation = Progress(data["current"], data["total"])
 
@@ -53,8 +57,22 @@ def main(character_info: CharacterInfo, config: dict | None) -> RoutineStatus:
 
     return RoutineStatus(
         annihilation=annihilation,
-        annihilation_reset_at=get_annihilation_end_time(),
+        annihilation_reset_at=TimeStamp(0),
         sss_instrument=sss_instrument,
         sss_component=sss_component,
         sss_reset_at=sss_reset_at,
     )
+
+
+def project(status: RoutineStatus) -> RoutineStatus:
+    return replace(status, annihilation_reset_at=get_annihilation_end_time())
+
+
+@reads(
+    "player_info.campaign.reward",
+    "player_info.tower.reward",
+    clock=True,
+    stages=(prepare, project),
+)
+def main(character_info: CharacterInfo, config: dict | None) -> RoutineStatus:
+    return project(prepare(character_info, config))
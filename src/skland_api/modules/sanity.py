@@ -1,6 +1,9 @@
 from dataclasses import dataclass
 
-from skland_api.models import Capacity, CharacterInfo, Duration, TimeStamp
+from skland_api.memo import reads
+from skland_api.models import Capacity, CharacterInfo, Duration, PlayerStatus, TimeStamp
+from skland_api.models.status import ApStatus
+from skland_api.views import uses
 
 SANITY_RECOVER_PER_SECOND = 1 / 6 / 60
 
@@ -11,20 +14,29 @@ class SanityStatus:
     full_at: TimeStamp
 
 
-def main(character_info: CharacterInfo, config: dict | None) -> SanityStatus:
-    data = character_info.player_info["status"]["ap"]
+def prepare(character_info: CharacterInfo, config: dict | None) -> ApStatus:
+    status: PlayerStatus = character_info.view("status")
+    return status.ap
+
 
-    since_last_add = Duration.to_now(data["lastApAddTime"])
-    current = data["current"]
-    total = data["max"]
+def project(ap: ApStatus) -> SanityStatus:
+    since_last_add = Duration.to_now(ap.last_add_at)
+    current = ap.current
+    total = ap.total
 
     # 当前理智超限时不计算自更新以来的回复值
     if current < total:
         current = min(total, int(current + since_last_add * SANITY_RECOVER_PER_SECOND))
     # TODO: 确认当前理智已超限时该字段是否有意义
-    full_at = TimeStamp(data["completeRecoveryTime"])
+    full_at = ap.full_at
 
     return SanityStatus(
         sanity=Capacity(current, total),
         full_at=full_at,
     )
+
+
+@reads("player_info.status.ap", clock=True, stages=(prepare, project))
+@uses("status")
+def main(character_info: CharacterInfo, config: dict | None) -> SanityStatus:
+    return project(prepare(character_info, config))
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 
-from skland_api.models import CharacterInfo, TimeStamp
+from skland_api.memo import reads
+from skland_api.models import CharacterInfo, PlayerStatus, TimeStamp
+from skland_api.views import uses
 
 
 @dataclass(frozen=True, kw_only=True, slots=True)
@@ -8,5 +10,8 @@ class UpdateStatus:
     last_update_at: TimeStamp
 
 
+@reads("player_info.status.storeTs")
+@uses("status")
 def main(character_info: CharacterInfo, config: dict | None) -> UpdateStatus:
-    return UpdateStatus(last_update_at=TimeStamp(character_info.player_info["status"]["storeTs"]))
+    status: PlayerStatus = character_info.view("status")
+    return UpdateStatus(last_update_at=status.store_at)
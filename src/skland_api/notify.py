@@ -0,0 +1,495 @@
+"""
+按模块结果的阈值规则发送通知
+
+    async with Notifier([WebhookSink(url)]) as notifier:
+        notifier.observe(name, uid, "sanity", result)
+        ...
+    # 退出时发送尚未发送的事件
+
+规则将模块结果中的一个字段 (以 "." 分隔的路径, "*" 展开列表中的每一项) 与阈值比较, 阈值为 "now" 时与当前时间比较.
+同一事件 (规则, 账号, uid, 字段路径) 在条件持续满足期间每 suppress 秒至多通知一次, 条件不再满足后重置.
+事件先缓存起来, flush 时合并为一个负载发送给所有 sink, 失败时按指数退避重试. 只有发送成功的事件才开始抑制,
+尚未 flush 的事件在下次运行中条件仍满足时会重新加入批次.
+"""
+
+import asyncio
+import dataclasses
+import json
+import operator
+import os
+import time
+import types
+import typing
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence, Sized
+from collections.abc import Set as AbstractSet
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal, Protocol, Self, cast
+
+import httpx
+from loguru import logger
+
+from .changes import to_plain
+from .models import TimeStamp
+
+RuleOperator = Literal["<", "<=", ">", ">=", "==", "!=", "nonempty"]
+STATE_FILE = "notify-state.json"
+STATE_VERSION = 1
+
+COMPARATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class Rule:
+    """
+    name: 事件名称, 同时是去重键的一部分
+    field: 模块结果中的字段路径, "*" 匹配列表中的每一项; 路径上的值为 None 时不匹配
+    value: 阈值, 为 "now" 时为当前时间; op 为 nonempty 时不使用
+    message: 通知文本, 可以使用 {name} {uid} {value}
+    """
+
+    name: str
+    module: str
+    field: str
+    op: RuleOperator
+    value: object = None
+    message: str
+
+    def __post_init__(self):
+        if self.op != "nonempty" and self.op not in COMPARATORS:
+            raise ValueError(f"unsupported operator {self.op!r} in rule {self.name!r}")
+
+    def threshold(self) -> object:
+        return TimeStamp.now() if self.value == "now" else self.value
+
+    def matches(self, result: object) -> Iterator[tuple[str, object]]:
+        """
+        满足条件的 (字段路径, 值)
+        """
+        threshold = self.threshold()
+        for path, value in resolve(result, self.field.split(".")):
+            if value is None:
+                continue
+            if self.op == "nonempty":
+                matched = isinstance(value, Sized) and len(value) > 0
+            else:
+                matched = COMPARATORS[self.op](value, threshold)
+            if matched:
+                yield path, value
+
+
+DEFAULT_RULES = [
+    Rule(
+        name="sanity_full",
+        module="sanity",
+        field="full_at",
+        op="<=",
+        value="now",
+        message="理智已满",
+    ),
+    Rule(
+        name="recruit_finished",
+        module="recruit",
+        field="recruits.*.finish_at",
+        op="<=",
+        value="now",
+        message="公开招募已完成",
+    ),
+    Rule(
+        name="drones_full",
+        module="infrast_basic",
+        field="drones_full_in",
+        op="<=",
+        value=0,
+        message="无人机已满",
+    ),
+    Rule(
+        name="operators_exhausted",
+        module="infrast_basic",
+        field="exhausted_operators",
+        op="nonempty",
+        message="干员疲劳: {value}",
+    ),
+    Rule(
+        name="fiammetta_recovered",
+        module="infrast_assignment",
+        field="fiammetta_monitor.fiammetta_recover_at",
+        op="<=",
+        value="now",
+        message="菲亚梅塔心情已恢复",
+    ),
+]
+
+
+def resolve(value: object, parts: Sequence[str], path: str = "") -> Iterator[tuple[str, object]]:
+    if not parts:
+        yield path, value
+        return
+    if value is None:
+        return
+    head, rest = parts[0], parts[1:]
+    if head == "*":
+        if isinstance(value, Iterable):
+            for index, item in enumerate(value):
+                yield from resolve(item, rest, f"{path}.{index}" if path else str(index))
+        return
+    if isinstance(value, Mapping):
+        child = cast("Mapping[str, object]", value).get(head)
+    else:
+        child = getattr(value, head)
+    yield from resolve(child, rest, f"{path}.{head}" if path else head)
+
+
+def check_field(annotation: object, parts: Sequence[str], field: str) -> None:
+    """
+    检查字段路径在类型注解中存在, 不存在时抛出 ValueError. dict 与无法推导的类型不检查
+    """
+    if not parts:
+        return
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin in (types.UnionType, typing.Union):
+        for arg in args:
+            if arg is not type(None):
+                check_field(arg, parts, field)
+        return
+    head, rest = parts[0], parts[1:]
+    if head == "*":
+        if origin not in (list, set, frozenset, tuple, AbstractSet, Sequence):
+            raise ValueError(f"{field!r}: '*' applied to non-list type {annotation!r}")
+        check_field(args[0] if args else Any, rest, field)
+    elif isinstance(annotation, type) and dataclasses.is_dataclass(annotation):
+        hints = typing.get_type_hints(annotation)
+        if head not in hints:
+            raise ValueError(f"{field!r}: {annotation.__name__} has no field {head!r}")
+        check_field(hints[head], rest, field)
+    elif origin is not dict and annotation not in (Any, dict, object):
+        raise ValueError(f"{field!r}: cannot access {head!r} on {annotation!r}")
+
+
+def check_rule(rule: Rule) -> None:
+    """
+    检查规则的模块存在且字段路径在模块结果的类型中存在, 有误时抛出 ValueError
+    """
+    from .modules import manifest
+
+    if rule.module not in manifest:
+        raise ValueError(f"unknown module {rule.module!r} in rule {rule.name!r}")
+    entry = manifest[rule.module].load()
+    try:
+        result_type = typing.get_type_hints(entry).get("return", Any)
+    except NameError as e:
+        logger.warning(f"Cannot check field of rule {rule.name!r}: {e}")
+        return
+    try:
+        check_field(result_type, rule.field.split("."), rule.field)
+    except ValueError as e:
+        raise ValueError(f"invalid field in rule {rule.name!r}: {e}") from None
+
+
+def format_value(value: object) -> str:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return "、".join(str(item) for item in value)
+    return str(value)
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class Event:
+    rule: str
+    name: str
+    uid: str
+    module: str
+    path: str
+    value: object
+    message: str
+    at: int
+
+    @property
+    def key(self) -> tuple[str, str, str, str]:
+        return self.rule, self.name, self.uid, self.path
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+
+class Sink(Protocol):
+    async def send(self, payload: dict) -> None:
+        """
+        发送失败时抛出异常
+        """
+        ...
+
+
+class WebhookSink:
+    """
+    以 JSON 形式 POST 负载, 响应不是 2xx 时抛出 httpx.HTTPStatusError
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        headers: dict[str, str] | None = None,
+        timeout: float = 10,
+        client: httpx.AsyncClient | None = None,
+    ):
+        self.url = url
+        self.headers = headers or {}
+        self.client = client or httpx.AsyncClient(timeout=timeout)
+        self.owns_client = client is None
+
+    async def send(self, payload: dict) -> None:
+        response = await self.client.post(self.url, json=payload, headers=self.headers)
+        response.raise_for_status()
+
+    async def aclose(self) -> None:
+        if self.owns_client:
+            await self.client.aclose()
+
+    def __repr__(self) -> str:
+        return f"WebhookSink({self.url!r})"
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    4xx (429 除外) 说明负载或配置有误, 重试也不会成功
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return True
+
+
+class Notifier:
+    def __init__(
+        self,
+        sinks: Sequence[Sink],
+        *,
+        rules: Iterable[Rule] = DEFAULT_RULES,
+        suppress: float = 6 * 3600,
+        interval: float = 0,
+        retries: int = 3,
+        backoff: float = 1.0,
+        active: dict[tuple[str, str, str], dict[str, int]] | None = None,
+    ):
+        """
+        suppress: 同一事件两次通知之间的最短间隔 (秒)
+        interval: due() 判断是否应当 flush 的间隔 (秒)
+        retries / backoff: 每个 sink 的重试次数, 第 n 次重试前等待 backoff * 2 ** n 秒
+        active: 由 load 从状态文件中读取的上次成功通知的时间
+        """
+        self.sinks = list(sinks)
+        self.rules: dict[str, list[Rule]] = {}
+        for rule in rules:
+            self.rules.setdefault(rule.module, []).append(rule)
+        self.suppress = suppress
+        self.interval = interval
+        self.retries = retries
+        self.backoff = backoff
+        # (规则, 账号, uid) -> 字段路径 -> 上次成功通知的时间
+        self.active: dict[tuple[str, str, str], dict[str, int]] = active or {}
+        # (规则, 账号, uid) -> 字段路径 -> 事件, 同一事件在一个批次中只保留最新的一个
+        self.pending: dict[tuple[str, str, str], dict[str, Event]] = {}
+        self.last_flush = time.monotonic()
+        self.file: Path | None = None
+
+    def observe(self, name: str, uid: str, module: str, value: object) -> int:
+        """
+        按该模块的规则检查结果, 返回新加入批次的事件数. value 为 None 时不检查, 已有的事件状态保持不变
+        """
+        if value is None or (rules := self.rules.get(module)) is None:
+            return 0
+        now = int(TimeStamp.now())
+        count = 0
+        for rule in rules:
+            key = rule.name, name, uid
+            matched = dict(rule.matches(value))
+            # 条件不再满足的事件被重置, 下次满足时立即通知; 批次中尚未发送的也不再发送
+            active = {path: at for path, at in self.active.pop(key, {}).items() if path in matched}
+            if active:
+                self.active[key] = active
+            queued = {
+                path: event for path, event in self.pending.pop(key, {}).items() if path in matched
+            }
+            for path, field_value in matched.items():
+                if path in active and now - active[path] < self.suppress:
+                    continue
+                field_value = to_plain(field_value, ignore_countdowns=False)
+                event = Event(
+                    rule=rule.name,
+                    name=name,
+                    uid=uid,
+                    module=module,
+                    path=path,
+                    value=field_value,
+                    message=rule.message.format(
+                        name=name, uid=uid, value=format_value(field_value)
+                    ),
+                    at=now,
+                )
+                queued[path] = event
+                count += 1
+            if queued:
+                self.pending[key] = queued
+        return count
+
+    def due(self) -> bool:
+        return bool(self.pending) and time.monotonic() - self.last_flush >= self.interval
+
+    def payload(self, events: Sequence[Event]) -> dict:
+        return {
+            "count": len(events),
+            "text": "\n".join(f"{event.name} ({event.uid}): {event.message}" for event in events),
+            "events": [event.to_dict() for event in events],
+        }
+
+    async def deliver(self, sink: Sink, payload: dict) -> bool:
+        for attempt in range(self.retries + 1):
+            try:
+                await sink.send(payload)
+                return True
+            except Exception as e:
+                if attempt == self.retries or not is_retryable(e):
+                    logger.error(f"Failed to deliver notification to {sink!r}: {e}")
+                    return False
+                delay = self.backoff * 2**attempt
+                logger.warning(f"Retrying notification to {sink!r} in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+        return False
+
+    async def flush(self) -> int:
+        """
+        将批次中的事件合并为一个负载并发送给所有 sink, 返回发送的事件数.
+        至少一个 sink 发送成功后事件才计入抑制窗口, 否则条件仍满足时会再次通知
+        """
+        self.last_flush = time.monotonic()
+        if not self.pending or not self.sinks:
+            return 0
+        events = sorted(
+            (event for queued in self.pending.values() for event in queued.values()),
+            key=lambda event: (event.name, event.uid),
+        )
+        self.pending = {}
+        payload = self.payload(events)
+        delivered = await asyncio.gather(*(self.deliver(sink, payload) for sink in self.sinks))
+        if not any(delivered):
+            return 0
+        for event in events:
+            self.active.setdefault((event.rule, event.name, event.uid), {})[event.path] = event.at
+        return len(events)
+
+    async def aclose(self) -> None:
+        for sink in self.sinks:
+            if (aclose := getattr(sink, "aclose", None)) is not None:
+                await aclose()
+
+    @staticmethod
+    def parse_active(entries: list) -> dict[tuple[str, str, str], dict[str, int]]:
+        """
+        entries: save 写入的 [规则, 账号, uid, 字段路径, 时间] 列表, 格式有误时抛出 ValueError 或 TypeError
+        """
+        if not isinstance(entries, list):
+            raise TypeError(f"active must be a list, got {type(entries).__name__}")
+        active: dict[tuple[str, str, str], dict[str, int]] = {}
+        for rule, name, uid, path, at in entries:
+            if not all(isinstance(part, str) for part in (rule, name, uid, path)) or not (
+                isinstance(at, int) and not isinstance(at, bool)
+            ):
+                raise ValueError(f"invalid active entry {[rule, name, uid, path, at]!r}")
+            active.setdefault((rule, name, uid), {})[path] = at
+        return active
+
+    @classmethod
+    def load(cls, file: Path, sinks: Sequence[Sink], **kwargs) -> Self:
+        """
+        文件不存在或损坏时从空状态开始
+        """
+        active = None
+        try:
+            with file.open(encoding="utf-8") as fp:
+                state = json.load(fp)
+            if state.get("version") != STATE_VERSION:
+                raise ValueError(f"unsupported state version {state.get('version')!r}")
+            active = cls.parse_active(state["active"])
+        except FileNotFoundError:
+            pass
+        except (ValueError, AttributeError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring invalid notifier state {file}: {e!r}")
+        notifier = cls(sinks, active=active, **kwargs)
+        notifier.file = file
+        return notifier
+
+    def save(self, file: Path | None = None) -> None:
+        if (file := file or self.file) is None:
+            return
+        active = [
+            [rule, name, uid, path, at]
+            for (rule, name, uid), paths in self.active.items()
+            for path, at in paths.items()
+        ]
+        temp = file.with_name(f".{file.name}.{os.getpid()}.tmp")
+        temp.write_text(
+            json.dumps({"version": STATE_VERSION, "active": active}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        temp.replace(file)
+
+    @classmethod
+    def from_config(cls, config: dict, state_file: Path | None = None) -> Self:
+        """
+        由配置文件的 notify 部分创建, rules 缺省时为 DEFAULT_RULES. 配置有误时抛出 ValueError
+        """
+        try:
+            sinks = [
+                WebhookSink(webhook)
+                if isinstance(webhook, str)
+                else WebhookSink(webhook["url"], headers=webhook.get("headers"))
+                for webhook in config.get("webhooks", [])
+            ]
+            rules = (
+                [Rule(**rule) for rule in config["rules"]] if "rules" in config else DEFAULT_RULES
+            )
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"invalid webhook or rule: {e!r}") from None
+        if "rules" in config:
+            for rule in rules:
+                check_rule(rule)
+        if not sinks:
+            raise ValueError("no webhooks configured")
+        options = {
+            key: config[key]
+            for key in ("suppress", "interval", "retries", "backoff")
+            if key in config
+        }
+        if state_file is None:
+            return cls(sinks, rules=rules, **options)
+        return cls.load(state_file, sinks, rules=rules, **options)
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            if exc_type is None:
+                await self.flush()
+                self.save()
+        finally:
+            await self.aclose()
+
+
+__all__ = [
+    "DEFAULT_RULES",
+    "STATE_FILE",
+    "Event",
+    "Notifier",
+    "Rule",
+    "Sink",
+    "WebhookSink",
+]
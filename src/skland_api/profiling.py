@@ -0,0 +1,144 @@
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from .instrumentation import Instrument, PhaseEvent, RequestEvent
+
+
+@dataclass(kw_only=True, slots=True)
+class PhaseSummary:
+    count: int = 0
+    wall: float = 0
+    cpu: float | None = None
+
+    def add(self, event: PhaseEvent) -> None:
+        self.count += 1
+        self.wall += event.wall
+        if event.cpu is not None:
+            self.cpu = (self.cpu or 0) + event.cpu
+
+
+@dataclass(kw_only=True, slots=True)
+class RequestSummary:
+    count: int = 0
+    wall: float = 0
+    size: int = 0
+
+    def add(self, event: RequestEvent) -> None:
+        self.count += 1
+        self.wall += event.wall
+        self.size += event.size
+
+
+class Profiler(Instrument):
+    phases: list[PhaseEvent]
+    requests: list[RequestEvent]
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.phases = []
+        self.requests = []
+
+    def phase_finished(self, event: PhaseEvent) -> None:
+        self.phases.append(event)
+
+    def request_finished(self, event: RequestEvent) -> None:
+        self.requests.append(event)
+
+    def by_phase(self) -> dict[str, PhaseSummary]:
+        summaries = defaultdict(PhaseSummary)
+        for event in self.phases:
+            summaries[event.name].add(event)
+        return dict(summaries)
+
+    def by_account(self) -> dict[str | None, PhaseSummary]:
+        summaries = defaultdict(PhaseSummary)
+        # 账号的根阶段 (account) 只作为 trace 的父 span, 统计其直接子阶段与其余最外层的阶段,
+        # 避免嵌套阶段被重复计入
+        roots = {event.context.span_id for event in self.phases if event.name == "account"}
+        for event in self.phases:
+            if event.parent is not None and event.parent.span_id in roots:
+                summaries[event.account].add(event)
+            elif event.depth == 0 and event.name != "account":
+                summaries[event.account].add(event)
+        return dict(summaries)
+
+    def by_module(self) -> dict[str, PhaseSummary]:
+        summaries = defaultdict(PhaseSummary)
+        for event in self.phases:
+            if event.module is not None:
+                summaries[event.module].add(event)
+        return dict(summaries)
+
+    def requests_by_account(self) -> dict[str | None, RequestSummary]:
+        summaries = defaultdict(RequestSummary)
+        for event in self.requests:
+            summaries[event.account].add(event)
+        return dict(summaries)
+
+    def requests_by_endpoint(self) -> dict[str, RequestSummary]:
+        summaries = defaultdict(RequestSummary)
+        for event in self.requests:
+            summaries[event.endpoint].add(event)
+        return dict(summaries)
+
+    def chrome_trace(self) -> dict:
+        """
+        Chrome Trace Event 格式, 可在 chrome://tracing 或 Perfetto 中打开, 每个账号占一行
+        """
+        tids: dict[str | None, int] = {}
+        events = []
+
+        def tid_of(account: str | None) -> int:
+            if account not in tids:
+                tids[account] = len(tids)
+                events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": 0,
+                        "tid": tids[account],
+                        "args": {"name": account or "<global>"},
+                    }
+                )
+            return tids[account]
+
+        for event in self.phases:
+            args = {}
+            if event.module is not None:
+                args["module"] = event.module
+            if event.cpu is not None:
+                args["cpu_ms"] = event.cpu * 1000
+            events.append(
+                {
+                    "name": event.name if event.module is None else event.module,
+                    "cat": "phase",
+                    "ph": "X",
+                    "pid": 0,
+                    "tid": tid_of(event.account),
+                    "ts": (event.start - self.origin) * 1e6,
+                    "dur": event.wall * 1e6,
+                    "args": args,
+                }
+            )
+        for event in self.requests:
+            events.append(
+                {
+                    "name": event.endpoint,
+                    "cat": "request",
+                    "ph": "X",
+                    "pid": 0,
+                    "tid": tid_of(event.account),
+                    "ts": (event.start - self.origin) * 1e6,
+                    "dur": event.wall * 1e6,
+                    "args": {"bytes": event.size, "status": event.status_code},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+__all__ = [
+    "PhaseSummary",
+    "Profiler",
+    "RequestSummary",
+]
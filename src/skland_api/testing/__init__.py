@@ -0,0 +1,15 @@
+"""
+本地测试服务器与合成数据, 用于测试与基准测试, 不会访问真实的森空岛服务
+"""
+
+from .server import FakeAccount, FakeSklandServer, Faults, Latency, make_fleet
+from .sink import WebhookRecorder
+
+__all__ = [
+    "FakeAccount",
+    "FakeSklandServer",
+    "Faults",
+    "Latency",
+    "WebhookRecorder",
+    "make_fleet",
+]
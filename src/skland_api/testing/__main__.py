@@ -0,0 +1,114 @@
+"""
+本地测试服务器与库的负载驱动
+
+    python -m skland_api.testing serve --accounts 100 --latency lognormal:30,150
+    python -m skland_api.testing drive --base-url http://127.0.0.1:8080 --accounts 100
+    python -m skland_api.testing sink --port 8090
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import asdict
+
+from loguru import logger
+
+from .server import FakeSklandServer, Faults, Latency, make_fleet
+
+
+async def serve(args: argparse.Namespace) -> None:
+    server = FakeSklandServer(
+        make_fleet(args.accounts, args.characters, args.seed),
+        latency=Latency.parse(args.latency),
+        faults=Faults(error_rate=args.error_rate, throttle_rate=args.throttle_rate),
+        seed=args.seed,
+        size=args.size,
+    )
+    base_url = await server.start(args.host, args.port)
+    # 第一行输出为 base url, 供父进程读取
+    print(base_url, flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+async def sink(args: argparse.Namespace) -> None:
+    from .sink import WebhookRecorder
+
+    recorder = WebhookRecorder(fail_first=args.fail_first)
+    url = await recorder.start(args.host, args.port)
+    # 第一行输出为 webhook 的 url, 之后每收到一个负载输出一行
+    print(url, flush=True)
+    try:
+        while True:
+            await recorder.received.wait()
+            recorder.received.clear()
+            while recorder.payloads:
+                print(json.dumps(recorder.payloads.pop(0), ensure_ascii=False), flush=True)
+    finally:
+        await recorder.close()
+
+
+async def drive(args: argparse.Namespace) -> None:
+    from .load import run_load
+
+    modules = args.modules.split(",") if args.modules else None
+    start = time.perf_counter()
+    results = await run_load(
+        make_fleet(args.accounts, args.characters, args.seed), args.base_url, args.tier, modules
+    )
+    wall = time.perf_counter() - start
+    print(json.dumps({"wall": wall, "results": [asdict(result) for result in results]}))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m skland_api.testing")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fleet = argparse.ArgumentParser(add_help=False)
+    fleet.add_argument("--accounts", type=int, default=100, help="账号数量")
+    fleet.add_argument("--characters", type=int, default=1, help="每个账号的角色数量")
+    fleet.add_argument("--seed", type=int, default=0, help="生成账号与数据的随机种子")
+
+    serve_parser = subparsers.add_parser("serve", parents=[fleet], help="启动测试服务器")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=0, help="为 0 时使用随机端口")
+    serve_parser.add_argument(
+        "--latency", default="0", help="如 20, uniform:10,50, lognormal:30,200"
+    )
+    serve_parser.add_argument(
+        "--size", choices=["small", "medium", "large"], default="medium", help="角色数据的规模"
+    )
+    serve_parser.add_argument("--error-rate", type=float, default=0, help="注入服务端错误的概率")
+    serve_parser.add_argument("--throttle-rate", type=float, default=0, help="注入限流的概率")
+
+    drive_parser = subparsers.add_parser("drive", parents=[fleet], help="以库的方式运行负载")
+    drive_parser.add_argument("--base-url", required=True)
+    drive_parser.add_argument("--tier", choices=["cred", "token", "password"], default="cred")
+    drive_parser.add_argument(
+        "--modules", help="逗号分隔的模块列表, 缺省时与 dashboard 的默认模块一致"
+    )
+
+    sink_parser = subparsers.add_parser("sink", help="启动记录通知负载的 webhook")
+    sink_parser.add_argument("--host", default="127.0.0.1")
+    sink_parser.add_argument("--port", type=int, default=0, help="为 0 时使用随机端口")
+    sink_parser.add_argument(
+        "--fail-first", type=int, default=0, help="前若干个请求返回 503, 用于测试重试"
+    )
+
+    args = parser.parse_args()
+    # 负载驱动的输出需要保持为 JSON, 服务器日志则写入标准错误
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    try:
+        asyncio.run({"serve": serve, "drive": drive, "sink": sink}[args.command](args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass
+from typing import Literal
+
+from skland_api.api import SklandApi
+from skland_api.models import AuthInfo, CharacterInfoLoader
+from skland_api.modules import registry
+from skland_api.transport import RedirectTransport
+
+from .server import FakeAccount
+
+# 与 dashboard 的默认模块一致
+DEFAULT_MODULES = [
+    "profile",
+    "update",
+    "checkin",
+    "online",
+    "sanity",
+    "routine",
+    "mission",
+    "recruit",
+    "infrast_basic",
+]
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class AccountResult:
+    """
+    latency: 从认证开始到所有角色的模块运行结束的耗时 (秒)
+    """
+
+    name: str
+    latency: float
+    characters: int
+    error: str | None = None
+
+
+async def drive_account(
+    account: FakeAccount,
+    base_url: str,
+    tier: Literal["cred", "token", "password"],
+    modules: list[str],
+) -> AccountResult:
+    start = time.perf_counter()
+    characters = 0
+    try:
+        api = await AuthInfo(**account.auth_info(tier)).full_auth(
+            SklandApi(RedirectTransport(base_url))
+        )
+        bindings = await api.binding_list()
+        character_infos = await asyncio.gather(
+            *[CharacterInfoLoader(account.name, api, binding).full_load() for binding in bindings]
+        )
+        for character_info in character_infos:
+            for module_name in modules:
+                result = registry[module_name](character_info, None)
+                if inspect.isawaitable(result):
+                    await result
+            characters += 1
+    except Exception as e:
+        return AccountResult(
+            name=account.name,
+            latency=time.perf_counter() - start,
+            characters=characters,
+            error=f"{type(e).__name__}: {e}",
+        )
+    return AccountResult(
+        name=account.name, latency=time.perf_counter() - start, characters=characters
+    )
+
+
+async def run_load(
+    accounts: list[FakeAccount],
+    base_url: str,
+    tier: Literal["cred", "token", "password"] = "cred",
+    modules: list[str] | None = None,
+) -> list[AccountResult]:
+    """
+    以库的方式并发处理所有账号
+    """
+    if modules is None:
+        modules = DEFAULT_MODULES
+    return await asyncio.gather(
+        *[drive_account(account, base_url, tier, modules) for account in accounts]
+    )
+
+
+__all__ = [
+    "AccountResult",
+    "run_load",
+]
@@ -0,0 +1,390 @@
+import random
+import time
+from dataclasses import dataclass
+from typing import Literal
+
+from skland_api.models.constants import ITEM_MAPPING
+
+PayloadSizeName = Literal["small", "medium", "large"]
+
+PROFESSIONS = ["PIONEER", "WARRIOR", "TANK", "SNIPER", "CASTER", "MEDIC", "SUPPORT", "SPECIAL"]
+NAME_CHARACTERS = "安白陈德凯拉莉琳露玛米娜妮普琴塞森斯塔特维温夏星雅耶伊银鹰月云泽真芝"
+FIAMMETTA_ID = "char_300_phenxi"
+AMIYA_ID = "char_002_amiya"
+# 未出现在 ITEM_MAPPING 中的物品, 真实数据中同样存在
+UNMAPPED_ITEMS = ["4001", "4002", "4003", "mod_unlock_token", "mod_update_token_1", "base_ap"]
+
+MORALE_DIVIDOR = 360000
+FULL_AP = 24 * MORALE_DIVIDOR
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class PayloadSize:
+    """
+    基建设施数量对应 243/153 等常见布局
+    """
+
+    operators: int
+    powers: int
+    tradings: int
+    manufactures: int
+    dormitories: int
+    skins: int
+
+
+SIZES: dict[PayloadSizeName, PayloadSize] = {
+    "small": PayloadSize(
+        operators=60, powers=1, tradings=1, manufactures=2, dormitories=1, skins=10
+    ),
+    "medium": PayloadSize(
+        operators=200, powers=3, tradings=2, manufactures=4, dormitories=4, skins=80
+    ),
+    "large": PayloadSize(
+        operators=360, powers=3, tradings=1, manufactures=5, dormitories=4, skins=250
+    ),
+}
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class SyntheticCharacter:
+    player_info: dict
+    cultivate: dict
+
+
+class PayloadGenerator:
+    """
+    相同的种子与规模总是生成相同的数据 (时间戳除外, 均相对于当前时间生成)
+    """
+
+    def __init__(self, seed: int | str, size: PayloadSizeName = "medium"):
+        self.rng = random.Random(seed)
+        self.size = SIZES[size]
+        self.now = int(time.time())
+        self.store_ts = self.now - self.rng.randint(60, 3600)
+        self.char_ids = self.make_char_ids()
+        self.names = {char_id: self.make_name(index) for index, char_id in enumerate(self.char_ids)}
+        self.names[AMIYA_ID] = "阿米娅"
+        self.names[FIAMMETTA_ID] = "菲亚梅塔"
+        # char_id -> 精英化等级, 专精等级
+        self.evolve = {char_id: self.rng.choice([0, 1, 2, 2]) for char_id in self.char_ids}
+        self.mastery = {
+            char_id: [
+                self.rng.randint(0, 3) if self.evolve[char_id] == 2 else 0
+                for _ in range(self.rng.choice([1, 2, 3, 3]))
+            ]
+            for char_id in self.char_ids
+        }
+
+    def make_char_ids(self) -> list[str]:
+        char_ids = [AMIYA_ID, FIAMMETTA_ID]
+        for index in range(len(char_ids), self.size.operators):
+            char_ids.append(f"char_{index + 100:03d}_synth{index}")
+        return char_ids
+
+    def make_name(self, index: int) -> str:
+        # 前两个字由序号决定, 保证名字不重复
+        base = len(NAME_CHARACTERS)
+        name = NAME_CHARACTERS[index // base % base] + NAME_CHARACTERS[index % base]
+        if self.rng.random() < 0.3:
+            name += self.rng.choice(NAME_CHARACTERS)
+        return name
+
+    def station(self, char_id: str) -> dict:
+        ap = self.rng.randint(0, FULL_AP)
+        return {
+            "charId": char_id,
+            "ap": ap,
+            "lastApAddTime": self.store_ts - self.rng.randint(0, 3600),
+            "index": 0,
+            "bubble": {"normal": {"add": -1, "ts": 0}, "assist": {"add": -1, "ts": 0}},
+            "workTime": self.rng.randint(0, 86400),
+        }
+
+    def facility(self, slot_id: str, chars: list[str], **extra) -> dict:
+        return {
+            "slotId": slot_id,
+            "level": 3,
+            "chars": [self.station(char_id) for char_id in chars],
+        } | extra
+
+    def building(self) -> dict:
+        size = self.size
+        # 每个干员最多进驻一个设施, 菲亚梅塔总是在宿舍中
+        pool = [char_id for char_id in self.char_ids if char_id != FIAMMETTA_ID]
+        self.rng.shuffle(pool)
+        taken = iter(pool)
+
+        def take(count: int) -> list[str]:
+            return [next(taken) for _ in range(count)]
+
+        tired_chars = take(3)
+        dormitory_chars = [take(5) for _ in range(size.dormitories)]
+        dormitory_chars[0][-1] = FIAMMETTA_ID
+        trainer = next(taken)
+        # 专精中的干员需要精英二且有未专精满的技能
+        trainee = None
+        for char_id in taken:
+            if self.evolve[char_id] == 2 and min(self.mastery[char_id]) < 3:
+                trainee = {
+                    "charId": char_id,
+                    "targetSkill": self.mastery[char_id].index(min(self.mastery[char_id])),
+                    "ap": FULL_AP,
+                }
+                break
+        labor_value = self.rng.randint(0, 200)
+
+        return {
+            "control": self.facility("slot_34", take(5), slotState=2),
+            "meeting": self.facility(
+                "slot_36",
+                take(2),
+                clue={"own": self.rng.randint(0, 7), "received": 0, "dailyReward": False},
+                lastUpdateTime=self.store_ts,
+                completeWorkTime=-1,
+            ),
+            "hire": self.facility(
+                "slot_23",
+                take(1),
+                state=1,
+                refreshCount=self.rng.randint(0, 3),
+                completeWorkTime=self.now + self.rng.randint(-3600, 3600),
+                slotState=2,
+            ),
+            "powers": [self.facility(f"slot_{index}", take(1)) for index in range(size.powers)],
+            "tradings": [
+                self.facility(
+                    f"slot_{10 + index}",
+                    take(3),
+                    completeWorkTime=self.now + self.rng.randint(0, 7200),
+                    lastUpdateTime=self.store_ts,
+                    strategy="O_GOLD",
+                    stock=[
+                        {
+                            "instId": stock,
+                            "type": "O_GOLD",
+                            "delivery": [{"type": "MATERIAL", "id": "4001", "count": 500}],
+                        }
+                        for stock in range(self.rng.randint(0, 10))
+                    ],
+                    stockLimit=10,
+                )
+                for index in range(size.tradings)
+            ],
+            "manufactures": [
+                self.facility(
+                    f"slot_{20 + index}",
+                    take(3),
+                    completeWorkTime=self.now + self.rng.randint(0, 7200),
+                    lastUpdateTime=self.store_ts,
+                    formulaId="2",
+                    capacity=54,
+                    weight=self.rng.randint(0, 54),
+                    complete=self.rng.randint(0, 20),
+                    remain=self.rng.randint(0, 20),
+                    speed=1.0 + self.rng.random(),
+                )
+                for index in range(size.manufactures)
+            ],
+            "dormitories": [
+                self.facility(f"slot_{40 + index}", chars, comfort=5000)
+                for index, chars in enumerate(dormitory_chars)
+            ],
+            "tiredChars": [self.station(char_id) | {"ap": 0} for char_id in tired_chars],
+            "training": {
+                "slotId": "slot_7",
+                "level": 3,
+                "trainee": trainee,
+                "trainer": {"charId": trainer, "ap": FULL_AP},
+                "remainPoint": self.rng.randint(0, 30000),
+                "speed": round(1 + self.rng.random(), 2),
+                "lastUpdateTime": self.store_ts,
+                "remainSecs": self.rng.randint(0, 28800),
+                "slotState": 2,
+            },
+            "labor": {
+                "maxValue": 200,
+                "value": labor_value,
+                "lastUpdateTime": self.store_ts,
+                "remainSecs": 0 if labor_value == 200 else self.rng.randint(60, 36000),
+            },
+            "furniture": {"total": self.rng.randint(100, 3000)},
+        }
+
+    def player_info(self, uid: str) -> dict:
+        """
+        结构与 /api/v1/game/player/info 的 data 字段一致
+        """
+        rng = self.rng
+        ap_current = rng.randint(0, 135)
+        char_info_map = {
+            char_id: {
+                "id": char_id,
+                "name": name,
+                "nationId": rng.choice(["rhodes", "kazimierz", "laterano", "victoria"]),
+                "groupId": "",
+                "displayNumber": f"R{rng.randint(1, 999):03d}",
+                "rarity": rng.randint(0, 5),
+                "profession": rng.choice(PROFESSIONS),
+                "subProfessionId": f"sub{rng.randint(1, 60)}",
+            }
+            for char_id, name in self.names.items()
+        }
+        skins = [
+            f"{char_id}@skin{rng.randint(1, 3)}"
+            for char_id in rng.sample(self.char_ids, min(self.size.skins, len(self.char_ids)))
+        ]
+
+        return {
+            "currentTs": self.now,
+            "status": {
+                "uid": uid,
+                "name": f"博士{uid[-4:]}#{rng.randint(1000, 9999)}",
+                "level": rng.randint(1, 120),
+                "registerTs": self.now - rng.randint(86400, 5 * 365 * 86400),
+                "mainStageProgress": "",
+                "secretary": {"charId": AMIYA_ID, "skinId": f"{AMIYA_ID}#1"},
+                "resume": "",
+                "storeTs": self.store_ts,
+                "lastOnlineTs": self.store_ts - rng.randint(0, 86400),
+                "charCnt": len(self.char_ids),
+                "furnitureCnt": rng.randint(100, 3000),
+                "skinCnt": len(skins),
+                "ap": {
+                    "current": ap_current,
+                    "max": 135,
+                    "lastApAddTime": self.store_ts - rng.randint(0, 360),
+                    "completeRecoveryTime": self.store_ts + (135 - ap_current) * 360,
+                },
+            },
+            "assistChars": [
+                {"charId": char_id, "skinId": f"{char_id}#1", "level": 90, "evolvePhase": 2}
+                for char_id in rng.sample(self.char_ids, 3)
+            ],
+            "chars": [
+                {
+                    "charId": char_id,
+                    "skinId": f"{char_id}#1",
+                    "level": rng.randint(1, 90),
+                    "evolvePhase": self.evolve[char_id],
+                    "potentialRank": rng.randint(0, 5),
+                    "mainSkillLvl": rng.randint(1, 7),
+                    "skills": [
+                        {"id": f"skchr_{char_id}_{index}", "specializeLevel": level}
+                        for index, level in enumerate(self.mastery[char_id])
+                    ],
+                    "equip": [],
+                    "favorPercent": rng.randint(0, 200),
+                    "gainTime": self.now - rng.randint(0, 5 * 365 * 86400),
+                }
+                for char_id in self.char_ids
+            ],
+            "skins": [{"id": skin, "ts": self.now - rng.randint(0, 86400 * 365)} for skin in skins],
+            "building": self.building(),
+            "recruit": [
+                {
+                    "startTs": self.now - rng.randint(0, 32400),
+                    "finishTs": self.now + rng.randint(-3600, 32400),
+                    "state": 2,
+                }
+                if rng.random() < 0.75
+                else {"startTs": -1, "finishTs": -1, "state": 1}
+                for _ in range(4)
+            ],
+            "campaign": {
+                "records": [],
+                "reward": {"current": rng.randint(0, 1800), "total": 1800},
+            },
+            "tower": {
+                "records": [],
+                "reward": {
+                    "higherItem": {"current": rng.randint(0, 2), "total": 2},
+                    "lowerItem": {"current": rng.randint(0, 60), "total": 60},
+                    "termTs": self.now + 7 * 86400,
+                },
+            },
+            "routine": {
+                "daily": {"current": rng.randint(0, 10), "total": 10},
+                "weekly": {"current": rng.randint(0, 13), "total": 13},
+            },
+            "charInfoMap": char_info_map,
+            "skinInfoMap": {skin: {"id": skin, "brandId": "", "sortId": 0} for skin in skins},
+        }
+
+    def cultivate(self) -> dict:
+        """
+        结构与 /api/v1/game/cultivate/player 的 data 字段一致
+        """
+        rng = self.rng
+        item_ids = sorted(ITEM_MAPPING) + UNMAPPED_ITEMS
+        return {
+            "characters": [
+                {
+                    "id": char_id,
+                    "level": rng.randint(1, 90),
+                    "evolvePhase": self.evolve[char_id],
+                    "mainSkillLevel": rng.randint(1, 7),
+                    "skills": [
+                        {"id": f"skchr_{char_id}_{index}", "level": level}
+                        for index, level in enumerate(self.mastery[char_id])
+                    ],
+                    "equips": [],
+                    "potentialRank": rng.randint(0, 5),
+                    "favorPercent": rng.randint(0, 200),
+                }
+                for char_id in self.char_ids
+            ],
+            "items": [
+                {"id": item_id, "count": rng.randint(0, 9999)}
+                for item_id in rng.sample(item_ids, len(item_ids) * self.size.operators // 360)
+            ],
+        }
+
+    def character(self, uid: str) -> SyntheticCharacter:
+        return SyntheticCharacter(player_info=self.player_info(uid), cultivate=self.cultivate())
+
+    def maa_roster(self, player_info: dict, mismatches: int = 3) -> dict:
+        """
+        与当前进驻情况基本一致的 MAA 排班表, 其中有 mismatches 名干员与实际不符
+        """
+        building = player_info["building"]
+        names = {char_id: info["name"] for char_id, info in player_info["charInfoMap"].items()}
+
+        def room(facility: dict) -> dict:
+            return {"operators": [names[char["charId"]] for char in facility["chars"]]}
+
+        rooms = {
+            "control": [room(building["control"])],
+            "meeting": [room(building["meeting"])],
+            "hire": [room(building["hire"])],
+            "power": [room(facility) for facility in building["powers"]],
+            "trading": [room(facility) for facility in building["tradings"]],
+            "manufacture": [room(facility) for facility in building["manufactures"]],
+            "dormitory": [room(facility) for facility in building["dormitories"]],
+        }
+        # 设施的顺序与实际不一定相同
+        for key in ("power", "trading", "manufacture", "dormitory"):
+            self.rng.shuffle(rooms[key])
+        work_rooms = [rooms[key][0] for key in ("trading", "manufacture")]
+        for _ in range(mismatches):
+            operators = self.rng.choice(work_rooms)["operators"]
+            operators[self.rng.randrange(len(operators))] = self.rng.choice(list(names.values()))
+
+        return {
+            "title": "synthetic",
+            "plans": [
+                {
+                    "name": "全天",
+                    "period": [["00:00", "23:59"]],
+                    "Fiammetta": {"enable": True, "target": rooms["control"][0]["operators"][0]},
+                    "rooms": rooms,
+                }
+            ],
+        }
+
+
+__all__ = [
+    "PayloadGenerator",
+    "PayloadSize",
+    "SIZES",
+    "SyntheticCharacter",
+]
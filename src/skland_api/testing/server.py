@@ -0,0 +1,349 @@
+import asyncio
+import hashlib
+import math
+import random
+import secrets
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Literal, Self
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+from skland_api._httpd import HttpRequest, HttpResponse, serve_http
+from skland_api.api import sign
+
+from .payloads import PayloadGenerator, PayloadSizeName
+
+# 错误码, 形式与真实接口保持一致: as.hypergryph.com 使用 status/msg, zonai.skland.com 使用 code/message
+CODE_BAD_CREDENTIAL = 100
+CODE_BAD_SIGNATURE = 10000
+CODE_THROTTLED = 10001
+CODE_UNAUTHORIZED = 10002
+CODE_NOT_FOUND = 10003
+CODE_INJECTED = 10099
+
+# 允许的客户端时间戳偏差 (秒)
+MAX_TIMESTAMP_SKEW = 300
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class Latency:
+    """
+    constant: 固定为 value
+    uniform: 在 [value, upper] 中均匀分布
+    lognormal: 对数正态分布, value 为中位数, upper 为 p99
+
+    单位均为秒
+    """
+
+    kind: Literal["constant", "uniform", "lognormal"] = "constant"
+    value: float = 0
+    upper: float = 0
+
+    def sample(self, rng: random.Random) -> float:
+        match self.kind:
+            case "constant":
+                return self.value
+            case "uniform":
+                return rng.uniform(self.value, self.upper)
+            case "lognormal":
+                # p99 对应标准正态分布的 2.326 倍标准差
+                sigma = math.log(self.upper / self.value) / 2.326
+                return rng.lognormvariate(math.log(self.value), sigma)
+
+    @classmethod
+    def parse(cls, spec: str) -> Self:
+        """
+        "20" (固定 20ms), "uniform:10,50", "lognormal:30,200" (中位数 30ms, p99 200ms)
+        """
+        kind, _, values = spec.rpartition(":")
+        numbers = [float(value) / 1000 for value in values.split(",")]
+        match kind or "constant", numbers:
+            case "constant", [value]:
+                return cls(kind="constant", value=value)
+            case "uniform", [low, high] if 0 <= low <= high:
+                return cls(kind="uniform", value=low, upper=high)
+            case "lognormal", [median, p99] if 0 < median <= p99:
+                return cls(kind="lognormal", value=median, upper=p99)
+        raise ValueError(f"invalid latency spec: {spec!r}")
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class FakeAccount:
+    name: str
+    phone: str
+    password: str
+    token: str
+    cred: str
+    uids: tuple[str, ...]
+
+    def auth_info(self, tier: Literal["cred", "token", "password"] = "cred") -> dict:
+        """
+        auth.json 中的一项, 只包含 tier 对应的认证信息
+        """
+        match tier:
+            case "cred":
+                return {"cred": self.cred}
+            case "token":
+                return {"token": self.token}
+            case "password":
+                return {"phone": self.phone, "password": self.password}
+
+
+def make_fleet(size: int, characters: int = 1, seed: int = 0) -> list[FakeAccount]:
+    """
+    相同的参数总是生成相同的账号, 服务端与客户端可以各自生成
+    """
+
+    def digest(kind: str, index: int, length: int) -> str:
+        return hashlib.sha256(f"{seed}:{kind}:{index}".encode()).hexdigest()[:length]
+
+    return [
+        FakeAccount(
+            name=f"account-{index:05d}",
+            phone=f"1{index:010d}",
+            password=digest("password", index, 16),
+            token=digest("token", index, 24),
+            cred=digest("cred", index, 32),
+            uids=tuple(f"{index:05d}{slot:03d}" for slot in range(characters)),
+        )
+        for index in range(size)
+    ]
+
+
+@dataclass(kw_only=True, slots=True)
+class Faults:
+    """
+    error_rate: 返回服务端错误的概率
+    throttle_rate: 返回 429 限流的概率
+    """
+
+    error_rate: float = 0
+    throttle_rate: float = 0
+
+
+@dataclass(kw_only=True, slots=True)
+class ServerStats:
+    requests: Counter[str] = field(default_factory=Counter)
+    rejected: Counter[str] = field(default_factory=Counter)
+
+    def to_dict(self) -> dict:
+        return {"requests": dict(self.requests), "rejected": dict(self.rejected)}
+
+
+Route = Callable[[HttpRequest], Awaitable[HttpResponse]]
+
+
+class FakeSklandServer:
+    """
+    实现 SklandApi 所调用接口的本地服务器, 校验 SklandClientAuth 的签名,
+    可以注入延迟, 错误与限流. 仅用于测试与基准测试
+    """
+
+    def __init__(
+        self,
+        accounts: list[FakeAccount],
+        *,
+        latency: Latency = Latency(),
+        faults: Faults | None = None,
+        seed: int = 0,
+        size: PayloadSizeName = "medium",
+    ):
+        self.latency = latency
+        self.faults = faults or Faults()
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.size = size
+        self.stats = ServerStats()
+
+        self.by_phone = {account.phone: account for account in accounts}
+        self.by_token = {account.token: account for account in accounts}
+        self.by_cred = {account.cred: account for account in accounts}
+        # grant code -> account
+        self.grant_codes: dict[str, FakeAccount] = {}
+        # cred -> 签名用的 token
+        self.sessions: dict[str, str] = {}
+        self.checked_in: set[str] = set()
+        # uid -> (player_info, cultivate), 生成与编码的开销较大, 只生成一次
+        self.payloads: dict[str, tuple[HttpResponse, HttpResponse]] = {}
+
+        self.routes: dict[tuple[str, str], Route] = {
+            ("POST", "/user/auth/v1/token_by_phone_password"): self.token_by_phone_password,
+            ("POST", "/user/oauth2/v2/grant"): self.grant,
+            ("POST", "/api/v1/user/auth/generate_cred_by_code"): self.generate_cred_by_code,
+            ("GET", "/api/v1/auth/refresh"): self.refresh,
+            ("GET", "/api/v1/game/player/binding"): self.binding,
+            ("GET", "/api/v1/game/cultivate/player"): self.cultivate,
+            ("GET", "/api/v1/game/player/info"): self.player_info,
+            ("GET", "/api/v1/game/attendance"): self.attendance_status,
+            ("POST", "/api/v1/game/attendance"): self.attendance,
+        }
+        self.server: asyncio.Server | None = None
+
+    @staticmethod
+    def ok(data: dict) -> HttpResponse:
+        return HttpResponse.from_json({"code": 0, "message": "OK", "data": data})
+
+    @staticmethod
+    def fail(code: int, message: str, status: int = 200) -> HttpResponse:
+        return HttpResponse.from_json({"code": code, "message": message}, status=status)
+
+    async def handle(self, request: HttpRequest) -> HttpResponse:
+        if request.path == "/_fake/stats":
+            return HttpResponse.from_json(self.stats.to_dict())
+
+        if (route := self.routes.get((request.method, request.path))) is None:
+            return self.fail(CODE_NOT_FOUND, "接口不存在", status=404)
+        self.stats.requests[request.path] += 1
+
+        if delay := self.latency.sample(self.rng):
+            await asyncio.sleep(delay)
+
+        roll = self.rng.random()
+        if roll < self.faults.throttle_rate:
+            self.stats.rejected["throttled"] += 1
+            return self.fail(CODE_THROTTLED, "请求过于频繁", status=429)
+        if roll < self.faults.throttle_rate + self.faults.error_rate:
+            self.stats.rejected["injected"] += 1
+            return self.fail(CODE_INJECTED, "服务器内部错误", status=500)
+
+        return await route(request)
+
+    def verify(self, request: HttpRequest) -> FakeAccount | HttpResponse:
+        """
+        校验 cred 与签名, 成功时返回对应的账号
+        """
+        cred = request.headers.get("cred")
+        if (account := self.by_cred.get(cred)) is None or cred not in self.sessions:
+            self.stats.rejected["unauthorized"] += 1
+            return self.fail(CODE_UNAUTHORIZED, "用户未登录", status=401)
+
+        timestamp = request.headers.get("timestamp", "")
+        if not timestamp.isdigit() or abs(int(timestamp) - time.time()) > MAX_TIMESTAMP_SKEW:
+            self.stats.rejected["bad_signature"] += 1
+            return self.fail(CODE_BAD_SIGNATURE, "请求时间戳无效")
+
+        if request.method == "GET":
+            payload = urlsplit(request.target).query
+        else:
+            payload = request.body.decode("utf-8")
+        expected = sign(self.sessions[cred], request.path, payload, timestamp)
+        if request.headers.get("sign") != expected:
+            self.stats.rejected["bad_signature"] += 1
+            return self.fail(CODE_BAD_SIGNATURE, "签名校验失败")
+        return account
+
+    def verify_uid(self, request: HttpRequest) -> tuple[FakeAccount, str] | HttpResponse:
+        if isinstance(account := self.verify(request), HttpResponse):
+            return account
+        uid = request.query.get("uid") or (request.json().get("uid") if request.body else None)
+        if uid not in account.uids:
+            return self.fail(CODE_NOT_FOUND, "角色不存在")
+        return account, uid
+
+    async def token_by_phone_password(self, request: HttpRequest) -> HttpResponse:
+        body = request.json()
+        account = self.by_phone.get(body.get("phone"))
+        if account is None or account.password != body.get("password"):
+            return HttpResponse.from_json({"status": CODE_BAD_CREDENTIAL, "msg": "密码错误"})
+        return HttpResponse.from_json({"status": 0, "msg": "OK", "data": {"token": account.token}})
+
+    async def grant(self, request: HttpRequest) -> HttpResponse:
+        if (account := self.by_token.get(request.json().get("token"))) is None:
+            return HttpResponse.from_json({"status": CODE_BAD_CREDENTIAL, "msg": "登录已过期"})
+        code = secrets.token_hex(8)
+        self.grant_codes[code] = account
+        return HttpResponse.from_json({"status": 0, "msg": "OK", "data": {"code": code}})
+
+    async def generate_cred_by_code(self, request: HttpRequest) -> HttpResponse:
+        if (account := self.grant_codes.pop(request.json().get("code"), None)) is None:
+            return self.fail(CODE_UNAUTHORIZED, "授权码无效")
+        token = self.sessions[account.cred] = secrets.token_hex(12)
+        return self.ok({"cred": account.cred, "token": token})
+
+    async def refresh(self, request: HttpRequest) -> HttpResponse:
+        if (cred := request.headers.get("cred")) not in self.by_cred:
+            return self.fail(CODE_UNAUTHORIZED, "用户未登录", status=401)
+        token = self.sessions[cred] = secrets.token_hex(12)
+        return self.ok({"token": token})
+
+    async def binding(self, request: HttpRequest) -> HttpResponse:
+        if isinstance(account := self.verify(request), HttpResponse):
+            return account
+        return self.ok(
+            {
+                "list": [
+                    {
+                        "appCode": "arknights",
+                        "bindingList": [
+                            {"uid": uid, "gameName": "明日方舟", "nickName": account.name}
+                            for uid in account.uids
+                        ],
+                    }
+                ]
+            }
+        )
+
+    def character(self, uid: str) -> tuple[HttpResponse, HttpResponse]:
+        if (responses := self.payloads.get(uid)) is None:
+            character = PayloadGenerator(f"{self.seed}:{uid}", self.size).character(uid)
+            responses = self.payloads[uid] = (
+                self.ok(character.player_info),
+                self.ok(character.cultivate),
+            )
+        return responses
+
+    async def cultivate(self, request: HttpRequest) -> HttpResponse:
+        if isinstance(result := self.verify_uid(request), HttpResponse):
+            return result
+        _, uid = result
+        return self.character(uid)[1]
+
+    async def player_info(self, request: HttpRequest) -> HttpResponse:
+        if isinstance(result := self.verify_uid(request), HttpResponse):
+            return result
+        _, uid = result
+        return self.character(uid)[0]
+
+    async def attendance_status(self, request: HttpRequest) -> HttpResponse:
+        if isinstance(result := self.verify_uid(request), HttpResponse):
+            return result
+        _, uid = result
+        records = [{"ts": str(int(time.time()))}] if uid in self.checked_in else []
+        return self.ok({"records": records})
+
+    async def attendance(self, request: HttpRequest) -> HttpResponse:
+        if isinstance(result := self.verify_uid(request), HttpResponse):
+            return result
+        _, uid = result
+        if uid in self.checked_in:
+            return self.fail(CODE_THROTTLED, "请勿重复签到")
+        self.checked_in.add(uid)
+        return self.ok({"awards": [{"resource": {"name": "龙门币"}, "count": 500}]})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        返回服务器的 base url, port 为 0 时使用随机端口
+        """
+        self.server = await serve_http(self.handle, host, port, backlog=4096)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        logger.info(f"fake skland server listening on http://{host}:{port}")
+        return f"http://{host}:{port}"
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+
+__all__ = [
+    "FakeAccount",
+    "FakeSklandServer",
+    "Faults",
+    "Latency",
+    "make_fleet",
+]
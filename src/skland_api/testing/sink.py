@@ -0,0 +1,50 @@
+import asyncio
+
+from loguru import logger
+
+from skland_api._httpd import HttpRequest, HttpResponse, serve_http
+
+
+class WebhookRecorder:
+    """
+    代替通知 webhook 的本地服务器, 记录收到的每个负载. 前 fail_first 个请求返回 fail_status,
+    用于测试重试. 仅用于测试
+    """
+
+    def __init__(self, *, fail_first: int = 0, fail_status: int = 503):
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests = 0
+        self.payloads: list[dict] = []
+        self.received = asyncio.Event()
+        self.server: asyncio.Server | None = None
+
+    async def handle(self, request: HttpRequest) -> HttpResponse:
+        if request.method != "POST":
+            return HttpResponse(status=405)
+        self.requests += 1
+        if self.requests <= self.fail_first:
+            return HttpResponse(status=self.fail_status)
+        self.payloads.append(request.json())
+        self.received.set()
+        return HttpResponse.from_json({"ok": True})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        返回 webhook 的 url, port 为 0 时使用随机端口
+        """
+        self.server = await serve_http(self.handle, host, port)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        logger.info(f"webhook recorder listening on http://{host}:{port}")
+        return f"http://{host}:{port}/webhook"
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+
+__all__ = [
+    "WebhookRecorder",
+]
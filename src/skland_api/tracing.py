@@ -0,0 +1,164 @@
+import json
+import random
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager
+from pathlib import Path
+
+from .instrumentation import (
+    Instrument,
+    PhaseEvent,
+    RequestEvent,
+    SpanContext,
+    account_hash,
+    attach,
+    current_context,
+    phase,
+)
+
+
+class FileSpanExporter:
+    """
+    以 JSON Lines 追加写入文件, 每行一个 span, 字段命名参照 OTLP/JSON
+    """
+
+    def __init__(self, file: Path):
+        self.file = file
+
+    def export(self, spans: list[dict]) -> None:
+        with self.file.open("a", encoding="utf-8") as fp:
+            for span in spans:
+                fp.write(json.dumps(span, ensure_ascii=False))
+                fp.write("\n")
+
+
+class Tracer(Instrument):
+    """
+    将阶段与请求转换为 span. 账号名只以摘要 (account.hash) 的形式导出
+    """
+
+    def __init__(self, exporter: FileSpanExporter, batch_size: int = 256):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.buffer: list[dict] = []
+        # perf_counter 读数 -> Unix 时间 (纳秒)
+        self.offset_ns = time.time_ns() - int(time.perf_counter() * 1e9)
+
+    def make_span(
+        self,
+        *,
+        name: str,
+        context: SpanContext,
+        span_id: int,
+        parent: SpanContext | None,
+        start: float,
+        wall: float,
+        attributes: dict,
+        error: BaseException | None,
+    ) -> dict:
+        start_ns = self.offset_ns + int(start * 1e9)
+        span = {
+            "traceId": f"{context.trace_id:032x}",
+            "spanId": f"{span_id:016x}",
+            "parentSpanId": f"{parent.span_id:016x}" if parent is not None else "",
+            "name": name,
+            "startTimeUnixNano": start_ns,
+            "endTimeUnixNano": start_ns + int(wall * 1e9),
+            "attributes": attributes,
+            "status": {"code": "OK"},
+        }
+        if error is not None:
+            span["status"] = {"code": "ERROR", "message": f"{type(error).__name__}: {error}"}
+        return span
+
+    def emit(self, span: dict) -> None:
+        self.buffer.append(span)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.exporter.export(self.buffer)
+            self.buffer = []
+
+    def phase_finished(self, event: PhaseEvent) -> None:
+        attributes = dict(event.attributes)
+        if event.account is not None:
+            attributes["account.hash"] = account_hash(event.account)
+        if event.module is not None:
+            attributes["module"] = event.module
+        if event.cpu is not None:
+            attributes["cpu_ms"] = round(event.cpu * 1000, 3)
+        self.emit(
+            self.make_span(
+                name=event.name,
+                context=event.context,
+                span_id=event.context.span_id,
+                parent=event.parent,
+                start=event.start,
+                wall=event.wall,
+                attributes=attributes,
+                error=event.error,
+            )
+        )
+
+    def request_finished(self, event: RequestEvent) -> None:
+        attributes = {
+            "http.method": event.method,
+            "http.host": event.host,
+            "endpoint": event.endpoint,
+            "http.status_code": event.status_code,
+            "response.size": event.size,
+        }
+        if event.account is not None:
+            attributes["account.hash"] = account_hash(event.account)
+        if event.error_code is not None:
+            attributes["skland.code"] = event.error_code
+        context = event.parent or SpanContext(trace_id=random.getrandbits(128), span_id=0, depth=-1)
+        self.emit(
+            self.make_span(
+                name=f"{event.method} {event.endpoint}",
+                context=context,
+                span_id=random.getrandbits(64),
+                parent=event.parent,
+                start=event.start,
+                wall=event.wall,
+                attributes=attributes,
+                error=event.error,
+            )
+        )
+
+
+def span(name: str, **attributes) -> AbstractContextManager[None]:
+    """
+    在用户代码中创建 span, 在库的阶段中调用时会成为其子 span
+    """
+    return phase(name, attributes=attributes)
+
+
+def traceparent() -> str | None:
+    """
+    当前上下文的 W3C traceparent, 可传递给用户自己的下游调用
+    """
+    if (context := current_context.get()) is None:
+        return None
+    return f"00-{context.trace_id:032x}-{context.span_id:016x}-01"
+
+
+@contextmanager
+def continue_trace(traceparent: str) -> Iterator[None]:
+    """
+    在外部的 trace 中执行, 其中产生的 span 以 traceparent 所指的 span 为父 span
+    """
+    _, trace_id, span_id, _ = traceparent.split("-")
+    with attach(SpanContext(trace_id=int(trace_id, 16), span_id=int(span_id, 16), depth=-1)):
+        yield
+
+
+__all__ = [
+    "FileSpanExporter",
+    "Tracer",
+    "continue_trace",
+    "span",
+    "traceparent",
+]
@@ -0,0 +1,260 @@
+import asyncio
+import gzip
+import json
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Self
+
+import httpx
+
+from .instrumentation import account_hash, current_account
+
+if TYPE_CHECKING:
+    from .api import SklandApi
+
+ARCHIVE_VERSION = 1
+# 响应 data 中需要脱敏的字段
+REDACTED_FIELDS = ("token", "cred", "code")
+# 回放时保留的响应头
+KEPT_HEADERS = ("content-type",)
+
+
+class RedirectTransport(httpx.AsyncBaseTransport):
+    """
+    将所有请求转发到 base_url, 保留原有的路径与查询参数, 用于本地的测试服务器
+    """
+
+    def __init__(self, base_url: str, transport: httpx.AsyncBaseTransport | None = None):
+        self.base_url = httpx.URL(base_url)
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(
+            scheme=self.base_url.scheme,
+            host=self.base_url.host,
+            port=self.base_url.port,
+        )
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class Exchange:
+    """
+    一次请求与响应, 请求只记录用于匹配的部分
+
+    account: 发起请求的账号名摘要, 不在账号上下文中时为 None
+    start: 相对于录制开始的时间 (秒)
+    elapsed: 请求耗时 (秒)
+    """
+
+    account: str | None
+    method: str
+    url: str
+    status: int
+    headers: dict[str, str]
+    content: str
+    start: float
+    elapsed: float
+
+    @property
+    def key(self) -> tuple[str | None, str, str]:
+        return self.account, self.method, self.url
+
+
+def redact(content: bytes) -> str:
+    """
+    将响应中的 token, cred 与授权码替换为等长的占位符, 非 JSON 响应原样保留
+    """
+    text = content.decode("utf-8", errors="replace")
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return text
+    if not isinstance(data, dict) or not isinstance(payload := data.get("data"), dict):
+        return text
+    redacted = False
+    for key in REDACTED_FIELDS:
+        if isinstance(value := payload.get(key), str):
+            payload[key] = "*" * len(value)
+            redacted = True
+    if not redacted:
+        return text
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class Archive:
+    """
+    录制的请求与响应, 以 gzip 压缩的 JSON Lines 保存, 第一行为文件头
+
+    captured_at: 录制的时间 (最后一个响应到达时的时间戳), 回放时模块以此作为 evaluation_clock.
+        录制中或者读取不含该字段的旧文件时为 None
+    """
+
+    def __init__(self, exchanges: list[Exchange] | None = None, captured_at: int | None = None):
+        self.exchanges = exchanges or []
+        self.captured_at = captured_at
+        self.origin = time.perf_counter()
+        self.started_at = time.time()
+
+    def add(self, exchange: Exchange) -> None:
+        self.exchanges.append(exchange)
+
+    def save(self, file: Path) -> None:
+        end = max((exchange.start + exchange.elapsed for exchange in self.exchanges), default=0)
+        header = {
+            "version": ARCHIVE_VERSION,
+            "exchanges": len(self.exchanges),
+            "captured_at": int(self.started_at + end),
+        }
+        with gzip.open(file, "wt", encoding="utf-8") as fp:
+            fp.write(json.dumps(header))
+            fp.write("\n")
+            for exchange in sorted(self.exchanges, key=lambda exchange: exchange.start):
+                fp.write(json.dumps(asdict(exchange), ensure_ascii=False, separators=(",", ":")))
+                fp.write("\n")
+
+    @classmethod
+    def load(cls, file: Path) -> Self:
+        with gzip.open(file, "rt", encoding="utf-8") as fp:
+            header = json.loads(fp.readline())
+            if header.get("version") != ARCHIVE_VERSION:
+                raise ValueError(f"unsupported archive version: {header.get('version')!r}")
+            return cls(
+                [Exchange(**json.loads(line)) for line in fp],
+                captured_at=header.get("captured_at"),
+            )
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """
+    将经过的请求与响应 (脱敏后) 记录到 archive 中, 多个客户端可以共享同一个 archive
+    """
+
+    def __init__(self, archive: Archive, transport: httpx.AsyncBaseTransport | None = None):
+        self.archive = archive
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # 内层的 transport 可能会改写 request.url
+        url = str(request.url)
+        start = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        content = await response.aread()
+        account = current_account.get()
+        self.archive.add(
+            Exchange(
+                account=account_hash(account) if account is not None else None,
+                method=request.method,
+                url=url,
+                status=response.status_code,
+                headers={
+                    key: value for key, value in response.headers.items() if key in KEPT_HEADERS
+                },
+                content=redact(content),
+                start=start - self.archive.origin,
+                elapsed=time.perf_counter() - start,
+            )
+        )
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class ReplayMissError(httpx.TransportError):
+    pass
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    按 (账号, 方法, URL) 依次返回录制的响应, 不访问网络
+
+    latency_scale: 录制的耗时的倍数, 0 为不等待, 1 为按原始耗时回放
+    """
+
+    def __init__(self, archive: Archive, latency_scale: float = 0):
+        self.latency_scale = latency_scale
+        self.queues: dict[tuple[str | None, str, str], deque[Exchange]] = defaultdict(deque)
+        for exchange in archive.exchanges:
+            self.queues[exchange.key].append(exchange)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        account = current_account.get()
+        key = (
+            account_hash(account) if account is not None else None,
+            request.method,
+            str(request.url),
+        )
+        if not (queue := self.queues.get(key)):
+            raise ReplayMissError(
+                f"no recorded response for {request.method} {request.url}", request=request
+            )
+        exchange = queue.popleft()
+        if self.latency_scale:
+            await asyncio.sleep(exchange.elapsed * self.latency_scale)
+        return httpx.Response(
+            status_code=exchange.status,
+            headers=exchange.headers,
+            content=exchange.content.encode("utf-8"),
+            request=request,
+        )
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class ApiFactory:
+    """
+    按传输相关的设置创建 SklandApi, 可以 pickle 后传递给子进程. 不携带认证信息与配置
+
+    api_base_url: 非空时所有请求都发送到该地址
+    record_archive / replay_archive: 录制到该 archive, 或者从中回放而不访问网络
+    """
+
+    api_base_url: str | None = None
+    record_archive: Archive | None = None
+    replay_archive: Archive | None = None
+    replay_latency_scale: float = 0
+
+    def _chain(self) -> httpx.AsyncBaseTransport | None:
+        if self.replay_archive is not None:
+            return ReplayTransport(self.replay_archive, self.replay_latency_scale)
+        transport = None
+        if self.api_base_url is not None:
+            transport = RedirectTransport(self.api_base_url)
+        if self.record_archive is not None:
+            transport = RecordingTransport(self.record_archive, transport)
+        return transport
+
+    def transport(self) -> httpx.AsyncBaseTransport:
+        """
+        创建可以由多个 SklandApi 共享的 transport (及其连接池), 调用方负责在结束后 aclose
+        """
+        if (transport := self._chain()) is None:
+            return httpx.AsyncHTTPTransport()
+        return transport
+
+    def __call__(self, transport: httpx.AsyncBaseTransport | None = None) -> SklandApi:
+        """
+        transport: 由 transport() 创建的共享 transport, 此时复用连接.
+            缺省时 SklandApi 使用独占的 transport, 每个请求结束后关闭连接
+        """
+        from .api import SklandApi
+
+        if transport is None:
+            return SklandApi(self._chain())
+        return SklandApi(transport, keep_alive=True)
+
+
+__all__ = [
+    "ApiFactory",
+    "Archive",
+    "Exchange",
+    "RecordingTransport",
+    "RedirectTransport",
+    "ReplayMissError",
+    "ReplayTransport",
+]
@@ -0,0 +1,147 @@
+"""
+角色的共享中间结果
+
+视图是由 CharacterInfo 派生的具名数据 (如基建进驻情况, 玩家状态), 每个角色最多计算一次,
+结果由所有使用它的模块共享:
+
+    @view("depot_value", requires=("status",))
+    def depot_value(character_info: CharacterInfo) -> int: ...
+
+    @uses("depot_value")
+    def main(character_info: CharacterInfo, config: dict | None):
+        value = character_info.view("depot_value")
+
+视图之间通过 requires, 模块通过 uses 显式声明依赖. 执行模块的一方可以据此用 resolve 得到拓扑顺序,
+在并行执行模块之前按顺序准备好所需的视图.
+"""
+
+import threading
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .models import CharacterInfo
+    from .models.building import InfrastPresence, TrainingState
+    from .models.status import PlayerStatus
+
+# 模块声明的视图保存在入口函数的该属性上
+USES_ATTRIBUTE = "__skland_views__"
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class ViewSpec:
+    name: str
+    func: Callable[[CharacterInfo], Any]
+    requires: tuple[str, ...]
+
+
+registry: dict[str, ViewSpec] = {}
+
+
+def view[F: Callable](name: str, *, requires: Sequence[str] = ()) -> Callable[[F], F]:
+    def decorator(func: F) -> F:
+        if name in registry:
+            raise ValueError(f"view {name!r} is already registered")
+        registry[name] = ViewSpec(name=name, func=func, requires=tuple(requires))
+        return func
+
+    return decorator
+
+
+def uses[F: Callable](*names: str) -> Callable[[F], F]:
+    def decorator(func: F) -> F:
+        setattr(func, USES_ATTRIBUTE, names)
+        return func
+
+    return decorator
+
+
+def declared_views(entry: Callable) -> tuple[str, ...]:
+    return getattr(entry, USES_ATTRIBUTE, ())
+
+
+def resolve(names: Iterable[str]) -> list[str]:
+    """
+    返回 names 及其依赖的拓扑顺序 (依赖在前). 视图不存在或存在循环依赖时抛出 ValueError
+    """
+    order: list[str] = []
+    visiting: set[str] = set()
+
+    def visit(name: str, path: tuple[str, ...]) -> None:
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"circular view dependency: {' -> '.join((*path, name))}")
+        if (spec := registry.get(name)) is None:
+            raise ValueError(
+                f"unknown view {name!r}" + (f" required by {path[-1]!r}" if path else "")
+            )
+        visiting.add(name)
+        for dependency in spec.requires:
+            visit(dependency, (*path, name))
+        visiting.remove(name)
+        order.append(name)
+
+    for name in names:
+        visit(name, ())
+    return order
+
+
+def get_view(character_info: CharacterInfo, name: str) -> Any:
+    """
+    与 locked_cached_property 相同, 多个线程同时首次访问时只计算一次, 结果保存在实例的 __dict__ 中
+    """
+    cache = character_info.__dict__.setdefault("_views", {})
+    if name in cache:
+        return cache[name]
+    locks = character_info.__dict__.setdefault("_view_locks", {})
+    with locks.setdefault(name, threading.Lock()):
+        if name in cache:
+            return cache[name]
+        spec = registry[name]
+        for dependency in spec.requires:
+            get_view(character_info, dependency)
+        value = cache[name] = spec.func(character_info)
+        return value
+
+
+def prepare(character_info: CharacterInfo, order: Sequence[str]) -> None:
+    """
+    按 resolve 返回的顺序计算视图
+    """
+    for name in order:
+        get_view(character_info, name)
+
+
+@view("status")
+def status(character_info: CharacterInfo) -> PlayerStatus:
+    from .models.status import PlayerStatus
+
+    return PlayerStatus.from_character_info(character_info)
+
+
+@view("infrast_presence")
+def infrast_presence(character_info: CharacterInfo) -> InfrastPresence:
+    from .models.building import InfrastPresence
+
+    return InfrastPresence.from_character_info(character_info)
+
+
+@view("training", requires=("status",))
+def training(character_info: CharacterInfo) -> TrainingState | None:
+    from .models.building import TrainingState
+
+    return TrainingState.from_character_info(character_info, character_info.view("status").store_at)
+
+
+__all__ = [
+    "ViewSpec",
+    "declared_views",
+    "get_view",
+    "prepare",
+    "registry",
+    "resolve",
+    "uses",
+    "view",
+]
@@ -0,0 +1,101 @@
+"""
+batch.evaluate 与逐个角色调用模块 main 的结果必须逐位一致
+"""
+
+import unittest
+
+from skland_api import views
+from skland_api.batch import evaluate
+from skland_api.models import CharacterInfo, evaluation_clock
+from skland_api.modules import infrast_basic, recruit, routine, sanity
+from skland_api.testing.payloads import PayloadGenerator
+
+MODULES = {
+    "sanity": sanity.main,
+    "recruit": recruit.main,
+    "routine": routine.main,
+    "infrast_basic": infrast_basic.main,
+}
+
+
+def make_character_infos(generator: PayloadGenerator, count: int) -> list[CharacterInfo]:
+    character_infos = []
+    for index in range(count):
+        uid = str(10000001 + index)
+        character = generator.character(uid)
+        character_infos.append(
+            CharacterInfo(
+                name=f"test-{index}",
+                api=None,
+                uid=uid,
+                cultivate=character.cultivate,
+                player_info=character.player_info,
+            )
+        )
+    return character_infos
+
+
+def make_edge_cases(generator: PayloadGenerator) -> list[CharacterInfo]:
+    """
+    理智超限, 空闲与招募中的公招位, 刷新次数已满与正在恢复, 无人机已满 (remainSecs 为 0), 有无专精
+    """
+    character_infos = make_character_infos(generator, 4)
+    first, second, third, fourth = (
+        character_info.player_info for character_info in character_infos
+    )
+
+    first["status"]["ap"]["current"] = 200
+    first["recruit"] = [{"startTs": -1, "finishTs": -1, "state": 1}] * 4
+    first["building"]["hire"]["refreshCount"] = 3
+    first["building"]["labor"] |= {"value": 200, "remainSecs": 0}
+    first["building"]["training"]["trainee"] = None
+
+    second["status"]["ap"]["current"] = 135
+    second["recruit"] = [
+        {"startTs": generator.now - 600, "finishTs": generator.now + 600, "state": 2},
+        {"startTs": -1, "finishTs": -1, "state": 1},
+        {"startTs": generator.now - 7200, "finishTs": generator.now - 60, "state": 2},
+        {"startTs": -1, "finishTs": -1, "state": 1},
+    ]
+    second["building"]["hire"] |= {"refreshCount": 0, "completeWorkTime": generator.now - 60}
+    second["building"]["labor"] |= {"value": 12, "remainSecs": 30000}
+
+    third["status"]["ap"]["current"] = 0
+    third["building"]["hire"] |= {"refreshCount": 2, "completeWorkTime": generator.now + 60}
+    third["building"]["labor"] |= {"value": 0, "remainSecs": 1}
+    third["building"]["training"] |= {"remainPoint": 0, "remainSecs": 0}
+
+    fourth["building"]["training"]["trainee"] = None
+    return character_infos
+
+
+class BatchEquivalenceTest(unittest.TestCase):
+    def setUp(self):
+        generator = PayloadGenerator("test-batch", "small")
+        self.now = generator.now
+        self.character_infos = make_edge_cases(generator) + make_character_infos(generator, 16)
+        order = views.resolve(["status", "training"])
+        for character_info in self.character_infos:
+            views.prepare(character_info, order)
+
+    def test_matches_scalar(self):
+        # 数据刚更新, 公招刷新的前后, 无人机与专精已完成, 跨过剿灭作战重置
+        for offset in (0, 120, 36000, 8 * 86400):
+            for module_name, main in MODULES.items():
+                with (
+                    self.subTest(module=module_name, offset=offset),
+                    evaluation_clock(self.now + offset),
+                ):
+                    expected = [
+                        main(character_info, None) for character_info in self.character_infos
+                    ]
+                    self.assertEqual(evaluate(module_name, self.character_infos), expected)
+
+    def test_covers_training_states(self):
+        trainings = [character_info.view("training") for character_info in self.character_infos]
+        self.assertIn(None, trainings)
+        self.assertTrue(any(training is not None for training in trainings))
+
+
+if __name__ == "__main__":
+    unittest.main()
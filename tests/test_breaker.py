@@ -0,0 +1,191 @@
+"""
+CircuitBreaker 的打开条件, 半开探测与过期请求, 通过替换 time.monotonic 控制时间
+"""
+
+import unittest
+from typing import Any
+from unittest import mock
+
+from skland_api import breaker
+from skland_api.breaker import BreakerPolicy, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch.object(breaker.time, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_breaker(self, **kwargs) -> CircuitBreaker:
+        options = {"consecutive_failures": 3, "window": 10, "min_requests": 5} | kwargs
+        return CircuitBreaker("example.com", "/api", BreakerPolicy(**options))
+
+    def record_failures(self, circuit: CircuitBreaker, count: int = 1) -> None:
+        for _ in range(count):
+            circuit.record(False, circuit.acquire())
+
+    def record_successes(self, circuit: CircuitBreaker, count: int = 1) -> None:
+        for _ in range(count):
+            circuit.record(True, circuit.acquire())
+
+    def open_and_wait(self, circuit: CircuitBreaker) -> None:
+        self.record_failures(circuit, circuit.policy.consecutive_failures)
+        self.assertEqual(circuit.state, "open")
+        self.clock.now += circuit.policy.reset_timeout
+
+    def test_consecutive_failures(self):
+        circuit = self.make_breaker(error_rate=1)
+        self.record_failures(circuit, 2)
+        self.record_successes(circuit)
+        self.record_failures(circuit, 2)
+        self.assertEqual(circuit.state, "closed")
+        self.record_failures(circuit)
+        self.assertEqual(circuit.state, "open")
+        with self.assertRaises(CircuitOpenError) as raised:
+            circuit.acquire()
+        self.assertAlmostEqual(raised.exception.retry_after, circuit.policy.reset_timeout)
+        self.assertEqual(circuit.rejected, 1)
+
+    def test_error_rate_waits_for_min_requests(self):
+        circuit = self.make_breaker(consecutive_failures=10, error_rate=0.5, min_requests=6)
+        # 失败率 2/4 已达到阈值, 但请求数不足 min_requests
+        for success in (False, True, False, True):
+            circuit.record(success, circuit.acquire())
+        self.assertEqual(circuit.state, "closed")
+        self.record_successes(circuit)
+        self.assertEqual(circuit.state, "closed")
+        # 3/6
+        self.record_failures(circuit)
+        self.assertEqual(circuit.state, "open")
+
+    def test_error_rate_uses_recent_window(self):
+        circuit = self.make_breaker(
+            consecutive_failures=10, error_rate=0.5, window=4, min_requests=4
+        )
+        self.record_failures(circuit)
+        self.record_successes(circuit, 4)
+        # 最早的失败已移出窗口, 最近 4 次中失败 1 次
+        self.record_failures(circuit)
+        self.assertEqual(circuit.state, "closed")
+        self.record_failures(circuit)
+        self.assertEqual(circuit.state, "open")
+
+    def test_half_open_after_reset_timeout(self):
+        circuit = self.make_breaker(reset_timeout=30)
+        self.record_failures(circuit, 3)
+        self.clock.now += 29
+        with self.assertRaises(CircuitOpenError):
+            circuit.acquire()
+        self.assertEqual(circuit.snapshot().state, "open")
+        self.clock.now += 1
+        self.assertEqual(circuit.snapshot().state, "half_open")
+        probe = circuit.acquire()
+        self.assertEqual(circuit.state, "half_open")
+        circuit.record(True, probe)
+        self.assertEqual(circuit.state, "closed")
+
+    def test_failed_probe_reopens(self):
+        circuit = self.make_breaker()
+        self.open_and_wait(circuit)
+        probe = circuit.acquire()
+        circuit.record(False, probe)
+        self.assertEqual(circuit.state, "open")
+        self.assertEqual(circuit.opened, 2)
+        with self.assertRaises(CircuitOpenError):
+            circuit.acquire()
+
+    def test_probe_limit(self):
+        circuit = self.make_breaker(half_open_probes=2)
+        self.open_and_wait(circuit)
+        first = circuit.acquire()
+        second = circuit.acquire()
+        self.assertIsNotNone(first)
+        self.assertEqual(first, second)
+        with self.assertRaises(CircuitOpenError) as raised:
+            circuit.acquire()
+        self.assertEqual(raised.exception.retry_after, 0)
+        circuit.record(True, first)
+        self.assertEqual(circuit.state, "closed")
+        # 熔断器已关闭, 另一个探测请求的结果按普通请求计入
+        circuit.record(False, second)
+        self.assertEqual(circuit.state, "closed")
+        self.assertEqual(circuit.consecutive, 1)
+
+    def test_cancelled_probe_releases_slot(self):
+        circuit = self.make_breaker()
+        self.open_and_wait(circuit)
+        requests = circuit.requests
+        probe = circuit.acquire()
+        with self.assertRaises(CircuitOpenError):
+            circuit.acquire()
+        circuit.record(None, probe)
+        self.assertEqual(circuit.state, "half_open")
+        self.assertEqual(circuit.requests, requests)
+        probe = circuit.acquire()
+        circuit.record(True, probe)
+        self.assertEqual(circuit.state, "closed")
+
+    def test_stale_request_does_not_change_state(self):
+        circuit = self.make_breaker()
+        # 打开之前发出, 在半开状态下才结束的请求
+        stale = [circuit.acquire() for _ in range(2)]
+        self.assertEqual(stale, [None, None])
+        self.open_and_wait(circuit)
+        probe = circuit.acquire()
+        circuit.record(True, stale[0])
+        self.assertEqual(circuit.state, "half_open")
+        circuit.record(False, stale[1])
+        self.assertEqual(circuit.state, "half_open")
+        self.assertEqual(circuit.probes, 1)
+        self.assertEqual(circuit.failures, 4)
+        circuit.record(True, probe)
+        self.assertEqual(circuit.state, "closed")
+
+    def test_probe_from_previous_opening_is_stale(self):
+        circuit = self.make_breaker(half_open_probes=2)
+        self.open_and_wait(circuit)
+        first = circuit.acquire()
+        second = circuit.acquire()
+        circuit.record(False, first)
+        self.assertEqual(circuit.state, "open")
+        self.clock.now += circuit.policy.reset_timeout
+        probe = circuit.acquire()
+        self.assertNotEqual(probe, second)
+        # 上一次打开时的探测请求既不关闭熔断器, 也不占用本次的探测名额
+        circuit.record(True, second)
+        self.assertEqual(circuit.state, "half_open")
+        self.assertEqual(circuit.probes, 1)
+        circuit.record(True, probe)
+        self.assertEqual(circuit.state, "closed")
+
+
+class BreakerPolicyTest(unittest.TestCase):
+    def test_rejects_invalid_policy(self):
+        cases: list[dict[str, Any]] = [
+            {"consecutive_failures": 0},
+            {"window": 0},
+            {"half_open_probes": 0},
+            {"error_rate": 0},
+            {"error_rate": 1.5},
+            {"reset_timeout": -1},
+            {"window": 5, "min_requests": 6},
+        ]
+        for options in cases:
+            with self.subTest(**options), self.assertRaises(ValueError):
+                BreakerPolicy(**options)
+
+    def test_min_requests_may_equal_window(self):
+        BreakerPolicy(window=5, min_requests=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""
+结果的逐字段比较, 已消失角色的 removed 记录与状态文件
+"""
+
+import json
+import tempfile
+import unittest
+from dataclasses import dataclass
+from pathlib import Path
+
+from skland_api.changes import Change, ChangeFeed, diff, to_plain
+from skland_api.models import Duration, TimeStamp, evaluation_clock
+
+NOW = 1_750_000_000
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class Result:
+    current: int
+    full_at: TimeStamp
+    full_in: Duration
+    tags: frozenset[str] = frozenset()
+
+
+class DiffTest(unittest.TestCase):
+    def test_nested_added_and_removed(self):
+        old = {"a": {"b": 1, "c": {"d": 2}}, "e": 3}
+        new = {"a": {"b": 1, "f": 4}, "e": 3, "g": {"h": 5}}
+        self.assertEqual(
+            list(diff(old, new)),
+            [
+                ("added", "a.f", None, 4),
+                ("removed", "a.c", {"d": 2}, None),
+                ("added", "g", None, {"h": 5}),
+            ],
+        )
+
+    def test_list_items(self):
+        self.assertEqual(
+            list(diff({"slots": [1, 2, 3]}, {"slots": [1, 5, 3]})),
+            [("changed", "slots.1", 2, 5)],
+        )
+        self.assertEqual(list(diff([{"a": 1}], [{"a": 2}])), [("changed", "0.a", 1, 2)])
+
+    def test_list_length_change_is_one_change(self):
+        self.assertEqual(
+            list(diff({"slots": [1, 2]}, {"slots": [1, 2, 3]})),
+            [("changed", "slots", [1, 2], [1, 2, 3])],
+        )
+        self.assertEqual(list(diff([1], [])), [("changed", "", [1], [])])
+
+    def test_unchanged(self):
+        value = {"a": [1, {"b": None}], "c": "d"}
+        self.assertEqual(list(diff(value, json.loads(json.dumps(value)))), [])
+
+
+class ToPlainTest(unittest.TestCase):
+    def test_excludes_countdowns(self):
+        result = Result(
+            current=10,
+            full_at=TimeStamp(NOW),
+            full_in=Duration(60),
+            tags=frozenset({"b", "a"}),
+        )
+        plain = to_plain(result)
+        self.assertEqual(plain, {"current": 10, "full_at": NOW, "tags": ["a", "b"]})
+        assert isinstance(plain, dict)
+        self.assertIs(type(plain["full_at"]), int)
+        self.assertEqual(
+            to_plain(result, ignore_countdowns=False),
+            {"current": 10, "full_at": NOW, "full_in": 60, "tags": ["a", "b"]},
+        )
+
+
+class ChangeFeedTest(unittest.TestCase):
+    def setUp(self):
+        self.changes: list[Change] = []
+
+    def observe(self, feed: ChangeFeed, name: str, uid: str, module: str, value: object) -> int:
+        with evaluation_clock(NOW):
+            return feed.observe(name, uid, module, value)
+
+    def result(self, current: int, full_in: int = 60) -> Result:
+        return Result(current=current, full_at=TimeStamp(NOW + full_in), full_in=Duration(full_in))
+
+    def test_added_then_changed(self):
+        feed = ChangeFeed(self.changes.append)
+        self.assertEqual(self.observe(feed, "a", "1", "sanity", self.result(10)), 1)
+        self.assertEqual(self.changes[0].kind, "added")
+        self.assertEqual(self.changes[0].path, "")
+        self.assertEqual(self.changes[0].at, NOW)
+        self.assertEqual(self.observe(feed, "a", "1", "sanity", self.result(10)), 0)
+        self.assertEqual(self.observe(feed, "a", "1", "sanity", self.result(12, 120)), 2)
+        self.assertEqual(
+            [(change.kind, change.path, change.old, change.new) for change in self.changes[1:]],
+            [("changed", "current", 10, 12), ("changed", "full_at", NOW + 60, NOW + 120)],
+        )
+        # 执行失败的模块不比较, 也不覆盖上一次的结果
+        self.assertEqual(self.observe(feed, "a", "1", "sanity", None), 0)
+        self.assertEqual(self.observe(feed, "a", "1", "sanity", self.result(12, 120)), 0)
+
+    def test_countdown_only_change_is_ignored(self):
+        feed = ChangeFeed(self.changes.append)
+        self.observe(feed, "a", "1", "sanity", self.result(10, 60))
+        self.changes.clear()
+        with evaluation_clock(NOW + 30):
+            # full_at 不变, 只有倒计时减少
+            value = Result(current=10, full_at=TimeStamp(NOW + 60), full_in=Duration(30))
+            self.assertEqual(feed.observe("a", "1", "sanity", value), 0)
+        self.assertEqual(self.changes, [])
+
+        feed = ChangeFeed(self.changes.append, ignore_countdowns=False)
+        self.observe(feed, "a", "1", "sanity", self.result(10, 60))
+        self.assertEqual(self.observe(feed, "a", "1", "sanity", value), 1)
+        self.assertEqual(self.changes[-1].path, "full_in")
+
+    def test_removed_only_for_observed_accounts(self):
+        feed = ChangeFeed(self.changes.append)
+        for name, uid in (("a", "1"), ("a", "2"), ("b", "3")):
+            self.observe(feed, name, uid, "sanity", {"current": 1})
+            self.observe(feed, name, uid, "recruit", {"slots": []})
+        feed.finish()
+        self.changes.clear()
+
+        # 本次运行只查询了账号 a, 其角色 2 已经不存在
+        self.observe(feed, "a", "1", "sanity", {"current": 1})
+        with evaluation_clock(NOW):
+            feed.finish()
+        removed = [change for change in self.changes if change.kind == "removed"]
+        self.assertEqual(
+            [(change.name, change.uid, change.module, change.old) for change in removed],
+            [("a", "2", "sanity", {"current": 1}), ("a", "2", "recruit", {"slots": []})],
+        )
+        self.assertEqual(set(feed.state["a"]), {"1"})
+        self.assertEqual(set(feed.state["b"]), {"3"})
+        # 失败的模块结果为 None 时角色仍视为存在
+        self.changes.clear()
+        self.observe(feed, "a", "1", "sanity", None)
+        feed.finish()
+        self.assertEqual(self.changes, [])
+
+    def test_state_round_trip(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            file = Path(workdir) / "changes-state.json"
+            with ChangeFeed.load(file, self.changes.append) as feed:
+                self.observe(feed, "a", "1", "sanity", self.result(10))
+                self.observe(feed, "a", "1", "recruit", {"slots": [{"state": 1}]})
+            self.assertEqual(len(self.changes), 2)
+            self.assertTrue(file.exists())
+
+            self.changes.clear()
+            with ChangeFeed.load(file, self.changes.append) as loaded:
+                self.assertEqual(loaded.state, feed.state)
+                self.assertEqual(self.observe(loaded, "a", "1", "sanity", self.result(10)), 0)
+                self.observe(loaded, "a", "1", "recruit", {"slots": [{"state": 2}]})
+            self.assertEqual(
+                [(change.kind, change.path) for change in self.changes],
+                [("changed", "slots.0.state")],
+            )
+
+    def test_invalid_state_starts_empty(self):
+        states = {
+            "not json": "{",
+            "not an object": "[]",
+            "wrong version": json.dumps({"version": 0, "results": {}}),
+            "missing results": json.dumps({"version": 1}),
+            "results not an object": json.dumps({"version": 1, "results": "x"}),
+            "account not an object": json.dumps({"version": 1, "results": {"a": "x"}}),
+            "character not an object": json.dumps({"version": 1, "results": {"a": {"1": []}}}),
+        }
+        with tempfile.TemporaryDirectory() as workdir:
+            file = Path(workdir) / "changes-state.json"
+            for case, content in states.items():
+                with self.subTest(case=case):
+                    file.write_text(content, encoding="utf-8")
+                    feed = ChangeFeed.load(file, self.changes.append)
+                    self.assertEqual(feed.state, {})
+                    self.assertEqual(feed.file, file)
+                    self.assertEqual(self.observe(feed, "a", "1", "sanity", {"current": 1}), 1)
+                    feed.finish()
+
+
+if __name__ == "__main__":
+    unittest.main()
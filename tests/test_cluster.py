@@ -0,0 +1,128 @@
+"""
+一致性哈希环的分配稳定性, 以及 worker 离开后 coordinator 重新分配账号
+"""
+
+import asyncio
+import unittest
+
+from skland_api.cluster import Coordinator, RunSpec
+from skland_api.cluster.ring import HashRing
+from skland_api.cluster.worker import Worker
+from skland_api.testing import FakeSklandServer, Latency, make_fleet
+from skland_api.transport import ApiFactory
+
+KEYS = [f"account-{index:05d}" for index in range(4000)]
+NODES = [f"worker-{index}" for index in range(5)]
+
+
+def owners(ring: HashRing) -> dict[str, str | None]:
+    return {key: ring.owner(key) for key in KEYS}
+
+
+class HashRingTest(unittest.TestCase):
+    def test_assignment_is_stable(self):
+        first = owners(HashRing(NODES))
+        self.assertEqual(owners(HashRing(reversed(NODES))), first)
+        ring = HashRing(NODES)
+        ring.add(NODES[0])
+        self.assertEqual(owners(ring), first)
+        # 节点离开后重新加入, 所有键回到原来的节点
+        ring.remove(NODES[2])
+        ring.add(NODES[2])
+        self.assertEqual(owners(ring), first)
+
+    def test_assign_keeps_order(self):
+        ring = HashRing(NODES)
+        assignment = ring.assign(KEYS)
+        self.assertEqual(set(assignment), set(NODES))
+        self.assertEqual(sorted(key for keys in assignment.values() for key in keys), KEYS)
+        for node, keys in assignment.items():
+            self.assertEqual(keys, sorted(keys))
+            self.assertTrue(all(ring.owner(key) == node for key in keys))
+
+    def test_join_moves_about_one_nth(self):
+        ring = HashRing(NODES[:-1])
+        before = owners(ring)
+        ring.add(NODES[-1])
+        after = owners(ring)
+        moved = [key for key in KEYS if before[key] != after[key]]
+        # 只有落在新节点上的键改变归属
+        self.assertTrue(all(after[key] == NODES[-1] for key in moved))
+        self.assertAlmostEqual(len(moved) / len(KEYS), 1 / len(NODES), delta=0.08)
+
+    def test_leave_moves_about_one_nth(self):
+        ring = HashRing(NODES)
+        before = owners(ring)
+        ring.remove(NODES[1])
+        after = owners(ring)
+        moved = [key for key in KEYS if before[key] != after[key]]
+        # 只有原来属于离开的节点的键改变归属
+        self.assertEqual(moved, [key for key in KEYS if before[key] == NODES[1]])
+        self.assertAlmostEqual(len(moved) / len(KEYS), 1 / len(NODES), delta=0.08)
+
+    def test_empty_ring(self):
+        ring = HashRing()
+        self.assertIsNone(ring.owner("account"))
+        ring.add("worker")
+        ring.remove("worker")
+        self.assertIsNone(ring.owner("account"))
+        self.assertEqual(ring.points, [])
+
+
+class CoordinatorTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        fleet = make_fleet(8, seed=3)
+        # 每个请求 100ms, 停止 worker 时其账号都尚未完成
+        self.server = FakeSklandServer(fleet, latency=Latency.parse("constant:100"), size="small")
+        self.api_factory = ApiFactory(api_base_url=await self.server.start())
+        self.addAsyncCleanup(self.server.close)
+        self.coordinator = Coordinator(
+            {account.name: account.auth_info() for account in fleet},
+            RunSpec(modules=["sanity", "recruit"], module_config={}),
+            token="test-token",
+            min_workers=2,
+            heartbeat_timeout=2,
+        )
+        self.url = await self.coordinator.start()
+        self.addAsyncCleanup(self.coordinator.close, grace=1)
+
+    def make_worker(self, worker_id: str) -> Worker:
+        return Worker(
+            self.url,
+            worker_id,
+            token="test-token",
+            interval=0.05,
+            api_factory=self.api_factory,
+        )
+
+    async def test_stopped_worker_is_reassigned(self):
+        first, second = self.make_worker("first"), self.make_worker("second")
+        first_run = asyncio.create_task(first.run())
+        second_run = asyncio.create_task(second.run())
+        async with asyncio.timeout(10):
+            while not first.inflight:
+                await asyncio.sleep(0.01)
+        owned = set(first.inflight)
+        self.assertTrue(owned)
+        first_run.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await first_run
+
+        async with asyncio.timeout(30):
+            results = await self.coordinator.wait()
+            completed = await second_run
+        self.assertEqual([result.name for result in results], list(self.coordinator.accounts))
+        for result in results:
+            self.assertIsNone(result.error, result.name)
+            self.assertEqual([item.module for item in result.results], ["sanity", "recruit"])
+            self.assertTrue(all(item.error is None for item in result.results))
+        self.assertTrue(owned <= second.finished)
+        self.assertEqual(completed, len(results) - len(first.finished))
+        # 第二个 worker 在全部完成后离开, 不再计为重新分配
+        stats = self.coordinator.stats
+        self.assertEqual((stats.joins, stats.leaves, stats.rebalances), (2, 2, 1))
+        self.assertEqual(self.coordinator.workers, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+"""
+Notifier 的抑制窗口, 批次合并, 重试与状态文件, 通过 WebhookRecorder 接收通知
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from skland_api.models import evaluation_clock
+from skland_api.notify import Notifier, Rule, WebhookSink
+from skland_api.testing.sink import WebhookRecorder
+
+NOW = 1_750_000_000
+SUPPRESS = 3600
+
+RULES = [
+    Rule(name="ap_high", module="sanity", field="ap", op=">=", value=100, message="理智 {value}"),
+    Rule(
+        name="slot_idle",
+        module="recruit",
+        field="slots.*.idle",
+        op="==",
+        value=True,
+        message="公招位空闲",
+    ),
+]
+
+
+class NotifierTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.recorder = WebhookRecorder()
+        self.url = await self.recorder.start()
+        self.addAsyncCleanup(self.recorder.close)
+
+    def make_notifier(self, **kwargs) -> Notifier:
+        notifier = Notifier(
+            [WebhookSink(self.url)], rules=RULES, suppress=SUPPRESS, backoff=0, **kwargs
+        )
+        self.addAsyncCleanup(notifier.aclose)
+        return notifier
+
+    def observe(self, notifier: Notifier, at: int, ap: int, name: str = "a") -> int:
+        with evaluation_clock(at):
+            return notifier.observe(name, "1", "sanity", {"ap": ap})
+
+    async def test_suppression_window(self):
+        notifier = self.make_notifier()
+        self.assertEqual(self.observe(notifier, NOW, 120), 1)
+        self.assertEqual(await notifier.flush(), 1)
+        self.assertEqual(self.observe(notifier, NOW + 60, 130), 0)
+        self.assertEqual(self.observe(notifier, NOW + SUPPRESS - 1, 130), 0)
+        self.assertEqual(await notifier.flush(), 0)
+        self.assertEqual(self.observe(notifier, NOW + SUPPRESS, 130), 1)
+        self.assertEqual(await notifier.flush(), 1)
+        self.assertEqual([payload["count"] for payload in self.recorder.payloads], [1, 1])
+        self.assertEqual(self.recorder.payloads[1]["events"][0]["value"], 130)
+
+    async def test_reset_when_condition_stops(self):
+        notifier = self.make_notifier()
+        self.observe(notifier, NOW, 120)
+        await notifier.flush()
+        self.assertEqual(self.observe(notifier, NOW + 60, 50), 0)
+        self.assertEqual(notifier.active, {})
+        # 抑制窗口内条件再次满足时立即通知
+        self.assertEqual(self.observe(notifier, NOW + 120, 120), 1)
+
+    async def test_reset_drops_pending_event(self):
+        notifier = self.make_notifier()
+        self.observe(notifier, NOW, 120)
+        self.observe(notifier, NOW + 60, 50)
+        self.assertEqual(await notifier.flush(), 0)
+        self.assertEqual(self.recorder.requests, 0)
+
+    async def test_batches_into_one_payload(self):
+        notifier = self.make_notifier()
+        self.observe(notifier, NOW, 120, name="b")
+        self.observe(notifier, NOW, 110, name="a")
+        # 同一事件在批次中只保留最新的一个
+        self.observe(notifier, NOW + 30, 125, name="b")
+        with evaluation_clock(NOW):
+            notifier.observe("a", "1", "recruit", {"slots": [{"idle": True}, {"idle": False}]})
+        self.assertEqual(await notifier.flush(), 3)
+        self.assertEqual(len(self.recorder.payloads), 1)
+        payload = self.recorder.payloads[0]
+        self.assertEqual(payload["count"], 3)
+        self.assertEqual(
+            [(event["name"], event["path"], event["value"]) for event in payload["events"]],
+            [("a", "ap", 110), ("a", "slots.0.idle", True), ("b", "ap", 125)],
+        )
+        self.assertEqual(len(payload["text"].splitlines()), 3)
+
+    async def test_retries_server_errors(self):
+        self.recorder.fail_first = 2
+        notifier = self.make_notifier(retries=2)
+        self.observe(notifier, NOW, 120)
+        self.assertEqual(await notifier.flush(), 1)
+        self.assertEqual(self.recorder.requests, 3)
+        self.assertEqual(len(self.recorder.payloads), 1)
+        self.assertIn(("ap_high", "a", "1"), notifier.active)
+
+    async def test_gives_up_after_retries(self):
+        self.recorder.fail_first = 3
+        notifier = self.make_notifier(retries=2)
+        self.observe(notifier, NOW, 120)
+        self.assertEqual(await notifier.flush(), 0)
+        self.assertEqual(self.recorder.requests, 3)
+        # 发送失败的事件不计入抑制窗口
+        self.assertEqual(notifier.active, {})
+        self.assertEqual(self.observe(notifier, NOW + 60, 120), 1)
+
+    async def test_client_error_is_not_retried(self):
+        self.recorder.fail_first = 1
+        self.recorder.fail_status = 400
+        notifier = self.make_notifier(retries=3)
+        self.observe(notifier, NOW, 120)
+        self.assertEqual(await notifier.flush(), 0)
+        self.assertEqual(self.recorder.requests, 1)
+        self.assertEqual(notifier.active, {})
+
+    async def test_rate_limit_is_retried(self):
+        self.recorder.fail_first = 1
+        self.recorder.fail_status = 429
+        notifier = self.make_notifier(retries=1)
+        self.observe(notifier, NOW, 120)
+        self.assertEqual(await notifier.flush(), 1)
+        self.assertEqual(self.recorder.requests, 2)
+
+    async def test_state_round_trip(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            file = Path(workdir) / "notify-state.json"
+            notifier = self.make_notifier()
+            self.observe(notifier, NOW, 120)
+            self.observe(notifier, NOW, 120, name="b")
+            await notifier.flush()
+            notifier.save(file)
+
+            loaded = Notifier.load(file, [WebhookSink(self.url)], rules=RULES, suppress=SUPPRESS)
+            self.addAsyncCleanup(loaded.aclose)
+            self.assertEqual(loaded.active, notifier.active)
+            self.assertEqual(loaded.file, file)
+            self.assertEqual(self.observe(loaded, NOW + 60, 120), 0)
+            self.assertEqual(self.observe(loaded, NOW + SUPPRESS, 120), 1)
+
+    async def test_invalid_state_starts_empty(self):
+        states = {
+            "not json": "{",
+            "not an object": "[]",
+            "wrong version": json.dumps({"version": 0, "active": []}),
+            "missing active": json.dumps({"version": 1}),
+            "active not a list": json.dumps({"version": 1, "active": "x"}),
+            "short entry": json.dumps({"version": 1, "active": [["a", "b"]]}),
+            "entry not a list": json.dumps({"version": 1, "active": [1]}),
+            "wrong types": json.dumps({"version": 1, "active": [["r", "a", "1", "ap", "x"]]}),
+        }
+        with tempfile.TemporaryDirectory() as workdir:
+            file = Path(workdir) / "notify-state.json"
+            for case, content in states.items():
+                with self.subTest(case=case):
+                    file.write_text(content, encoding="utf-8")
+                    notifier = Notifier.load(file, [], rules=RULES)
+                    self.assertEqual(notifier.active, {})
+                    self.assertEqual(notifier.file, file)
+
+
+if __name__ == "__main__":
+    unittest.main()